@@ -0,0 +1,25 @@
+import pytest
+
+from benchmarks.safe_generator import generate_granule, generate_granules
+
+
+@pytest.fixture(scope="session")
+def granule_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("granules")
+
+
+@pytest.fixture(scope="session",
+                params=[("1SDV", False), ("1SDH", False), ("1SSV", False),
+                        ("1SDV", True)],
+                ids=["1SDV", "1SDH", "1SSV", "azure"])
+def granule_href(request, granule_dir):
+    product, azure = request.param
+    name = f"{product}-azure" if azure else product
+    return generate_granule(str(granule_dir / name),
+                            product=product,
+                            azure=azure)
+
+
+@pytest.fixture(scope="session")
+def batch_hrefs(granule_dir):
+    return generate_granules(str(granule_dir / "batch"), 20)
@@ -0,0 +1,297 @@
+"""Generates synthetic Sentinel-1 GRD granules for benchmarking.
+
+The granules are built from the test granule: its XML files are copied with
+the product name, times, orbit, datatake, polarisations and footprint
+rewritten, and the measurement TIFFs are left empty, like in the test data.
+With ``--measurement-size``, the measurements and previews are filled with
+that many bytes instead and the sizes and checksums of the manifest are set
+to match the files.
+
+Usage::
+
+    python -m benchmarks.safe_generator DST --count 100 --product 1SDH
+"""
+import argparse
+import hashlib
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from lxml import etree
+
+from tests import test_data
+
+TEMPLATE_NAME = (
+    "S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8")
+TEMPLATE_HREF = test_data.get_path(f"data-files/{TEMPLATE_NAME}.SAFE")
+TEMPLATE_START = datetime(2021, 8, 9, 17, 39, 53, 153776)
+TEMPLATE_ORBIT = 39156
+TEMPLATE_DATATAKE = 0x049F13
+
+# Products by their polarisation code, as a list of (polarisation, the
+# polarisation of the test granule it is derived from, image number)
+PRODUCTS = {
+    "1SDV": [("vv", "vv", "001"), ("vh", "vh", "002")],
+    "1SDH": [("hh", "vv", "001"), ("hv", "vh", "002")],
+    "1SSV": [("vv", "vv", "001")],
+    "1SSH": [("hh", "vv", "001")],
+}
+
+SLICE_DURATION = timedelta(seconds=24.999024)
+
+NAMESPACES = {
+    "safe": "http://www.esa.int/safe/sentinel-1.0",
+    "gml": "http://www.opengis.net/gml",
+    "s1sarl1": "http://www.esa.int/safe/sentinel-1.0/sentinel-1/sar/level-1",
+}
+
+
+def _read(*paths: str) -> bytes:
+    with open(os.path.join(TEMPLATE_HREF, *paths), "rb") as f:
+        return f.read()
+
+
+def _write(data: bytes, *paths: str) -> None:
+    path = os.path.join(*paths)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _replace_all(data: bytes, replacements: Dict[str, str]) -> bytes:
+    text = data.decode("utf-8")
+    pattern = re.compile("|".join(re.escape(x) for x in replacements))
+    return pattern.sub(lambda m: replacements[m.group(0)],
+                       text).encode("utf-8")
+
+
+def _scale_annotation(data: bytes, scale: int) -> bytes:
+    # Repeat the geolocation grid to grow the annotation
+    root = etree.fromstring(data)
+    grid = root.find("geolocationGrid/geolocationGridPointList")
+    points = list(grid)
+    for _ in range(scale - 1):
+        for point in points:
+            grid.append(etree.fromstring(etree.tostring(point)))
+    grid.set("count", str(len(grid)))
+    return etree.tostring(root, xml_declaration=True, encoding="UTF-8")
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _fill(size: int, *paths: str) -> None:
+    path = os.path.join(*paths)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    block = os.urandom(min(size, 1024 * 1024))
+    with open(path, "wb") as f:
+        for offset in range(0, size, len(block)):
+            f.write(block[:size - offset])
+
+
+def seal_manifest(granule_href: str) -> None:
+    """Sets the size and MD5 checksum of every data object of the manifest
+    of a granule to those of its file, for the files that exist."""
+    manifest_path = os.path.join(granule_href, "manifest.safe")
+    manifest = etree.fromstring(_read_file(manifest_path))
+    for byte_stream in manifest.iterfind("dataObjectSection/*/byteStream"):
+        path = os.path.join(
+            granule_href,
+            byte_stream.find("fileLocation").get("href").strip("./"))
+        if not os.path.exists(path):
+            continue
+        digest = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        byte_stream.set("size", str(os.path.getsize(path)))
+        byte_stream.find("checksum").text = digest.hexdigest()
+    _write(etree.tostring(manifest, xml_declaration=True, encoding="UTF-8"),
+           manifest_path)
+
+
+def generate_granule(dst: str,
+                     index: int = 0,
+                     platform: str = "S1A",
+                     product: str = "1SDV",
+                     azure: bool = False,
+                     scale: int = 1,
+                     measurement_size: int = 0) -> str:
+    """Writes a synthetic granule and returns its HREF.
+
+    Args:
+        dst (str): The directory the granule is written to.
+        index (int): The position of the granule in a sequence. Granules with
+            different indexes have different times, orbits, datatakes,
+            footprints and unique ids.
+        platform (str): ``S1A`` or ``S1B``.
+        product (str): The polarisation code, one of :data:`PRODUCTS`.
+        azure (bool): If True, use the naming of the Azure copy of the
+            archive: no ``.SAFE`` extension and short file names such as
+            ``annotation/iw-vv.xml``.
+        scale (int): Repeat the annotation geolocation grid this many times
+            to make larger annotation files.
+        measurement_size (int): If given, fill the measurements and previews
+            with this many bytes and set the sizes and checksums of the
+            manifest to match the files.
+
+    Returns:
+        str: The HREF to the granule.
+    """
+    start = TEMPLATE_START + index * SLICE_DURATION
+    stop = start + SLICE_DURATION
+    orbit = TEMPLATE_ORBIT + index // 200
+    relative_orbit = (orbit - 73) % 175 + 1
+    datatake = TEMPLATE_DATATAKE + index // 20
+    unique_id = f"{(0x6FF8 + index) % 0x10000:04X}"
+
+    start_str = start.strftime("%Y%m%dT%H%M%S")
+    stop_str = stop.strftime("%Y%m%dT%H%M%S")
+    name = (f"{platform}_IW_GRDH_{product}_{start_str}_{stop_str}_"
+            f"{orbit:06d}_{datatake:06X}_{unique_id}")
+    granule_href = os.path.join(dst, name if azure else f"{name}.SAFE")
+
+    polarisations = PRODUCTS[product]
+    file_names = {}
+    for polarisation, template_polarisation, image_number in polarisations:
+        template_stem = (
+            f"s1a-iw-grd-{template_polarisation}-"
+            f"20210809t173953-20210809t174018-039156-049f13-"
+            f"{'001' if template_polarisation == 'vv' else '002'}")
+        if azure:
+            stem = f"iw-{polarisation}"
+        else:
+            stem = (f"{platform.lower()}-iw-grd-{polarisation}-"
+                    f"{start_str.lower()}-{stop_str.lower()}-"
+                    f"{orbit:06d}-{datatake:06x}-{image_number}")
+        file_names[template_stem] = stem
+
+    replacements = {
+        TEMPLATE_NAME: name,
+        "2021-08-09T17:39:53.153776": start.isoformat(),
+        "2021-08-09T17:40:18.152800": stop.isoformat(),
+        **file_names,
+    }
+
+    # Annotation, calibration and noise files
+    for template_stem, stem in file_names.items():
+        polarisation = stem.split("-")[1 if azure else 3].upper()
+        template_polarisation = template_stem.split("-")[3].upper()
+        polarisation_replacements = {
+            **replacements,
+            f"<polarisation>{template_polarisation}</polarisation>":
+            f"<polarisation>{polarisation}</polarisation>",
+        }
+        annotation = _read("annotation", f"{template_stem}.xml")
+        if scale > 1:
+            annotation = _scale_annotation(annotation, scale)
+        _write(_replace_all(annotation, polarisation_replacements),
+               granule_href, "annotation", f"{stem}.xml")
+        for kind in ["calibration", "noise"]:
+            _write(
+                _replace_all(
+                    _read("annotation", "calibration",
+                          f"{kind}-{template_stem}.xml"),
+                    polarisation_replacements),
+                granule_href,
+                "annotation",
+                "calibration",
+                f"{kind}-{stem}.xml",
+            )
+        _write(b"", granule_href, "measurement", f"{stem}.tiff")
+
+    # Manifest
+    manifest = etree.fromstring(_read("manifest.safe"))
+    manifest.find(".//safe:startTime", NAMESPACES).text = start.isoformat()
+    manifest.find(".//safe:stopTime", NAMESPACES).text = stop.isoformat()
+    manifest.find(".//safe:number", NAMESPACES).text = platform[-1]
+    for orbit_number in manifest.findall(".//safe:orbitNumber", NAMESPACES):
+        orbit_number.text = str(orbit)
+    for relative in manifest.findall(".//safe:relativeOrbitNumber",
+                                     NAMESPACES):
+        relative.text = str(relative_orbit)
+    manifest.find(".//s1sarl1:missionDataTakeID",
+                  NAMESPACES).text = str(datatake)
+
+    product_information = manifest.find(".//s1sarl1:productType",
+                                        NAMESPACES).getparent()
+    for element in manifest.findall(
+            ".//s1sarl1:transmitterReceiverPolarisation", NAMESPACES):
+        product_information.remove(element)
+    for i, (polarisation, _, _) in enumerate(polarisations):
+        element = etree.Element(
+            f"{{{NAMESPACES['s1sarl1']}}}transmitterReceiverPolarisation")
+        element.text = polarisation.upper()
+        product_information.insert(2 + i, element)
+
+    # Drop the data objects of polarisations the product does not have
+    data_object_section = manifest.find("dataObjectSection")
+    for data_object in list(data_object_section):
+        href = data_object.find("byteStream/fileLocation").get("href")
+        if "-iw-grd-" in href and not any(x in href for x in file_names):
+            data_object_section.remove(data_object)
+
+    # Shift the footprint along the track
+    coordinates = manifest.find(".//gml:coordinates", NAMESPACES)
+    shift = (index % 20) * 1.5
+    coordinates.text = " ".join(
+        f"{float(lat) + shift:.6f},{lon}"
+        for lat, lon in (x.split(",") for x in coordinates.text.split()))
+
+    manifest_data = etree.tostring(manifest,
+                                   xml_declaration=True,
+                                   encoding="UTF-8")
+    # The times of the manifest are already set, and may equal the template
+    # times of another field
+    _write(_replace_all(manifest_data, {
+        TEMPLATE_NAME: name,
+        **file_names
+    }), granule_href, "manifest.safe")
+
+    if measurement_size:
+        for stem in file_names.values():
+            _fill(measurement_size, granule_href, "measurement",
+                  f"{stem}.tiff")
+        for preview in [
+                "map-overlay.kml", "product-preview.html", "quick-look.png"
+        ]:
+            _fill(1024, granule_href, "preview", preview)
+        seal_manifest(granule_href)
+
+    return granule_href
+
+
+def generate_granules(dst: str, count: int, **kwargs) -> List[str]:
+    """Writes ``count`` synthetic granules and returns their HREFs.
+
+    Keyword arguments are passed to :func:`generate_granule`.
+    """
+    return [generate_granule(dst, index=i, **kwargs) for i in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dst", help="Directory to write the granules to")
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--platform", choices=["S1A", "S1B"], default="S1A")
+    parser.add_argument("--product", choices=sorted(PRODUCTS), default="1SDV")
+    parser.add_argument("--azure", action="store_true")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--measurement-size", type=int, default=0)
+    args = parser.parse_args()
+
+    for href in generate_granules(args.dst,
+                                  args.count,
+                                  platform=args.platform,
+                                  product=args.product,
+                                  azure=args.azure,
+                                  scale=args.scale,
+                                  measurement_size=args.measurement_size):
+        print(href)
+
+
+if __name__ == "__main__":
+    main()
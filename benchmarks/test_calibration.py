@@ -0,0 +1,23 @@
+from stactools.sentinel1_grd.calibration import (CalibrationLUT,
+                                                 read_calibration)
+from tests import test_data
+
+CALIBRATION_HREF = test_data.get_path(
+    "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE/"
+    "annotation/calibration/"
+    "calibration-s1a-iw-grd-vv-20210809t173953-20210809t174018-039156-049f13-001.xml"
+)
+
+
+def test_parse_calibration(benchmark):
+    benchmark(CalibrationLUT.from_xml, CALIBRATION_HREF)
+
+
+def test_load_cached_calibration(benchmark, tmp_path):
+    read_calibration(CALIBRATION_HREF, str(tmp_path))
+    benchmark(read_calibration, CALIBRATION_HREF, str(tmp_path))
+
+
+def test_interpolate_calibration(benchmark):
+    lut = CalibrationLUT.from_xml(CALIBRATION_HREF)
+    benchmark(lut.interpolate, ((0, 1024), (0, 1024)))
@@ -0,0 +1,107 @@
+import pystac
+from pystac.extensions.projection import ProjectionExtension
+from pystac.extensions.sar import SarExtension
+from pystac.extensions.sat import SatExtension
+
+from stactools.sentinel1_grd.annotation import AnnotationHeader
+from stactools.sentinel1_grd.batch import create_items
+from stactools.sentinel1_grd.bands import image_asset_from_href
+from stactools.sentinel1_grd.manifest import SafeManifest
+from stactools.sentinel1_grd.metadata_links import MetadataLinks
+from stactools.sentinel1_grd.product_metadata import ProductMetadata
+from stactools.sentinel1_grd.properties import (
+    fill_proj_properties,
+    fill_sar_properties,
+    fill_sat_properties,
+)
+from stactools.sentinel1_grd.stac import create_item
+
+
+def _empty_item(product_metadata):
+    return pystac.Item(
+        id=product_metadata.scene_id,
+        geometry=product_metadata.geometry,
+        bbox=product_metadata.bbox,
+        datetime=product_metadata.get_datetime,
+        properties={},
+    )
+
+
+def test_create_item(benchmark, granule_href):
+    benchmark(create_item, granule_href)
+
+
+def test_metadata_links(benchmark, granule_href):
+    benchmark(MetadataLinks, granule_href)
+
+
+def test_product_metadata(benchmark, granule_href):
+    def _product_metadata():
+        manifest = SafeManifest(granule_href)
+        product_metadata = ProductMetadata(manifest.href, manifest)
+        return product_metadata.metadata_dict, product_metadata.platform
+
+    benchmark(_product_metadata)
+
+
+def test_annotation_header(benchmark, granule_href):
+    annotation_href = MetadataLinks(granule_href).annotation_hrefs[0]
+    benchmark(AnnotationHeader, annotation_href)
+
+
+def test_annotation_geolocation_grid_footprint(benchmark, granule_href):
+    annotation_href = MetadataLinks(granule_href).annotation_hrefs[0]
+
+    def _footprint():
+        header = AnnotationHeader(annotation_href, geolocation_grid=True)
+        return header.geolocation_grid.footprint(0.01)
+
+    benchmark(_footprint)
+
+
+def test_fill_properties(benchmark, granule_href):
+    manifest = SafeManifest(granule_href)
+    product_metadata = ProductMetadata(manifest.href, manifest)
+    annotation = AnnotationHeader(
+        MetadataLinks(granule_href, manifest).annotation_hrefs[0])
+
+    def _fill():
+        item = _empty_item(product_metadata)
+        fill_sar_properties(SarExtension.ext(item, add_if_missing=True),
+                            manifest, annotation)
+        fill_sat_properties(SatExtension.ext(item, add_if_missing=True),
+                            manifest)
+        fill_proj_properties(
+            ProjectionExtension.ext(item, add_if_missing=True),
+            product_metadata, annotation)
+
+    benchmark(_fill)
+
+
+def test_create_assets(benchmark, granule_href):
+    manifest = SafeManifest(granule_href)
+    metalinks = MetadataLinks(granule_href, manifest)
+    product_metadata = ProductMetadata(manifest.href, manifest)
+    item = _empty_item(product_metadata)
+
+    def _assets():
+        return (
+            metalinks.create_manifest_asset(),
+            metalinks.create_product_asset(),
+            metalinks.create_calibration_asset(),
+            metalinks.create_noise_asset(),
+            [
+                image_asset_from_href(manifest.join("measurement", x), item)
+                for x in product_metadata.image_paths
+            ],
+        )
+
+    benchmark(_assets)
+
+
+def test_create_items_batch(benchmark, batch_hrefs, tmp_path):
+    result = benchmark.pedantic(create_items,
+                                args=(batch_hrefs, str(tmp_path)),
+                                kwargs={"workers": 1},
+                                rounds=3)
+    assert len(result.item_hrefs) == len(batch_hrefs)
@@ -0,0 +1,21 @@
+import pytest
+
+from tests.test_import import import_times
+
+
+@pytest.mark.parametrize(
+    "code,module",
+    [
+        ("import stactools.sentinel1_grd", "stactools.sentinel1_grd"),
+        ("import stactools.sentinel1_grd.commands",
+         "stactools.sentinel1_grd.commands"),
+        ("from stactools.sentinel1_grd import create_item",
+         "stactools.sentinel1_grd.stac"),
+    ],
+    ids=["package", "commands", "create_item"],
+)
+def test_import_time(benchmark, code, module):
+    # Each round starts a new interpreter, as workers do on a cold start.
+    # The import time reported by -X importtime is kept with the results.
+    times = benchmark.pedantic(import_times, args=(code, ), rounds=5)
+    benchmark.extra_info["import_time_us"] = times[module]
@@ -0,0 +1,29 @@
+import pytest
+
+from stactools.sentinel1_grd.inventory import InventoryIndex, parse_scene_names
+
+COUNT = 100000
+
+
+@pytest.fixture(scope="module")
+def listing():
+    return [
+        f"s3://bucket/S1A_IW_GRDH_1SDV_2021{i % 12 + 1:02d}09T1739{i % 60:02d}"
+        f"_20210809T174018_{i % 1000000:06d}_049F13_{i % 65536:04X}.SAFE"
+        for i in range(COUNT)
+    ]
+
+
+def test_parse_scene_names(benchmark, listing):
+    names = benchmark(parse_scene_names, listing)
+    assert names.valid.all()
+
+
+def test_inventory_add_scenes(benchmark, listing, tmp_path):
+    def _add(path):
+        with InventoryIndex(str(path)) as index:
+            return index.add_scenes(listing)
+
+    paths = iter(tmp_path / f"inventory-{i}.db" for i in range(1000))
+    count = benchmark.pedantic(lambda: _add(next(paths)), rounds=3)
+    assert count == COUNT
@@ -0,0 +1,63 @@
+import os
+import pickle
+
+from lxml import etree
+from stactools.core.io.xml import XmlElement
+
+from stactools.sentinel1_grd.manifest import read_manifest_fields
+from stactools.sentinel1_grd.product_metadata import read_product_record
+from tests import test_data
+
+MANIFEST_PATH = test_data.get_path(
+    "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE/"
+    "manifest.safe")
+
+
+def _parse_manifest():
+    with open(MANIFEST_PATH, "rb") as f:
+        return etree.fromstring(f.read())
+
+
+def _read_fields_with_descendant_scans(root):
+    # The queries item creation used to run, one full scan each
+    return [
+        root.findall(".//safe:startTime")[0].text,
+        root.findall(".//safe:stopTime")[0].text,
+        root.findall(".//safe:familyName")[0].text,
+        root.findall(".//safe:number")[0].text,
+        root.findall(".//safe:cycleNumber")[0].text,
+        root.findall(".//s1sarl1:instrumentConfigurationID")[0].text,
+        root.findall(".//s1sarl1:missionDataTakeID")[0].text,
+        root.findall(".//gml:coordinates")[0].text,
+        root.findall(".//s1sarl1:mode")[0].text,
+        [
+            x.text
+            for x in root.findall(".//s1sarl1:transmitterReceiverPolarisation")
+        ],
+        root.findall(".//s1sarl1:productType")[0].text,
+        root.findall(".//safe:nssdcIdentifier")[0].text,
+        root.findall(".//s1:pass")[0].text,
+        root.findall(".//safe:orbitNumber")[0].text,
+        root.findall(".//safe:relativeOrbitNumber")[0].text,
+    ]
+
+
+def test_manifest_fields_descendant_scans(benchmark):
+    element = _parse_manifest()
+    benchmark(lambda: _read_fields_with_descendant_scans(XmlElement(element)))
+
+
+def test_manifest_fields_anchored_xpaths(benchmark):
+    element = _parse_manifest()
+    benchmark(lambda: read_manifest_fields(XmlElement(element)))
+
+
+def test_read_product_record(benchmark):
+    benchmark(read_product_record, os.path.dirname(MANIFEST_PATH))
+
+
+def test_pickle_product_record(benchmark):
+    # What a worker sends back per granule
+    record = read_product_record(os.path.dirname(MANIFEST_PATH))
+    data = benchmark(pickle.dumps, record)
+    benchmark.extra_info["pickled_bytes"] = len(data)
@@ -0,0 +1,18 @@
+from stactools.sentinel1_grd.noise import NoiseVectors
+from tests import test_data
+
+NOISE_HREF = test_data.get_path(
+    "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE/"
+    "annotation/calibration/"
+    "noise-s1a-iw-grd-vv-20210809t173953-20210809t174018-039156-049f13-001.xml"
+)
+
+
+def test_parse_noise(benchmark):
+    benchmark(NoiseVectors.from_xml, NOISE_HREF)
+
+
+def test_interpolate_noise_block(benchmark):
+    noise = NoiseVectors.from_xml(NOISE_HREF)
+    # A full-width block of an IW scene
+    benchmark(noise.interpolate, ((0, 1024), (0, 26144)))
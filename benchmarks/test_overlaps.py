@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from shapely.geometry import box
+
+from stactools.sentinel1_grd.overlaps import (DUPLICATE, Footprint,
+                                              FootprintIndex)
+
+TRACKS = 175
+CYCLES = 60
+START = datetime(2021, 1, 1, tzinfo=timezone.utc)
+SLICE = timedelta(seconds=25)
+
+
+@pytest.fixture(scope="module")
+def footprints():
+    # Consecutive slices of one datatake per relative orbit and cycle, and
+    # a reprocessing of every hundredth scene
+    result = []
+    for cycle in range(CYCLES):
+        for track in range(TRACKS):
+            start = START + timedelta(days=12 * cycle, minutes=98 * track)
+            for i in range(2):
+                geometry = box(track, i * 1.8, track + 2.5, i * 1.8 + 2)
+                id = f"{cycle:03d}-{track:03d}-{i}"
+                result.append(
+                    Footprint(f"{id}-0000", geometry, start + i * SLICE,
+                              start + (i + 1) * SLICE, id[:-2]))
+                if len(result) % 100 == 0:
+                    result.append(result[-1]._replace(id=f"{id}-0001"))
+    return result
+
+
+def test_footprint_index(benchmark, footprints):
+    index = benchmark(FootprintIndex, footprints)
+    assert len(index) == len(footprints)
+
+
+def test_overlaps(benchmark, footprints):
+    index = FootprintIndex(footprints)
+    overlaps = benchmark(lambda: list(index.overlaps()))
+    assert len(overlaps) > TRACKS * CYCLES
+
+
+def test_duplicates(benchmark, footprints):
+    index = FootprintIndex(footprints)
+    duplicates = benchmark(lambda: list(index.duplicates()))
+    assert len(duplicates) == len(footprints) - TRACKS * CYCLES * 2
+    assert all(x.kind == DUPLICATE for x in duplicates)
@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+from stactools.sentinel1_grd.stac import create_item
+from stactools.sentinel1_grd.validation import (BundledSchemaValidator,
+                                                validate_items)
+
+COUNT = 1000
+
+
+@pytest.fixture(scope="module")
+def item(batch_hrefs):
+    return json.loads(
+        json.dumps(
+            create_item(batch_hrefs[0]).to_dict(include_self_link=False)))
+
+
+def test_item_errors(benchmark, item):
+    validator = BundledSchemaValidator()
+    assert benchmark(validator.item_errors, item) == []
+
+
+@pytest.mark.parametrize("workers", [1, None])
+def test_validate_items(benchmark, item, workers):
+    result = benchmark.pedantic(validate_items,
+                                args=([item] * COUNT, workers),
+                                rounds=3)
+    assert result.count == COUNT
+    benchmark.extra_info["items_per_second"] = result.throughput
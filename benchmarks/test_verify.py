@@ -0,0 +1,21 @@
+import pytest
+
+from benchmarks.safe_generator import generate_granule
+from stactools.sentinel1_grd.verify import verify_granule
+
+MEASUREMENT_SIZE = 64 * 1024 * 1024
+
+
+@pytest.fixture(scope="module")
+def sealed_granule_href(granule_dir):
+    return generate_granule(str(granule_dir / "sealed"),
+                            measurement_size=MEASUREMENT_SIZE)
+
+
+@pytest.mark.parametrize("threads", [1, 4])
+def test_verify_granule(benchmark, sealed_granule_href, threads):
+    result = benchmark.pedantic(verify_granule,
+                                args=(sealed_granule_href, threads),
+                                rounds=3)
+    assert result.ok, result.failures
+    benchmark.extra_info["bytes_per_second"] = result.throughput
@@ -1,9 +1,16 @@
-import stactools.core
-from stactools.sentinel1_grd.stac import create_item
+from typing import Any
 
 __all__ = ["create_item"]
 
-stactools.core.use_fsspec()
+
+def __getattr__(name: str) -> Any:
+    # Item creation pulls in pystac, shapely, NumPy and lxml, so it is only
+    # imported when it is first used, not when the plugin is discovered
+    if name == "create_item":
+        from stactools.sentinel1_grd.stac import create_item
+
+        return create_item
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def register_plugin(registry):
@@ -0,0 +1,212 @@
+from typing import Dict, Optional
+
+import numpy as np
+from lxml import etree  # type: ignore
+from shapely.geometry import Polygon  # type: ignore
+from shapely.geometry.polygon import orient  # type: ignore
+
+from .profiling import Profile
+from .xml_cache import open_xml
+
+
+class AnnotationError(Exception):
+    pass
+
+
+def _compile(field: str) -> etree.XPath:
+    return etree.XPath(
+        f"geolocationGridPointList/geolocationGridPoint/{field}/text()")
+
+
+# The fields of the geolocation grid points, by attribute of GeolocationGrid
+GEOLOCATION_GRID_FIELDS = {
+    "line": _compile("line"),
+    "pixel": _compile("pixel"),
+    "latitude": _compile("latitude"),
+    "longitude": _compile("longitude"),
+    "height": _compile("height"),
+    "incidence_angle": _compile("incidenceAngle"),
+    "elevation_angle": _compile("elevationAngle"),
+}
+
+
+class GeolocationGrid:
+    """The geolocation grid of a product annotation, as NumPy arrays.
+
+    The grid is a lattice of tie points over the image, typically 10 lines
+    by 21 pixels, each with its geographic position and angles. All arrays
+    have the shape ``(lines, pixels)`` of the lattice.
+
+    Args:
+        element: The ``geolocationGrid`` element of the annotation.
+        href (str): The HREF to the annotation, for error messages.
+    """
+    def __init__(self, element, href: str) -> None:
+        self.href = href
+
+        # Each field is extracted with a single XPath query and converted
+        # in one go
+        arrays = {
+            name: np.array(xpath(element), dtype=np.float64)
+            for name, xpath in GEOLOCATION_GRID_FIELDS.items()
+        }
+
+        count = len(arrays["line"])
+        lines = np.unique(arrays["line"])
+        if count == 0 or count != lines.size * (count // lines.size) or any(
+                len(x) != count for x in arrays.values()):
+            raise AnnotationError(
+                f"Geolocation grid of annotation at {href} is not a lattice")
+        shape = (lines.size, count // lines.size)
+
+        self.line = arrays["line"].astype(np.int64).reshape(shape)
+        self.pixel = arrays["pixel"].astype(np.int64).reshape(shape)
+        self.latitude = arrays["latitude"].reshape(shape)
+        self.longitude = arrays["longitude"].reshape(shape)
+        self.height = arrays["height"].reshape(shape)
+        self.incidence_angle = arrays["incidence_angle"].reshape(shape)
+        self.elevation_angle = arrays["elevation_angle"].reshape(shape)
+
+    @property
+    def shape(self):
+        return self.line.shape
+
+    def edge(self) -> np.ndarray:
+        """Returns the tie points along the edge of the image.
+
+        The points are the longitude and latitude of the first line, the
+        last pixel, the last line and the first pixel, in that order, as a
+        closed ring of shape ``(n, 2)``.
+        """
+        points = np.stack([self.longitude, self.latitude], axis=-1)
+        return np.concatenate([
+            points[0, :],
+            points[1:, -1],
+            points[-1, -2::-1],
+            points[-2::-1, 0],
+        ])
+
+    def footprint(self, tolerance: float = 0.0) -> Polygon:
+        """Returns the footprint of the image from the edge tie points.
+
+        This follows the swath edges much more closely than the four corner
+        footprint of the manifest.
+
+        Args:
+            tolerance (float): The footprint is simplified so that it
+                deviates at most this much from the edge, in degrees. With
+                0, the default, every edge tie point is kept.
+
+        Returns:
+            Polygon: The footprint, with a counterclockwise exterior ring.
+        """
+        polygon = orient(Polygon(self.edge()))
+        if not polygon.is_valid:
+            polygon = polygon.buffer(0)
+        if tolerance > 0:
+            polygon = polygon.simplify(tolerance, preserve_topology=True)
+        return polygon
+
+
+class AnnotationHeader:
+    """Header fields of a product annotation XML file.
+
+    The annotation files are large (around 1.7 MB), but everything needed
+    to describe the image sits near the top of the file. They are read as a
+    stream and parsing stops as soon as the ``imageInformation`` block has
+    been seen, so only a fraction of each file is ever read or parsed.
+
+    Args:
+        href (str): The HREF to the product annotation XML file.
+        incidence_angles (bool): If True, keep reading up to the end of the
+            ``geolocationGrid`` to determine the near and far range incidence
+            angles. Defaults to False.
+        geolocation_grid (bool): If True, keep reading up to the end of the
+            ``geolocationGrid`` and load it as a :class:`GeolocationGrid`.
+            Defaults to False.
+        profile (Optional[Profile]): If given, the opens and bytes read are
+            accounted for in this profile.
+    """
+    def __init__(self,
+                 href: str,
+                 incidence_angles: bool = False,
+                 geolocation_grid: bool = False,
+                 profile: Optional[Profile] = None) -> None:
+        self.href = href
+
+        self.product_quality_index: Optional[float] = None
+        self.quality_flags: Dict[str, bool] = {}
+        self.incidence_angle_near: Optional[float] = None
+        self.incidence_angle_far: Optional[float] = None
+        self.geolocation_grid: Optional[GeolocationGrid] = None
+
+        tags = ["qualityInformation", "imageInformation"]
+        if incidence_angles or geolocation_grid:
+            tags.append("geolocationGrid")
+
+        has_image_information = False
+        has_geolocation_grid = False
+        with open_xml(href, profile) as f:
+            try:
+                for _, element in etree.iterparse(f,
+                                                  events=("end", ),
+                                                  tag=tags):
+                    if element.tag == "qualityInformation":
+                        self._read_quality_information(element)
+                    elif element.tag == "imageInformation":
+                        self._read_image_information(element)
+                        has_image_information = True
+                        if len(tags) == 2:
+                            break
+                    else:
+                        self._read_geolocation_grid(element, geolocation_grid)
+                        has_geolocation_grid = True
+                        break
+                    element.clear()
+            except etree.XMLSyntaxError as e:
+                raise AnnotationError(
+                    f"Annotation at {href} could not be parsed: {e}")
+
+        if not has_image_information:
+            raise AnnotationError(
+                f"Annotation at {href} does not have an imageInformation")
+        if geolocation_grid and not has_geolocation_grid:
+            raise AnnotationError(
+                f"Annotation at {href} does not have a geolocationGrid")
+
+    def _find_text(self, element, tag: str) -> str:
+        text = element.findtext(tag)
+        if text is None:
+            raise AnnotationError(
+                f"Cannot find {tag} in annotation at {self.href}")
+        return text
+
+    def _read_quality_information(self, element) -> None:
+        quality_index = element.findtext("productQualityIndex")
+        if quality_index is not None:
+            self.product_quality_index = float(quality_index)
+
+        # A flag is raised if it is raised in any of the quality records
+        for flag in element.iter():
+            if isinstance(flag.tag, str) and flag.tag.endswith("Flag"):
+                raised = flag.text == "true"
+                self.quality_flags[flag.tag] = (self.quality_flags.get(
+                    flag.tag, False) or raised)
+
+    def _read_image_information(self, element) -> None:
+        self.number_of_samples = int(
+            self._find_text(element, "numberOfSamples"))
+        self.number_of_lines = int(self._find_text(element, "numberOfLines"))
+        self.range_pixel_spacing = float(
+            self._find_text(element, "rangePixelSpacing"))
+        self.azimuth_pixel_spacing = float(
+            self._find_text(element, "azimuthPixelSpacing"))
+        self.incidence_angle_mid_swath = float(
+            self._find_text(element, "incidenceAngleMidSwath"))
+
+    def _read_geolocation_grid(self, element, keep: bool) -> None:
+        grid = GeolocationGrid(element, self.href)
+        if keep:
+            self.geolocation_grid = grid
+        self.incidence_angle_near = float(grid.incidence_angle.min())
+        self.incidence_angle_far = float(grid.incidence_angle.max())
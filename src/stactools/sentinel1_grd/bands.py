@@ -3,8 +3,13 @@ import logging
 import pystac
 from typing import Optional, Tuple
 from pystac.extensions.eo import EOExtension
+from pystac.extensions.projection import ProjectionExtension
+from pystac.extensions.raster import DataType, RasterBand, RasterExtension
 
 from stactools.sentinel1_grd.constants import SENTINEL_POLARISATIONS
+from stactools.sentinel1_grd.profiling import Profile
+from stactools.sentinel1_grd.tiff import (EmptyTiffError, TiffError,
+                                          read_tiff_header)
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +20,36 @@ def image_asset_from_href(
     # resolution_to_shape: Dict[int, Tuple[int, int]],
     # proj_bbox: List[float],
     media_type: Optional[str] = None,
+    pixel_spacing: Optional[float] = None,
+    profile: Optional[Profile] = None,
 ) -> Tuple[str, pystac.Asset]:
+    """Creates the asset of a measurement image.
+
+    For GeoTIFFs, ``raster:bands`` and ``proj:shape`` are read from the TIFF
+    header, without reading the pixels (see
+    :func:`~stactools.sentinel1_grd.tiff.read_tiff_header`). If the header
+    cannot be read, for instance because the file is empty, the asset is
+    created without them.
+
+    Args:
+        asset_href (str): The HREF to the image.
+        item (pystac.Item): The item the asset is created for.
+        media_type (Optional[str]): The media type of the image. Defaults to
+            GeoTIFF for ``.tiff`` files.
+        pixel_spacing (Optional[float]): The pixel spacing of the image, in
+            meters, used in the title and as the spatial resolution.
+        profile (Optional[Profile]): If given, the read of the TIFF header
+            is accounted for in this profile.
+
+    Returns:
+        Tuple[str, pystac.Asset]: The key and the asset.
+    """
     logger.debug(f"Creating asset for image {asset_href}")
 
-    _, ext = os.path.splitext(asset_href)
+    # Files in zipped granules are addressed as zip://<member>::<archive>
+    file_name = os.path.basename(asset_href.split("::")[0])
+
+    _, ext = os.path.splitext(file_name)
     if media_type is not None:
         asset_media_type = media_type
     else:
@@ -29,29 +60,61 @@ def image_asset_from_href(
                 f"Must supply a media type for asset : {asset_href}")
 
     # Handle band image
-    if len(os.path.basename(asset_href).split(".")[0].split("-")) == 2:
-        band_id = os.path.basename(asset_href).split(".")[0].split("-")[-1]
+    if len(file_name.split(".")[0].split("-")) == 2:
+        band_id = file_name.split(".")[0].split("-")[-1]
     else:
-        band_id = os.path.basename(asset_href).split(".")[0].split("-")[3]
+        band_id = file_name.split(".")[0].split("-")[3]
 
     if band_id is not None:
         band = SENTINEL_POLARISATIONS[band_id]
-        # Hard code the resolution
-        asset_res = "10m"
 
         # Create asset
         asset = pystac.Asset(
             href=asset_href,
             media_type=asset_media_type,
-            title=f"{band.name} - {asset_res}",
+            title=band.name
+            if pixel_spacing is None else f"{band.name} - {pixel_spacing:g}m",
             roles=["data"],
         )
 
         asset_eo = EOExtension.ext(asset)
         asset_eo.bands = [SENTINEL_POLARISATIONS[band_id]]
 
+        if asset_media_type == pystac.MediaType.GEOTIFF:
+            _fill_raster_properties(asset, item, pixel_spacing, profile)
+
         return (band_id, asset)
 
     else:
 
         raise ValueError(f"Unexpected asset: {asset_href}")
+
+
+def _fill_raster_properties(asset: pystac.Asset, item: pystac.Item,
+                            pixel_spacing: Optional[float],
+                            profile: Optional[Profile]) -> None:
+    try:
+        header = read_tiff_header(asset.href, profile)
+    except EmptyTiffError as e:
+        # Expected for stripped-down granules, which keep the measurement
+        # files but not their content
+        logger.debug(f"Could not read the TIFF header of {asset.href}: {e}")
+        return
+    except (TiffError, OSError) as e:
+        logger.warning(f"Could not read the TIFF header of {asset.href}: {e}")
+        return
+
+    # The extensions are declared on the item
+    asset.set_owner(item)
+    data_type = header.data_type
+    raster = RasterExtension.ext(asset, add_if_missing=True)
+    raster.bands = [
+        RasterBand.create(
+            data_type=None if data_type is None else DataType(data_type),
+            nodata=header.nodata,
+            bits_per_sample=header.bits_per_sample,
+            spatial_resolution=pixel_spacing,
+        ) for _ in range(header.samples_per_pixel)
+    ]
+
+    ProjectionExtension.ext(asset, add_if_missing=True).shape = header.shape
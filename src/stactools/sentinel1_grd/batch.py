@@ -0,0 +1,470 @@
+import glob
+import json
+import logging
+import os
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import (Any, Callable, Deque, Dict, Iterable, Iterator, List,
+                    Optional, Tuple, TypeVar)
+
+from .bulk import (DEFAULT_ROW_GROUP_SIZE, GEOPARQUET, NDJSON,
+                   write_geoparquet, write_ndjson)
+from .index import (ItemIndex, granule_fingerprint, item_options_key,
+                    product_id_from_href)
+from .product_metadata import ProductRecord, read_product_record
+from .profiling import Profile
+from .stac import create_item, ensure_fsspec
+from .xml_cache import enable_xml_cache, get_xml_cache
+
+logger = logging.getLogger(__name__)
+
+S = TypeVar("S")
+T = TypeVar("T")
+
+# An item: its name, used in reports, and either its JSON text, or None to
+# read it from the name as an HREF
+Document = Tuple[str, Optional[str]]
+
+
+class BatchResult:
+    """The outcome of creating items for a batch of granules.
+
+    Args:
+        item_hrefs (List[str]): The HREFs of the items that were written.
+        failures (List[Tuple[str, str]]): The granule HREF and error message
+            of every granule that could not be converted.
+        elapsed (float): The wall time of the batch, in seconds.
+        skipped (List[str]): The HREFs of the granules that were skipped
+            because their item is up to date.
+        profiles (List[Dict[str, Any]]): The
+            :class:`~stactools.sentinel1_grd.profiling.Profile` of each
+            converted granule, as dictionaries, if profiling was enabled.
+        item_count (Optional[int]): The number of items written, if it
+            differs from the number of ``item_hrefs``, as is the case for
+            bulk output.
+    """
+    def __init__(
+        self,
+        item_hrefs: List[str],
+        failures: List[Tuple[str, str]],
+        elapsed: float,
+        skipped: Optional[List[str]] = None,
+        profiles: Optional[List[Dict[str, Any]]] = None,
+        item_count: Optional[int] = None,
+    ) -> None:
+        self.item_hrefs = item_hrefs
+        self.failures = failures
+        self.elapsed = elapsed
+        self.skipped = skipped or []
+        self.profiles = profiles or []
+        self.item_count = (len(item_hrefs)
+                           if item_count is None else item_count)
+
+    @property
+    def throughput(self) -> float:
+        """Granules processed per second, failed ones included."""
+        count = self.item_count + len(self.failures)
+        return count / self.elapsed if self.elapsed > 0 else 0.0
+
+    def write_failure_report(self, href: str) -> None:
+        """Writes the failures as a JSON list of ``href``/``error`` objects."""
+        write_failure_report(self.failures, href)
+
+
+def write_failure_report(failures: List[Tuple[str, str]], href: str) -> None:
+    """Writes failures as a JSON list of ``href``/``error`` objects.
+
+    Args:
+        failures (List[Tuple[str, str]]): The granule HREF and error message
+            of each failure.
+        href (str): The path of the report.
+    """
+    with open(href, "w") as f:
+        json.dump(
+            [{
+                "href": granule_href,
+                "error": error
+            } for granule_href, error in failures],
+            f,
+            indent=2,
+        )
+
+
+def iter_granules(src: str) -> Iterator[str]:
+    """Yields the granule HREFs described by ``src``.
+
+    Unlike :func:`find_granules`, a text file of HREFs is read lazily, one
+    line at a time.
+
+    Args:
+        src (str): Either a granule, a directory holding granules (SAFE
+            directories or zipped SAFE archives), a glob pattern matching
+            granules, or a text file with one granule HREF per line.
+
+    Returns:
+        Iterator[str]: The granule HREFs. Directory and glob matches are
+        sorted, lines of a text file are in file order.
+    """
+    if os.path.isfile(os.path.join(src, "manifest.safe")):
+        yield src
+    elif os.path.isdir(src):
+        yield from sorted(
+            os.path.join(src, x) for x in os.listdir(src)
+            if os.path.isfile(os.path.join(src, x, "manifest.safe"))
+            or x.lower().endswith(".zip"))
+    elif os.path.isfile(src):
+        with open(src) as f:
+            for line in f:
+                if line.strip():
+                    yield line.strip()
+    else:
+        yield from sorted(glob.glob(src))
+
+
+def iter_item_documents(src: str) -> Iterator[Document]:
+    """Yields the items described by ``src``, without parsing them.
+
+    Args:
+        src (str): Either a STAC Item JSON file, a newline-delimited JSON
+            file of items, a directory that is searched for JSON files, or a
+            glob pattern matching JSON files.
+
+    Returns:
+        Iterator[Document]: The name of each item and its JSON text, or
+        None for items that are read from the name as an HREF.
+    """
+    if os.path.isdir(src):
+        yield from ((x, None) for x in sorted(
+            glob.glob(os.path.join(src, "**", "*.json"), recursive=True)))
+    elif src.lower().endswith(".ndjson"):
+        with open(src) as f:
+            for i, line in enumerate(f, 1):
+                if line.strip():
+                    yield (f"{src}:{i}", line)
+    elif os.path.isfile(src):
+        yield (src, None)
+    else:
+        yield from ((x, None) for x in sorted(glob.glob(src)))
+
+
+def find_granules(src: str) -> List[str]:
+    """Lists the granule HREFs described by ``src``.
+
+    Args:
+        src (str): Either a granule, a directory holding granules (SAFE
+            directories or zipped SAFE archives), a glob pattern matching
+            granules, or a text file with one granule HREF per line.
+
+    Returns:
+        List[str]: The granule HREFs. Directory and glob matches are
+        sorted, lines of a text file are in file order.
+    """
+    return list(iter_granules(src))
+
+
+def _create_and_save_item(
+    granule_href: str,
+    dst: str,
+    profile: bool = False,
+    footprint_tolerance: Optional[float] = None,
+    cog_dir: Optional[str] = None,
+    thumbnail_dir: Optional[str] = None,
+) -> Tuple[str, Optional[str], str, Optional[Dict[str, Any]]]:
+    item_profile = Profile(granule_href) if profile else None
+    try:
+        ensure_fsspec()
+        item = create_item(granule_href, item_profile, footprint_tolerance,
+                           cog_dir, thumbnail_dir)
+        item_path = os.path.join(dst, "{}.json".format(item.id))
+        item.set_self_href(item_path)
+        if item_profile is not None:
+            with item_profile.phase("serialization"):
+                item.save_object()
+            item_profile.stop()
+        else:
+            item.save_object()
+        return (granule_href, item_path, "",
+                item_profile.to_dict() if item_profile is not None else None)
+    except Exception:
+        return (granule_href, None, traceback.format_exc(), None)
+
+
+def _initialize_worker(xml_cache_directory: Optional[str],
+                       xml_cache_max_size: int,
+                       xml_cache_revalidate: bool) -> None:
+    ensure_fsspec()
+    if xml_cache_directory is not None:
+        enable_xml_cache(xml_cache_directory, xml_cache_max_size,
+                         xml_cache_revalidate)
+
+
+def _process_pool(workers: Optional[int]) -> ProcessPoolExecutor:
+    # Workers cache XML reads like the current process
+    cache = get_xml_cache()
+    return ProcessPoolExecutor(max_workers=workers,
+                               initializer=_initialize_worker,
+                               initargs=(None, 0, True) if cache is None else
+                               (cache.directory, cache.max_size,
+                                cache.revalidate))
+
+
+def map_granules(function: Callable[[S], T],
+                 granule_hrefs: Iterable[S],
+                 workers: Optional[int] = None) -> Iterator[T]:
+    """Applies a function to granules on a process pool, lazily.
+
+    Unlike :meth:`concurrent.futures.Executor.map`, only a bounded number
+    of granules are in flight at a time, so ``granule_hrefs`` can be a
+    generator of any length. Results are yielded in order.
+
+    Args:
+        function (Callable[[S], T]): A picklable function of a granule
+            HREF, or of any other picklable argument.
+        granule_hrefs (Iterable[S]): The HREFs to the granules, or the
+            arguments of the function.
+        workers (Optional[int]): The number of worker processes. Defaults
+            to the number of CPUs. With a single worker, the function is
+            applied in the current process. If XML reads are cached (see
+            :func:`~stactools.sentinel1_grd.xml_cache.enable_xml_cache`),
+            the workers use the same cache.
+
+    Returns:
+        Iterator[T]: The results of the function.
+    """
+    if workers == 1:
+        yield from map(function, granule_hrefs)
+        return
+
+    with _process_pool(workers) as executor:
+        max_pending = 4 * (workers or os.cpu_count() or 1)
+        pending: Deque[Future] = deque()
+        for granule_href in granule_hrefs:
+            pending.append(executor.submit(function, granule_href))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _fingerprint(granule_href: str) -> Optional[str]:
+    # Granules that cannot be stat'ed are left for create_item to report
+    try:
+        return granule_fingerprint(granule_href)
+    except Exception:
+        return None
+
+
+def _item_href(granule_href: str, dst: str) -> str:
+    # Item ids are the product id without the .SAFE extension
+    scene_id = product_id_from_href(granule_href).split(".")[0]
+    return os.path.join(dst, "{}.json".format(scene_id))
+
+
+def create_items(granule_hrefs: List[str],
+                 dst: str,
+                 workers: Optional[int] = None,
+                 index: Optional[str] = None,
+                 profile: bool = False,
+                 footprint_tolerance: Optional[float] = None,
+                 cog_dir: Optional[str] = None,
+                 thumbnail_dir: Optional[str] = None) -> BatchResult:
+    """Creates and saves a STAC Item for each of many granules.
+
+    Granules are converted in parallel on a process pool, with a bounded
+    number in flight at a time (see :func:`map_granules`). A granule that
+    fails does not stop the batch; it is recorded in the result instead.
+
+    With an ``index``, granules whose item was already written to ``dst``
+    with the same options, and which have not changed since, according to a
+    stat of their manifest, are skipped. See :class:`~stactools.sentinel1_grd.index.ItemIndex`.
+
+    Args:
+        granule_hrefs (List[str]): The HREFs to the granules.
+        dst (str): The directory the STAC Item JSON files are written to.
+        workers (Optional[int]): The number of worker processes. Defaults
+            to the number of CPUs. With a single worker, granules are
+            processed in the current process.
+        index (Optional[str]): The path to an
+            :class:`~stactools.sentinel1_grd.index.ItemIndex` database used
+            to skip unchanged granules. It is created if it does not exist.
+        profile (bool): If True, profile the creation of each item and
+            return the profiles in :attr:`BatchResult.profiles`.
+        footprint_tolerance (Optional[float]): If given, item footprints
+            are built from the annotation geolocation grid. See
+            :func:`~stactools.sentinel1_grd.stac.create_item`.
+        cog_dir (Optional[str]): If given, the measurements are converted
+            to Cloud Optimized GeoTIFFs in this directory. See
+            :func:`~stactools.sentinel1_grd.stac.create_item`.
+        thumbnail_dir (Optional[str]): If given, thumbnails of granules
+            without a quick-look are rendered to this directory. See
+            :func:`~stactools.sentinel1_grd.stac.create_item`.
+
+    Returns:
+        BatchResult: The written items, failures and timing of the batch.
+    """
+    start = time.perf_counter()
+    item_hrefs: List[str] = []
+    failures: List[Tuple[str, str]] = []
+    skipped: List[str] = []
+    profiles: List[Dict[str, Any]] = []
+
+    item_index = ItemIndex(index) if index is not None else None
+    options = item_options_key(footprint_tolerance, cog_dir, thumbnail_dir)
+    fingerprints: Dict[str, Optional[str]] = {}
+    if item_index is not None:
+        # Stats are I/O bound, so they are issued from a thread pool
+        with ThreadPoolExecutor(max_workers=16) as stat_executor:
+            fingerprints = dict(
+                zip(granule_hrefs,
+                    stat_executor.map(_fingerprint, granule_hrefs)))
+        pending = []
+        for granule_href in granule_hrefs:
+            fingerprint = fingerprints[granule_href]
+            if fingerprint is not None and item_index.is_current(
+                    product_id_from_href(granule_href), fingerprint,
+                    _item_href(granule_href, dst), options):
+                skipped.append(granule_href)
+            else:
+                pending.append(granule_href)
+        granule_hrefs = pending
+
+    def _collect(
+        result: Tuple[str, Optional[str], str, Optional[Dict[str,
+                                                             Any]]]) -> None:
+        granule_href, item_href, error, item_profile = result
+        if item_profile is not None:
+            profiles.append(item_profile)
+        if item_href is None:
+            logger.warning(f"Failed to create item for {granule_href}")
+            failures.append((granule_href, error))
+        else:
+            logger.debug(f"Created item {item_href}")
+            item_hrefs.append(item_href)
+            fingerprint = fingerprints.get(granule_href)
+            if item_index is not None and fingerprint is not None:
+                item_index.update(product_id_from_href(granule_href),
+                                  granule_href, fingerprint, item_href,
+                                  options)
+
+    try:
+        for result in map_granules(
+                partial(_create_and_save_item,
+                        dst=dst,
+                        profile=profile,
+                        footprint_tolerance=footprint_tolerance,
+                        cog_dir=cog_dir,
+                        thumbnail_dir=thumbnail_dir), granule_hrefs, workers):
+            _collect(result)
+    finally:
+        if item_index is not None:
+            item_index.close()
+
+    return BatchResult(item_hrefs, failures,
+                       time.perf_counter() - start, skipped, profiles)
+
+
+def _create_item_dict(
+    granule_href: str,
+    footprint_tolerance: Optional[float] = None,
+) -> Tuple[str, Optional[Dict[str, Any]], str]:
+    try:
+        item = create_item(granule_href,
+                           footprint_tolerance=footprint_tolerance)
+        return (granule_href, item.to_dict(include_self_link=False), "")
+    except Exception:
+        return (granule_href, None, traceback.format_exc())
+
+
+def create_items_bulk(
+        granule_hrefs: Iterable[str],
+        href: str,
+        output_format: str = NDJSON,
+        workers: Optional[int] = None,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        footprint_tolerance: Optional[float] = None) -> BatchResult:
+    """Creates STAC Items for many granules and writes them to one file.
+
+    Items are created in parallel and written as they are produced, as
+    newline-delimited JSON or as stac-geoparquet (see
+    :mod:`~stactools.sentinel1_grd.bulk`), which load into databases much
+    faster than one JSON file per item. A granule that fails does not stop
+    the batch; it is recorded in the result instead.
+
+    Args:
+        granule_hrefs (Iterable[str]): The HREFs to the granules. This can
+            be a generator.
+        href (str): The path of the file to write.
+        output_format (str): ``ndjson`` or ``geoparquet``.
+        workers (Optional[int]): The number of worker processes. Defaults
+            to the number of CPUs. With a single worker, granules are
+            processed in the current process.
+        row_group_size (int): The number of items per row group of a
+            stac-geoparquet file.
+        footprint_tolerance (Optional[float]): If given, item footprints
+            are built from the annotation geolocation grid. See
+            :func:`~stactools.sentinel1_grd.stac.create_item`.
+
+    Returns:
+        BatchResult: The written file, failures and timing of the batch.
+    """
+    start = time.perf_counter()
+    failures: List[Tuple[str, str]] = []
+
+    def _items() -> Iterator[Dict[str, Any]]:
+        for granule_href, item_dict, error in map_granules(
+                partial(_create_item_dict,
+                        footprint_tolerance=footprint_tolerance),
+                granule_hrefs, workers):
+            if item_dict is None:
+                logger.warning(f"Failed to create item for {granule_href}")
+                failures.append((granule_href, error))
+            else:
+                yield item_dict
+
+    if output_format == NDJSON:
+        count = write_ndjson(_items(), href)
+    elif output_format == GEOPARQUET:
+        count = write_geoparquet(_items(), href, row_group_size)
+    else:
+        raise ValueError(f"Unknown bulk output format {output_format}")
+
+    return BatchResult([href],
+                       failures,
+                       time.perf_counter() - start,
+                       item_count=count)
+
+
+def _read_product_record(
+        granule_href: str) -> Tuple[str, Optional[ProductRecord], str]:
+    try:
+        return (granule_href, read_product_record(granule_href), "")
+    except Exception:
+        return (granule_href, None, traceback.format_exc())
+
+
+def read_product_records(
+    granule_hrefs: Iterable[str],
+    workers: Optional[int] = None
+) -> Iterator[Tuple[str, Optional[ProductRecord], str]]:
+    """Reads the metadata of many granules on a process pool, lazily.
+
+    Only the manifest of each granule is read, and the workers send back
+    :class:`~stactools.sentinel1_grd.product_metadata.ProductRecord`
+    tuples, which are small to pickle and hold no parsed XML.
+
+    Args:
+        granule_hrefs (Iterable[str]): The HREFs to the granules. This can
+            be a generator.
+        workers (Optional[int]): The number of worker processes. Defaults
+            to the number of CPUs. With a single worker, granules are read
+            in the current process.
+
+    Returns:
+        Iterator[Tuple[str, Optional[ProductRecord], str]]: The HREF of
+        each granule, in order, with its record, or None and the error if
+        it could not be read.
+    """
+    return map_granules(_read_product_record, granule_hrefs, workers)
@@ -0,0 +1,158 @@
+import json
+import pickle
+import tempfile
+from typing import Any, Dict, Iterable, List, Set, Union
+
+import pystac
+from pystac.utils import str_to_datetime
+
+NDJSON = "ndjson"
+GEOPARQUET = "geoparquet"
+BULK_FORMATS = [NDJSON, GEOPARQUET]
+
+DEFAULT_ROW_GROUP_SIZE = 10000
+
+# Item properties stored as timestamp columns in stac-geoparquet
+DATETIME_PROPERTIES = ["datetime", "start_datetime", "end_datetime"]
+
+
+def _to_dict(item: Union[pystac.Item, Dict[str, Any]]) -> Dict[str, Any]:
+    if isinstance(item, pystac.Item):
+        return item.to_dict(include_self_link=False)
+    return item
+
+
+def write_ndjson(items: Iterable[Union[pystac.Item, Dict[str, Any]]],
+                 href: str) -> int:
+    """Writes items as newline-delimited JSON, one compact item per line.
+
+    Items are written as they are read from ``items``, so this can be fed
+    from a generator of any length.
+
+    Args:
+        items (Iterable[Union[pystac.Item, Dict[str, Any]]]): The items, as
+            :class:`pystac.Item` or as dictionaries.
+        href (str): The path of the file to write.
+
+    Returns:
+        int: The number of items written.
+    """
+    count = 0
+    with open(href, "w") as f:
+        for item in items:
+            f.write(json.dumps(_to_dict(item), separators=(",", ":")))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def item_to_geoparquet_row(
+        item: Union[pystac.Item, Dict[str, Any]]) -> Dict[str, Any]:
+    """Converts an item to a row of the stac-geoparquet layout.
+
+    The properties are moved to top-level columns, the geometry is encoded
+    as WKB, the bbox as a ``xmin``/``ymin``/``xmax``/``ymax`` struct and the
+    datetimes as timestamps.
+    """
+    # Only the geoparquet format needs shapely, which is slow to import
+    from shapely.geometry import shape  # type: ignore
+
+    item_dict = dict(_to_dict(item))
+    properties = item_dict.pop("properties")
+
+    row = {k: v for k, v in item_dict.items() if k != "bbox"}
+    row["geometry"] = shape(item_dict["geometry"]).wkb
+    if item_dict.get("bbox") is not None:
+        xmin, ymin, xmax, ymax = item_dict["bbox"][:4]
+        row["bbox"] = {"xmin": xmin, "ymin": ymin, "xmax": xmax, "ymax": ymax}
+
+    for key, value in properties.items():
+        if key in DATETIME_PROPERTIES and value is not None:
+            value = str_to_datetime(value)
+        row[key] = value
+
+    return row
+
+
+def write_geoparquet(items: Iterable[Union[pystac.Item, Dict[str, Any]]],
+                     href: str,
+                     row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> int:
+    """Writes items as a stac-geoparquet file.
+
+    Items are converted in chunks of ``row_group_size`` and each chunk is
+    written as a row group. As item schemas can differ, for instance in
+    their properties or asset keys, the items are read twice: a first pass
+    spools the converted chunks to a temporary file and merges the Arrow
+    schemas of all their rows, the second writes them with the merged
+    schema. Only a single chunk is
+    held in memory at a time. Without any item, an empty table is written.
+
+    This requires ``pyarrow``.
+
+    Args:
+        items (Iterable[Union[pystac.Item, Dict[str, Any]]]): The items, as
+            :class:`pystac.Item` or as dictionaries.
+        href (str): The path of the file to write.
+        row_group_size (int): The number of items per row group.
+
+    Returns:
+        int: The number of items written.
+    """
+    try:
+        import pyarrow as pa  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+    except ImportError as e:
+        raise ImportError(
+            "Writing stac-geoparquet requires pyarrow, install it with "
+            "`pip install stactools-sentinel1_grd[geoparquet]`") from e
+
+    count = 0
+    geometry_types: Set[str] = set()
+    schemas = []
+    with tempfile.TemporaryFile() as spool:
+        chunk: List[Dict[str, Any]] = []
+
+        def _spool() -> None:
+            # Table.from_pylist would take the columns from the first row
+            # only, while a struct array is inferred from all of them
+            schemas.append(pa.schema(list(pa.array(chunk).type)))
+            pickle.dump(chunk, spool)
+
+        for item in items:
+            item_dict = _to_dict(item)
+            geometry_types.add(item_dict["geometry"]["type"])
+            chunk.append(item_to_geoparquet_row(item_dict))
+            count += 1
+            if len(chunk) >= row_group_size:
+                _spool()
+                chunk = []
+        if chunk:
+            _spool()
+
+        geo_metadata = {
+            "version": "1.0.0",
+            "primary_column": "geometry",
+            "columns": {
+                "geometry": {
+                    "encoding": "WKB",
+                    "geometry_types": sorted(geometry_types),
+                }
+            },
+        }
+        # Without any item, the file holds an empty table with only the id
+        # and geometry columns
+        schema = pa.unify_schemas(
+            schemas
+            or [pa.schema([("id", pa.string()), ("geometry", pa.binary())])],
+            promote_options="permissive")
+        schema = schema.with_metadata(
+            {b"geo": json.dumps(geo_metadata).encode("utf-8")})
+
+        spool.seek(0)
+        with pq.ParquetWriter(href, schema) as writer:
+            for _ in schemas:
+                rows = pickle.load(spool)
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema),
+                                   row_group_size=row_group_size)
+
+    return count
@@ -0,0 +1,302 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+from lxml import etree  # type: ignore
+
+from .xml_cache import open_xml
+
+# Calibration look-up tables, by attribute of CalibrationLUT and the tag of
+# their values in the calibration vectors
+CALIBRATION_LUTS = {
+    "sigma_nought": "sigmaNought",
+    "beta_nought": "betaNought",
+    "gamma": "gamma",
+    "dn": "dn",
+}
+
+# Image windows as ((row_start, row_stop), (col_start, col_stop))
+Window = Tuple[Tuple[int, int], Tuple[int, int]]
+
+
+class CalibrationError(Exception):
+    pass
+
+
+def _vector_texts(field: str) -> etree.XPath:
+    return etree.XPath(
+        f"calibrationVectorList/calibrationVector/{field}/text()")
+
+
+_LINE = _vector_texts("line")
+_PIXEL = _vector_texts("pixel")
+_LUTS = {name: _vector_texts(tag) for name, tag in CALIBRATION_LUTS.items()}
+_POLARISATION = etree.XPath("adsHeader/polarisation/text()")
+_CONSTANT = etree.XPath(
+    "calibrationInformation/absoluteCalibrationConstant/text()")
+
+
+def parse_numbers(texts: Iterable[str], dtype: Any) -> np.ndarray:
+    """Parses whitespace-separated numbers of XML texts into a flat array.
+
+    All texts are converted in a single call, without Python floats.
+
+    Args:
+        texts (Iterable[str]): The texts, e.g. of the vectors of a
+            calibration or noise annotation.
+        dtype (Any): The NumPy data type of the array.
+
+    Returns:
+        np.ndarray: The numbers of all texts, in order.
+    """
+    return np.fromstring(" ".join(texts), dtype=dtype, sep=" ")
+
+
+def interpolation_weights(
+        x: np.ndarray,
+        xp: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns what is needed to interpolate linearly between sample points.
+
+    Values outside of the sample points take the value of the nearest one.
+
+    Args:
+        x (np.ndarray): The coordinates to interpolate at.
+        xp (np.ndarray): The increasing coordinates of the sample points.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The indices of the sample
+        points below and above each of ``x``, and the weight of the one
+        above.
+    """
+    if xp.size == 1:
+        zeros = np.zeros(x.shape, dtype=np.int64)
+        return zeros, zeros, np.zeros(x.shape, dtype=np.float32)
+    below = np.clip(np.searchsorted(xp, x, side="right") - 1, 0, xp.size - 2)
+    above = below + 1
+    weight = (x - xp[below]) / (xp[above] - xp[below])
+    return below, above, np.clip(weight, 0, 1).astype(np.float32)
+
+
+class CalibrationLUT:
+    """The calibration vectors of one polarisation, as NumPy arrays.
+
+    The vectors sample the calibration look-up tables (see
+    :data:`CALIBRATION_LUTS`) at a coarse grid of image lines and pixels.
+    Each table is a ``float32`` array of shape ``(vectors, samples)``, with
+    the image line of each vector in :attr:`line` and the image pixel of
+    each sample in :attr:`pixel`. Use :meth:`interpolate` to get the table
+    at every pixel of an image window.
+
+    Tables are parsed from the calibration XML with :meth:`from_xml`, or
+    memory-mapped from a cache written by :meth:`save` with :meth:`load`.
+    :func:`read_calibration` does both.
+    """
+    def __init__(self, line: np.ndarray, pixel: np.ndarray,
+                 luts: Dict[str, np.ndarray], polarisation: Optional[str],
+                 absolute_calibration_constant: float) -> None:
+        self.line = line
+        self.pixel = pixel
+        self.luts = luts
+        self.polarisation = polarisation
+        self.absolute_calibration_constant = absolute_calibration_constant
+
+    @property
+    def sigma_nought(self) -> np.ndarray:
+        return self.luts["sigma_nought"]
+
+    @property
+    def beta_nought(self) -> np.ndarray:
+        return self.luts["beta_nought"]
+
+    @property
+    def gamma(self) -> np.ndarray:
+        return self.luts["gamma"]
+
+    @property
+    def dn(self) -> np.ndarray:
+        return self.luts["dn"]
+
+    @classmethod
+    def from_xml(cls, href: str) -> "CalibrationLUT":
+        """Parses the calibration vectors of a calibration XML file.
+
+        Args:
+            href (str): The HREF to the ``calibration-*.xml`` file.
+
+        Returns:
+            CalibrationLUT: The calibration vectors.
+        """
+        with open_xml(href) as f:
+            root = etree.parse(f).getroot()
+
+        line = parse_numbers(_LINE(root), np.int64)
+        if line.size == 0:
+            raise CalibrationError(
+                f"Calibration at {href} does not have calibration vectors")
+        pixel = parse_numbers(_PIXEL(root), np.int64)
+        if pixel.size % line.size != 0:
+            raise CalibrationError(
+                f"Calibration vectors at {href} have different sizes")
+        pixel = pixel.reshape(line.size, -1)
+
+        luts = {}
+        for name, xpath in _LUTS.items():
+            values = parse_numbers(xpath(root), np.float32)
+            if values.size != pixel.size:
+                raise CalibrationError(
+                    f"Calibration vectors at {href} have {values.size} "
+                    f"{CALIBRATION_LUTS[name]} values for {pixel.size} pixels")
+            luts[name] = values.reshape(pixel.shape)
+
+        polarisation = _POLARISATION(root)
+        constant = _CONSTANT(root)
+        return cls(line, pixel, luts,
+                   str(polarisation[0]) if polarisation else None,
+                   float(constant[0]) if constant else 1.0)
+
+    def save(self, path: str) -> None:
+        """Saves the arrays as ``.npy`` files in the directory ``path``.
+
+        The directory is written next to its final location and renamed
+        into place, so a concurrent :meth:`load` never sees a partial cache.
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=parent)
+        try:
+            np.save(os.path.join(tmp_path, "line.npy"), self.line)
+            np.save(os.path.join(tmp_path, "pixel.npy"), self.pixel)
+            for name, values in self.luts.items():
+                np.save(os.path.join(tmp_path, f"{name}.npy"), values)
+            np.save(
+                os.path.join(tmp_path, "absolute_calibration_constant.npy"),
+                np.array(self.absolute_calibration_constant))
+            if self.polarisation is not None:
+                np.save(os.path.join(tmp_path, "polarisation.npy"),
+                        np.array(self.polarisation))
+            os.rename(tmp_path, path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            # Another process may have written the cache first
+            if not os.path.isdir(path):
+                raise
+
+    @classmethod
+    def load(cls, path: str) -> "CalibrationLUT":
+        """Memory-maps the arrays saved by :meth:`save` in ``path``."""
+        def _load(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        polarisation_path = os.path.join(path, "polarisation.npy")
+        return cls(
+            _load("line"),
+            _load("pixel"),
+            {name: _load(name)
+             for name in CALIBRATION_LUTS},
+            str(np.load(polarisation_path))
+            if os.path.exists(polarisation_path) else None,
+            float(
+                np.load(os.path.join(path,
+                                     "absolute_calibration_constant.npy"))),
+        )
+
+    def interpolate(self,
+                    window: Window,
+                    lut: str = "sigma_nought") -> np.ndarray:
+        """Interpolates a look-up table onto every pixel of a window.
+
+        The table is interpolated bilinearly between the calibration
+        vectors, and only the vectors around the window are read.
+
+        Args:
+            window (Window): The image window, as
+                ``((row_start, row_stop), (col_start, col_stop))`` with the
+                stops excluded, like rasterio windows.
+            lut (str): The name of the table, one of
+                :data:`CALIBRATION_LUTS`.
+
+        Returns:
+            np.ndarray: The ``float32`` table values, of the shape of the
+            window.
+        """
+        if lut not in self.luts:
+            raise CalibrationError(f"Unknown calibration look-up table {lut}")
+        (row_start, row_stop), (col_start, col_stop) = window
+        rows = np.arange(row_start, row_stop)
+        cols = np.arange(col_start, col_stop)
+
+        below, above, weight = interpolation_weights(rows, self.line)
+
+        # Interpolate the vectors around the window along the pixels first
+        vectors = np.unique(np.concatenate([below, above]))
+        values = self.luts[lut]
+        along_pixels = np.stack([
+            np.interp(cols, self.pixel[v], values[v]).astype(np.float32)
+            for v in vectors
+        ])
+        position = np.searchsorted(vectors, np.arange(self.line.size))
+
+        weight = weight[:, np.newaxis]
+        return ((1 - weight) * along_pixels[position[below]] +
+                weight * along_pixels[position[above]])
+
+
+def block_windows(shape: Tuple[int, int],
+                  block_rows: int,
+                  block_cols: Optional[int] = None) -> Iterator[Window]:
+    """Yields the windows of an image split into blocks, row by row.
+
+    Args:
+        shape (Tuple[int, int]): The number of rows and columns of the image.
+        block_rows (int): The number of rows of each block.
+        block_cols (Optional[int]): The number of columns of each block.
+            Defaults to the width of the image.
+
+    Returns:
+        Iterator[Window]: The windows. Blocks on the last row or column are
+        cut to the image.
+    """
+    rows, cols = shape
+    if block_rows < 1 or (block_cols is not None and block_cols < 1):
+        raise ValueError("Blocks must have at least one row and column")
+    block_cols = block_cols or cols
+    for row in range(0, rows, block_rows):
+        for col in range(0, cols, block_cols):
+            yield ((row, min(row + block_rows,
+                             rows)), (col, min(col + block_cols, cols)))
+
+
+def calibration_cache_path(href: str, cache_dir: str) -> str:
+    """Returns the cache directory of the calibration at ``href``.
+
+    The path is derived from the HREF, as calibration files are never
+    modified once published, and some granules share file names.
+    """
+    digest = hashlib.sha1(href.encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(href.split("::")[0]))[0]
+    return os.path.join(cache_dir, f"{name}-{digest}.lut")
+
+
+def read_calibration(href: str,
+                     cache_dir: Optional[str] = None) -> CalibrationLUT:
+    """Reads the calibration vectors of a calibration XML file.
+
+    Args:
+        href (str): The HREF to the ``calibration-*.xml`` file.
+        cache_dir (Optional[str]): A directory to cache the parsed vectors
+            in. The first read of a file parses the XML and saves its arrays
+            there; later reads memory-map them instead.
+
+    Returns:
+        CalibrationLUT: The calibration vectors.
+    """
+    if cache_dir is None:
+        return CalibrationLUT.from_xml(href)
+
+    path = calibration_cache_path(href, cache_dir)
+    if not os.path.isdir(path):
+        CalibrationLUT.from_xml(href).save(path)
+    return CalibrationLUT.load(path)
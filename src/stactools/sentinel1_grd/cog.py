@@ -0,0 +1,186 @@
+import logging
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional
+
+import pystac
+import rasterio  # type: ignore
+import rasterio.shutil  # type: ignore
+from fsspec.core import url_to_fs  # type: ignore
+from fsspec.implementations.local import LocalFileSystem  # type: ignore
+from rasterio.enums import Resampling  # type: ignore
+from rasterio.windows import Window  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Size of the tiles of the COGs, and height of the blocks of rows they are
+# converted in
+DEFAULT_BLOCK_SIZE = 512
+
+DEFAULT_COMPRESSION = "deflate"
+
+
+def _open(href: str) -> Any:
+    fs, path = url_to_fs(href)
+    if isinstance(fs, LocalFileSystem):
+        return rasterio.open(path)
+    # Remote files and members of zipped granules are read through fsspec
+    return rasterio.open(path, opener=fs.open)
+
+
+def _map_bounded(executor: ThreadPoolExecutor, function: Callable[[Any], Any],
+                 args: Iterable[Any], in_flight: int) -> Iterator[Any]:
+    # Like executor.map, but with at most in_flight results held at a time
+    futures: Deque[Future] = deque()
+    for arg in args:
+        futures.append(executor.submit(function, arg))
+        if len(futures) >= in_flight:
+            yield futures.popleft().result()
+    while futures:
+        yield futures.popleft().result()
+
+
+def overview_factors(width: int,
+                     height: int,
+                     block_size: int = DEFAULT_BLOCK_SIZE) -> List[int]:
+    """Returns the decimation factors of the overviews of an image, down to
+    the first overview that fits in a single tile."""
+    factors = []
+    factor = 1
+    while max(width, height) / factor > block_size:
+        factor *= 2
+        factors.append(factor)
+    return factors
+
+
+def convert_to_cog(href: str,
+                   dst: str,
+                   threads: Optional[int] = None,
+                   block_size: int = DEFAULT_BLOCK_SIZE,
+                   compression: str = DEFAULT_COMPRESSION,
+                   resampling: Resampling = Resampling.average) -> str:
+    """Converts a measurement TIFF to a Cloud Optimized GeoTIFF.
+
+    The image is read in blocks of ``block_size`` rows on a thread pool,
+    each thread with its own handle on the source, and only a few blocks
+    are held in memory at a time. The blocks are written to a tiled
+    GeoTIFF next to ``dst``, its overviews are built, and it is copied to
+    ``dst`` in the COG layout. The GCPs of the source are kept.
+
+    Remote measurements and measurements in zipped granules are read
+    through fsspec, which needs rasterio 1.4 or later.
+
+    Args:
+        href (str): The HREF to the measurement TIFF.
+        dst (str): The path of the COG to write.
+        threads (Optional[int]): The number of threads reading blocks and
+            compressing tiles. Defaults to the number of CPUs.
+        block_size (int): The size of the tiles.
+        compression (str): The compression of the tiles.
+        resampling (Resampling): The resampling of the overviews.
+
+    Returns:
+        str: ``dst``.
+    """
+    threads = threads or os.cpu_count() or 1
+    local = threading.local()
+    handles = []
+
+    def _read(window: Window) -> Any:
+        if not hasattr(local, "dataset"):
+            local.dataset = _open(href)
+            handles.append(local.dataset)
+        return window, local.dataset.read(window=window)
+
+    with _open(href) as src:
+        width, height = src.width, src.height
+        gcps, gcps_crs = src.gcps
+        profile = {
+            "driver": "GTiff",
+            "width": width,
+            "height": height,
+            "count": src.count,
+            "dtype": src.dtypes[0],
+            "nodata": src.nodata,
+            "tiled": True,
+            "blockxsize": block_size,
+            "blockysize": block_size,
+            "compress": compression,
+            "bigtiff": "IF_SAFER",
+        }
+        if gcps:
+            profile.update(gcps=gcps, crs=gcps_crs)
+        else:
+            profile.update(crs=src.crs, transform=src.transform)
+
+    windows = (Window(0, row, width, min(block_size, height - row))
+               for row in range(0, height, block_size))
+
+    os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+    with tempfile.TemporaryDirectory(
+            dir=os.path.dirname(os.path.abspath(dst))) as tmp_dir:
+        tmp_path = os.path.join(tmp_dir, "tiled.tif")
+        try:
+            with rasterio.Env(GDAL_NUM_THREADS=str(threads)):
+                with rasterio.open(tmp_path, "w", **profile) as tiled:
+                    with ThreadPoolExecutor(threads) as executor:
+                        for window, data in _map_bounded(
+                                executor, _read, windows, 2 * threads):
+                            tiled.write(data, window=window)
+                    factors = overview_factors(width, height, block_size)
+                    if factors:
+                        tiled.build_overviews(factors, resampling)
+
+                rasterio.shutil.copy(tmp_path,
+                                     dst,
+                                     driver="GTiff",
+                                     copy_src_overviews=True,
+                                     tiled=True,
+                                     blockxsize=block_size,
+                                     blockysize=block_size,
+                                     compress=compression,
+                                     bigtiff="IF_SAFER")
+        finally:
+            for handle in handles:
+                handle.close()
+
+    return dst
+
+
+def convert_item_assets(item: pystac.Item,
+                        dst: str,
+                        threads: Optional[int] = None,
+                        **kwargs: Any) -> pystac.Item:
+    """Converts the measurements of an item to COGs, and points the data
+    assets at them.
+
+    Each measurement is written to ``dst`` with its name and a ``.tif``
+    extension. Keyword arguments are passed to :func:`convert_to_cog`.
+
+    Args:
+        item (pystac.Item): The item, as created by
+            :func:`~stactools.sentinel1_grd.stac.create_item`.
+        dst (str): The directory the COGs are written to.
+        threads (Optional[int]): The number of threads of each conversion.
+
+    Returns:
+        pystac.Item: The item, updated in place.
+    """
+    for asset in item.assets.values():
+        if ("data" not in (asset.roles or [])
+                or asset.media_type != pystac.MediaType.GEOTIFF):
+            continue
+        name = os.path.basename(asset.href.split("::")[0])
+        cog_path = os.path.join(dst, f"{os.path.splitext(name)[0]}.tif")
+        logger.info(f"Converting {asset.href} to {cog_path}")
+        convert_to_cog(asset.href, cog_path, threads, **kwargs)
+        asset.href = cog_path
+        asset.media_type = pystac.MediaType.COG
+        # The file properties from the manifest describe the measurement
+        asset.extra_fields.pop("file:checksum", None)
+        if "file:size" in asset.extra_fields:
+            asset.extra_fields["file:size"] = os.path.getsize(cog_path)
+    return item
@@ -0,0 +1,299 @@
+import json
+import logging
+import os
+import tempfile
+import time
+import traceback
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import fsspec  # type: ignore
+import pystac
+from pystac.extensions.sar import SarExtension
+from pystac.extensions.sat import SatExtension
+
+from .batch import map_granules, write_failure_report
+from .constants import (
+    SENTINEL_GRD_COLLECTION_DESCRIPTION,
+    SENTINEL_GRD_COLLECTION_ID,
+    SENTINEL_GRD_COLLECTION_TITLE,
+    SENTINEL_LICENSE,
+    SENTINEL_PROVIDER,
+)
+from .stac import create_item, ensure_fsspec
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_FILE_NAME = "collection.json"
+
+# Item properties summarized as the set of their distinct values. All of
+# them have a small, bounded number of values.
+SET_SUMMARY_FIELDS = [
+    "sar:polarizations",
+    "sar:instrument_mode",
+    "platform",
+    "sat:orbit_state",
+]
+
+# Item properties summarized as their range
+RANGE_SUMMARY_FIELDS = ["sat:relative_orbit"]
+
+
+class ItemRecord:
+    """The parts of an item that a collection needs.
+
+    Records are small and picklable, so that items can be created and saved
+    by worker processes, and only their records sent back.
+
+    Args:
+        item (pystac.Item): The item.
+        href (str): The HREF the item was saved to, relative to the
+            collection.
+    """
+    def __init__(self, item: pystac.Item, href: str) -> None:
+        self.href = href
+        self.bbox = item.bbox
+        self.start_datetime = (item.common_metadata.start_datetime
+                               or item.datetime)
+        self.end_datetime = item.common_metadata.end_datetime or item.datetime
+        self.properties = {
+            k: item.properties[k]
+            for k in SET_SUMMARY_FIELDS + RANGE_SUMMARY_FIELDS
+            if k in item.properties
+        }
+
+
+class CollectionSummarizer:
+    """Incrementally computes the extent and summaries of a collection.
+
+    Items are added one at a time and only the running bounds and the sets
+    of distinct values of :data:`SET_SUMMARY_FIELDS` are kept, so the
+    memory used does not grow with the number of items.
+    """
+    def __init__(self) -> None:
+        self.count = 0
+        self.bbox: Optional[List[float]] = None
+        self.start_datetime: Optional[datetime] = None
+        self.end_datetime: Optional[datetime] = None
+        self.values: Dict[str,
+                          Set[Any]] = {k: set()
+                                       for k in SET_SUMMARY_FIELDS}
+        self.ranges: Dict[str, List[Any]] = {}
+
+    def add(self, record: ItemRecord) -> None:
+        self.count += 1
+
+        if record.bbox is not None:
+            if self.bbox is None:
+                self.bbox = list(record.bbox)
+            else:
+                self.bbox = [
+                    min(self.bbox[0], record.bbox[0]),
+                    min(self.bbox[1], record.bbox[1]),
+                    max(self.bbox[2], record.bbox[2]),
+                    max(self.bbox[3], record.bbox[3]),
+                ]
+
+        if record.start_datetime is not None and (
+                self.start_datetime is None
+                or record.start_datetime < self.start_datetime):
+            self.start_datetime = record.start_datetime
+        if record.end_datetime is not None and (
+                self.end_datetime is None
+                or record.end_datetime > self.end_datetime):
+            self.end_datetime = record.end_datetime
+
+        for key in SET_SUMMARY_FIELDS:
+            value = record.properties.get(key)
+            if isinstance(value, list):
+                self.values[key].update(value)
+            elif value is not None:
+                self.values[key].add(value)
+
+        for key in RANGE_SUMMARY_FIELDS:
+            value = record.properties.get(key)
+            if value is None:
+                continue
+            if key not in self.ranges:
+                self.ranges[key] = [value, value]
+            else:
+                self.ranges[key] = [
+                    min(self.ranges[key][0], value),
+                    max(self.ranges[key][1], value),
+                ]
+
+    @property
+    def extent(self) -> pystac.Extent:
+        return pystac.Extent(
+            pystac.SpatialExtent([self.bbox or [-180, -90, 180, 90]]),
+            pystac.TemporalExtent([[self.start_datetime, self.end_datetime]]),
+        )
+
+    @property
+    def summaries(self) -> pystac.Summaries:
+        summaries: Dict[str, Any] = {
+            k: sorted(v)
+            for k, v in self.values.items() if v
+        }
+        for key, (minimum, maximum) in self.ranges.items():
+            summaries[key] = {"minimum": minimum, "maximum": maximum}
+        return pystac.Summaries(summaries)
+
+
+class CollectionResult:
+    """The outcome of creating a collection.
+
+    Args:
+        collection (pystac.Collection): The collection. Its item links are
+            only written to disk, they are not held in memory.
+        item_count (int): The number of items written.
+        failures (List[Tuple[str, str]]): The granule HREF and error message
+            of every granule that could not be converted.
+        elapsed (float): The wall time, in seconds.
+    """
+    def __init__(self, collection: pystac.Collection, item_count: int,
+                 failures: List[Tuple[str, str]], elapsed: float) -> None:
+        self.collection = collection
+        self.item_count = item_count
+        self.failures = failures
+        self.elapsed = elapsed
+
+    def write_failure_report(self, href: str) -> None:
+        """Writes the failures as a JSON list of ``href``/``error`` objects."""
+        write_failure_report(self.failures, href)
+
+
+def _create_and_save_item(
+    granule_href: str,
+    dst: str,
+    footprint_tolerance: Optional[float] = None,
+) -> Tuple[str, Optional[ItemRecord], Optional[str]]:
+    try:
+        ensure_fsspec()
+        item = create_item(granule_href,
+                           footprint_tolerance=footprint_tolerance)
+        item.collection_id = SENTINEL_GRD_COLLECTION_ID
+
+        # The links to the collection are added to the serialized item, as
+        # the collection is only written once all items are
+        item_dict = item.to_dict(include_self_link=False)
+        for rel in [
+                pystac.RelType.ROOT, pystac.RelType.PARENT,
+                pystac.RelType.COLLECTION
+        ]:
+            item_dict["links"].append({
+                "rel": rel,
+                "href": f"../{COLLECTION_FILE_NAME}",
+                "type": pystac.MediaType.JSON,
+            })
+
+        href = f"./{item.id}/{item.id}.json"
+        pystac.StacIO.default().save_json(
+            os.path.join(dst, item.id, f"{item.id}.json"), item_dict)
+        return (granule_href, ItemRecord(item, href), None)
+    except Exception:
+        return (granule_href, None, traceback.format_exc())
+
+
+def _write_collection(collection: pystac.Collection, href: str,
+                      item_hrefs: Iterable[str]) -> None:
+    # The item links are streamed into the JSON document instead of being
+    # added to the collection, so the top-level keys are written one by one
+    # with the links last
+    collection_dict = collection.to_dict(include_self_link=False)
+    links = collection_dict.pop("links")
+
+    with fsspec.open(href, "w") as f:
+        f.write("{")
+        for key, value in collection_dict.items():
+            f.write(f"\n  {json.dumps(key)}: ")
+            f.write(json.dumps(value, indent=2).replace("\n", "\n  "))
+            f.write(",")
+        f.write('\n  "links": [')
+        separator = "\n    "
+        for link in links:
+            f.write(separator + json.dumps(link))
+            separator = ",\n    "
+        for item_href in item_hrefs:
+            f.write(separator + json.dumps({
+                "rel": "item",
+                "href": item_href,
+                "type": pystac.MediaType.JSON,
+            }))
+            separator = ",\n    "
+        f.write("\n  ]\n}\n")
+
+
+def create_collection(
+        granule_hrefs: Iterable[str],
+        dst: str,
+        workers: Optional[int] = None,
+        footprint_tolerance: Optional[float] = None) -> CollectionResult:
+    """Creates a STAC Collection of Sentinel-1 GRD scenes.
+
+    Items are created from the granules as they are read from
+    ``granule_hrefs`` and saved immediately, and the extent and summaries
+    of the collection are updated from each item as it is produced (see
+    :class:`CollectionSummarizer`). Neither the items nor the granule list
+    are held in memory, so collections of millions of scenes can be built.
+
+    The collection is saved as ``collection.json`` in ``dst``, and each
+    item in its own directory next to it. A granule that fails does not
+    stop the collection; it is recorded in the result instead.
+
+    Args:
+        granule_hrefs (Iterable[str]): The HREFs to the granules. This can
+            be a generator.
+        dst (str): The directory the collection is written to.
+        workers (Optional[int]): The number of worker processes. Defaults
+            to the number of CPUs. With a single worker, granules are
+            processed in the current process.
+        footprint_tolerance (Optional[float]): If given, item footprints
+            are built from the annotation geolocation grid. See
+            :func:`~stactools.sentinel1_grd.stac.create_item`.
+
+    Returns:
+        CollectionResult: The collection, the number of items and the
+        failures.
+    """
+    start = time.perf_counter()
+    os.makedirs(dst, exist_ok=True)
+    summarizer = CollectionSummarizer()
+    failures: List[Tuple[str, str]] = []
+
+    with tempfile.TemporaryFile("w+") as item_hrefs:
+        for granule_href, record, error in map_granules(
+                partial(_create_and_save_item,
+                        dst=dst,
+                        footprint_tolerance=footprint_tolerance),
+                granule_hrefs, workers):
+            if record is None:
+                logger.warning(f"Failed to create item for {granule_href}")
+                failures.append((granule_href, error or ""))
+            else:
+                summarizer.add(record)
+                item_hrefs.write(record.href + "\n")
+
+        collection = pystac.Collection(
+            id=SENTINEL_GRD_COLLECTION_ID,
+            title=SENTINEL_GRD_COLLECTION_TITLE,
+            description=SENTINEL_GRD_COLLECTION_DESCRIPTION,
+            license="proprietary",
+            providers=[SENTINEL_PROVIDER],
+            extent=summarizer.extent,
+            summaries=summarizer.summaries,
+            catalog_type=pystac.CatalogType.SELF_CONTAINED,
+        )
+        SarExtension.add_to(collection)
+        SatExtension.add_to(collection)
+        collection.add_link(SENTINEL_LICENSE.clone())
+
+        collection_href = os.path.join(dst, COLLECTION_FILE_NAME)
+        collection.set_self_href(collection_href)
+        item_hrefs.seek(0)
+        _write_collection(collection, collection_href,
+                          (line.rstrip("\n") for line in item_hrefs))
+
+    return CollectionResult(collection, summarizer.count, failures,
+                            time.perf_counter() - start)
@@ -1,12 +1,47 @@
 import click
+import json
 import logging
 import os
+import time
 
-from stactools.sentinel1_grd.stac import create_item
+from stactools.sentinel1_grd.bulk import (DEFAULT_ROW_GROUP_SIZE, GEOPARQUET,
+                                          NDJSON)
+from stactools.sentinel1_grd.xml_cache import DEFAULT_MAX_SIZE, enable_xml_cache
+
+# The modules that create items are imported by the commands that use them,
+# so that loading the plugin stays cheap
 
 logger = logging.getLogger(__name__)
 
 
+def xml_cache_options(function):
+    """Adds the --xml-cache, --xml-cache-size and --xml-cache-trust options
+    to a command."""
+    function = click.option(
+        "--xml-cache-trust",
+        is_flag=True,
+        help=("Use cached XML files without checking that the scenes are "
+              "unchanged, which saves a request per cached file"))(function)
+    function = click.option(
+        "--xml-cache-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE // 1024**2,
+        show_default=True,
+        help="Size limit of the XML cache, in MB")(function)
+    return click.option(
+        "--xml-cache",
+        help=("Cache the XML files of the scenes in this directory, so that "
+              "later runs on the same scenes read them from local disk"
+              ))(function)
+
+
+def enable_xml_cache_option(xml_cache, xml_cache_size, xml_cache_trust):
+    if xml_cache is None:
+        return None
+    return enable_xml_cache(xml_cache, xml_cache_size * 1024**2,
+                            not xml_cache_trust)
+
+
 def create_sentinel1grd_command(cli):
     """Creates the stactools- command line utility."""
     @cli.group(
@@ -14,7 +49,12 @@ def create_sentinel1grd_command(cli):
         short_help=("Commands for working with stactools-"),
     )
     def sentinel1grd():
-        pass
+        # Scenes and items are read and written through fsspec, unless
+        # another StacIO has been set. This is only set up when a command
+        # runs, not when the plugin is loaded.
+        from stactools.sentinel1_grd.stac import ensure_fsspec
+
+        ensure_fsspec()
 
     @sentinel1grd.command(
         "create-item",
@@ -22,18 +62,469 @@ def create_sentinel1grd_command(cli):
     )
     @click.argument("src")
     @click.argument("dst")
-    def create_item_command(src, dst):
+    @click.option("--profile",
+                  type=click.File("w"),
+                  help=("Write the time spent in each phase and the I/O of "
+                        "each file as JSON to this file, or - for stdout"))
+    @click.option(
+        "--footprint-tolerance",
+        type=float,
+        help=("Build footprints from the annotation geolocation grid, "
+              "simplified to this tolerance in degrees (0 keeps every tie "
+              "point), instead of the four corners of the manifest"))
+    @click.option("--cog",
+                  is_flag=True,
+                  help=("Convert the measurements to Cloud Optimized "
+                        "GeoTIFFs in DST, and point the data assets to them"))
+    @click.option("--render-thumbnail",
+                  is_flag=True,
+                  help=("If the scene has no quick-look, render a thumbnail "
+                        "from the VV or HH measurement to DST"))
+    @xml_cache_options
+    def create_item_command(src, dst, profile, footprint_tolerance, cog,
+                            render_thumbnail, xml_cache, xml_cache_size,
+                            xml_cache_trust):
         """Creates a STAC Collection
 
         Args:
             src (str): path to the scene
             dst (str): path to the STAC Item JSON file that will be created
         """
-        item = create_item(src)
+        from stactools.sentinel1_grd.profiling import Profile
+        from stactools.sentinel1_grd.stac import create_item
+
+        cache = enable_xml_cache_option(xml_cache, xml_cache_size,
+                                        xml_cache_trust)
+        item_profile = Profile(src) if profile is not None else None
+        item = create_item(src, item_profile, footprint_tolerance,
+                           dst if cog else None,
+                           dst if render_thumbnail else None)
 
         item_path = os.path.join(dst, "{}.json".format(item.id))
         item.set_self_href(item_path)
 
-        item.save_object()
+        if item_profile is not None:
+            with item_profile.phase("serialization"):
+                item.save_object()
+            item_profile.stop()
+            profile.write(item_profile.to_json() + "\n")
+        else:
+            item.save_object()
+
+        if cache is not None:
+            stats = cache.stats
+            click.echo(
+                f"XML cache: {stats['hits']} hit(s), {stats['misses']} "
+                f"miss(es), {stats['bytes_downloaded']} byte(s) downloaded",
+                err=True)
+
+    @sentinel1grd.command(
+        "create-items",
+        short_help="Convert many Sentinel1 GRD scenes into STAC items",
+    )
+    @click.argument("src")
+    @click.argument("dst")
+    @click.option("-w",
+                  "--workers",
+                  type=int,
+                  help="Number of worker processes, defaults to the CPU count")
+    @click.option(
+        "--failures",
+        help="Path of the JSON failure report, defaults to DST/failures.json")
+    @click.option(
+        "--index",
+        help=("Path of a SQLite index of the items written so far. Scenes "
+              "that have not changed since their item was written are "
+              "skipped"))
+    @click.option("--profile",
+                  type=click.File("w"),
+                  help=("Write the profile of each scene as a line of JSON "
+                        "to this file, or - for stdout"))
+    @click.option(
+        "-f",
+        "--format",
+        "output_format",
+        type=click.Choice(["json", NDJSON, GEOPARQUET]),
+        default="json",
+        help=("Write one JSON file per item (default), or all items to "
+              "DST/items.ndjson or DST/items.parquet (stac-geoparquet)"))
+    @click.option("--row-group-size",
+                  type=int,
+                  default=DEFAULT_ROW_GROUP_SIZE,
+                  show_default=True,
+                  help="Number of items per stac-geoparquet row group")
+    @click.option(
+        "--footprint-tolerance",
+        type=float,
+        help=("Build footprints from the annotation geolocation grid, "
+              "simplified to this tolerance in degrees (0 keeps every tie "
+              "point), instead of the four corners of the manifest"))
+    @xml_cache_options
+    def create_items_command(src, dst, workers, failures, index, profile,
+                             output_format, row_group_size,
+                             footprint_tolerance, xml_cache, xml_cache_size,
+                             xml_cache_trust):
+        """Creates a STAC Item for each of many scenes in parallel
+
+        Args:
+            src (str): a directory of scenes, a glob pattern matching scenes
+                or a text file with one scene path per line
+            dst (str): path to the directory the STAC Item JSON files
+                will be written to
+        """
+        from stactools.sentinel1_grd.batch import (create_items,
+                                                   create_items_bulk,
+                                                   find_granules,
+                                                   iter_granules)
+
+        enable_xml_cache_option(xml_cache, xml_cache_size, xml_cache_trust)
+        if output_format != "json":
+            if index is not None or profile is not None:
+                raise click.UsageError(
+                    "--index and --profile only apply to the json format")
+            os.makedirs(dst, exist_ok=True)
+            extension = "ndjson" if output_format == NDJSON else "parquet"
+            result = create_items_bulk(iter_granules(src),
+                                       os.path.join(dst, f"items.{extension}"),
+                                       output_format=output_format,
+                                       workers=workers,
+                                       row_group_size=row_group_size,
+                                       footprint_tolerance=footprint_tolerance)
+            if result.failures:
+                report_path = failures or os.path.join(dst, "failures.json")
+                result.write_failure_report(report_path)
+                click.echo(f"{len(result.failures)} scene(s) failed, "
+                           f"see {report_path}")
+            click.echo(f"Wrote {result.item_count} item(s) "
+                       f"to {result.item_hrefs[0]} "
+                       f"in {result.elapsed:.1f}s "
+                       f"({result.throughput:.2f} scenes/s)")
+            return
+
+        granule_hrefs = find_granules(src)
+        result = create_items(granule_hrefs,
+                              dst,
+                              workers=workers,
+                              index=index,
+                              profile=profile is not None,
+                              footprint_tolerance=footprint_tolerance)
+
+        for item_profile in result.profiles:
+            profile.write(json.dumps(item_profile) + "\n")
+
+        if result.failures:
+            report_path = failures or os.path.join(dst, "failures.json")
+            result.write_failure_report(report_path)
+            click.echo(f"{len(result.failures)} scene(s) failed, "
+                       f"see {report_path}")
+
+        click.echo(f"Created {len(result.item_hrefs)} item(s) "
+                   f"from {len(granule_hrefs)} scene(s) "
+                   f"({len(result.skipped)} unchanged) "
+                   f"in {result.elapsed:.1f}s "
+                   f"({result.throughput:.2f} scenes/s)")
+
+    @sentinel1grd.command(
+        "create-collection",
+        short_help="Create a STAC Collection of Sentinel1 GRD scenes",
+    )
+    @click.argument("src")
+    @click.argument("dst")
+    @click.option("-w",
+                  "--workers",
+                  type=int,
+                  help="Number of worker processes, defaults to the CPU count")
+    @click.option(
+        "--failures",
+        help="Path of the JSON failure report, defaults to DST/failures.json")
+    @click.option(
+        "--footprint-tolerance",
+        type=float,
+        help=("Build footprints from the annotation geolocation grid, "
+              "simplified to this tolerance in degrees (0 keeps every tie "
+              "point), instead of the four corners of the manifest"))
+    @xml_cache_options
+    def create_collection_command(src, dst, workers, failures,
+                                  footprint_tolerance, xml_cache,
+                                  xml_cache_size, xml_cache_trust):
+        """Creates a STAC Collection and its Items, streaming the scenes
+
+        Args:
+            src (str): a directory of scenes, a glob pattern matching scenes
+                or a text file with one scene path per line
+            dst (str): path to the directory the collection will be
+                written to
+        """
+        from stactools.sentinel1_grd.batch import iter_granules
+        from stactools.sentinel1_grd.collection import create_collection
+
+        enable_xml_cache_option(xml_cache, xml_cache_size, xml_cache_trust)
+        result = create_collection(iter_granules(src),
+                                   dst,
+                                   workers=workers,
+                                   footprint_tolerance=footprint_tolerance)
+
+        if result.failures:
+            report_path = failures or os.path.join(dst, "failures.json")
+            result.write_failure_report(report_path)
+            click.echo(f"{len(result.failures)} scene(s) failed, "
+                       f"see {report_path}")
+
+        click.echo(f"Created a collection of {result.item_count} item(s) "
+                   f"in {result.elapsed:.1f}s")
+
+    @sentinel1grd.command(
+        "create-inventory",
+        short_help="Index a listing of scenes by the fields of their names",
+    )
+    @click.argument("src")
+    @click.argument("inventory")
+    @click.option(
+        "--catalogue",
+        help=("The scenes already in the catalogue: a text file of item ids "
+              "or scene paths, one per line, a directory or a glob pattern"))
+    def create_inventory_command(src, inventory, catalogue):
+        """Creates or updates an inventory of scenes from a listing alone
+
+        Args:
+            src (str): a directory of scenes, a glob pattern matching scenes
+                or a text file with one scene path per line, such as a
+                bucket listing
+            inventory (str): path to the SQLite inventory
+        """
+        from stactools.sentinel1_grd.batch import iter_granules
+        from stactools.sentinel1_grd.inventory import InventoryIndex
+
+        with InventoryIndex(inventory) as index:
+            count = index.add_scenes(iter_granules(src))
+            catalogued = (index.add_catalogued(iter_granules(catalogue))
+                          if catalogue is not None else 0)
+        click.echo(f"Indexed {count} scene(s) and {catalogued} catalogued "
+                   f"scene(s) in {inventory}")
+
+    @sentinel1grd.command(
+        "missing-scenes",
+        short_help="List the scenes of an inventory missing from the catalogue",
+    )
+    @click.argument("inventory")
+    @click.option("--start",
+                  type=click.DateTime(),
+                  help="Only scenes starting at or after this UTC time")
+    @click.option("--end",
+                  type=click.DateTime(),
+                  help="Only scenes starting before this UTC time")
+    @click.option("--min-orbit",
+                  type=int,
+                  help="Only scenes of this absolute orbit or a later one")
+    @click.option("--max-orbit",
+                  type=int,
+                  help="Only scenes of this absolute orbit or an earlier one")
+    @click.option("--relative-orbit",
+                  type=int,
+                  help="Only scenes of this relative orbit")
+    def missing_scenes_command(inventory, start, end, min_orbit, max_orbit,
+                               relative_orbit):
+        """Prints the path of each scene of an inventory that is not in the
+        catalogue, one per line, so that it can be passed to create-items
+
+        Args:
+            inventory (str): path to the SQLite inventory
+        """
+        from stactools.sentinel1_grd.inventory import InventoryIndex
+
+        with InventoryIndex(inventory) as index:
+            for scene in index.missing(start, end, min_orbit, max_orbit,
+                                       relative_orbit):
+                click.echo(scene["href"])
+
+    @sentinel1grd.command(
+        "duplicate-scenes",
+        short_help="List the scenes of an inventory with several versions",
+    )
+    @click.argument("inventory")
+    def duplicate_scenes_command(inventory):
+        """Prints the names of the reprocessings of each scene of an
+        inventory that has several, one scene per line
+
+        Args:
+            inventory (str): path to the SQLite inventory
+        """
+        from stactools.sentinel1_grd.inventory import InventoryIndex
+
+        with InventoryIndex(inventory) as index:
+            for _, names in index.duplicates():
+                click.echo(" ".join(names))
+
+    @sentinel1grd.command(
+        "find-duplicates",
+        short_help="Find duplicate and overlapping scenes by their footprints",
+    )
+    @click.argument("src")
+    @click.option("--granules",
+                  is_flag=True,
+                  help=("SRC describes scenes rather than items: read the "
+                        "manifest of each scene"))
+    @click.option("-w",
+                  "--workers",
+                  type=int,
+                  help=("Number of worker processes reading the scenes, "
+                        "defaults to the CPU count"))
+    @click.option("--all-overlaps",
+                  is_flag=True,
+                  help=("Also print the scenes that only overlap, such as "
+                        "neighbouring slices"))
+    @click.option("--min-iou",
+                  type=float,
+                  help=("Footprint intersection over union above which scenes "
+                        "of different names are duplicates, defaults to 0.9"))
+    @click.option("--datatakes",
+                  type=click.File("w"),
+                  help=("Write the ids of the scenes of each datatake as JSON "
+                        "to this file"))
+    def find_duplicates_command(src, granules, workers, all_overlaps, min_iou,
+                                datatakes):
+        """Prints the pairs of scenes that are reprocessings or duplicates of
+        each other, one JSON object per line
+
+        Args:
+            src (str): a STAC Item JSON file, a newline-delimited JSON file
+                of items, a directory searched for JSON files or a glob
+                pattern matching JSON files. With --granules, a directory of
+                scenes, a glob pattern matching scenes or a text file with one
+                scene path per line
+        """
+        from stactools.sentinel1_grd.batch import (iter_granules,
+                                                   iter_item_documents,
+                                                   read_product_records)
+        from stactools.sentinel1_grd.overlaps import (FootprintIndex,
+                                                      footprint_from_item,
+                                                      footprint_from_record)
+
+        def _footprints():
+            if granules:
+                for granule_href, record, error in read_product_records(
+                        iter_granules(src), workers):
+                    if record is None:
+                        click.echo(f"Failed to read {granule_href}", err=True)
+                        logger.debug(error)
+                    else:
+                        yield footprint_from_record(record)
+                return
+            for name, text in iter_item_documents(src):
+                if text is None:
+                    with open(name) as f:
+                        item = json.load(f)
+                else:
+                    item = json.loads(text)
+                if isinstance(item, dict) and item.get("type") == "Feature":
+                    yield footprint_from_item(item)
+
+        index = (FootprintIndex(_footprints()) if min_iou is None else
+                 FootprintIndex(_footprints(), duplicate_iou=min_iou))
+        overlaps = index.overlaps() if all_overlaps else index.duplicates()
+        for overlap in overlaps:
+            click.echo(json.dumps(overlap._asdict()))
+        if datatakes is not None:
+            json.dump(index.datatakes(), datatakes, indent=2)
+
+    @sentinel1grd.command(
+        "verify",
+        short_help="Verify the files of scenes against their manifest",
+    )
+    @click.argument("src")
+    @click.option("-t",
+                  "--threads",
+                  type=int,
+                  default=4,
+                  show_default=True,
+                  help="Number of files of a scene hashed at a time")
+    @click.option("--chunk-size",
+                  type=int,
+                  default=8 * 1024 * 1024,
+                  show_default=True,
+                  help="Size of the chunks files are read in, in bytes")
+    @click.option("--check-all",
+                  is_flag=True,
+                  help=("Hash the files of a scene even if the size of "
+                        "another file does not match"))
+    @click.option("--failures",
+                  help="Write the scenes that do not match and their errors "
+                  "as JSON to this file")
+    def verify_command(src, threads, chunk_size, check_all, failures):
+        """Checks the size and MD5 checksum of every file of scenes against
+        their manifest.safe
+
+        Exits with status 1 if any file does not match.
+
+        Args:
+            src (str): a scene, a directory of scenes, a glob pattern matching
+                scenes or a text file with one scene path per line
+        """
+        from stactools.sentinel1_grd.batch import (iter_granules,
+                                                   write_failure_report)
+        from stactools.sentinel1_grd.verify import verify_granules
+
+        count = 0
+        bytes_read = 0
+        report = []
+        start = time.perf_counter()
+        for result in verify_granules(iter_granules(src),
+                                      threads=threads,
+                                      chunk_size=chunk_size,
+                                      fail_fast=not check_all):
+            count += 1
+            bytes_read += result.bytes_read
+            for path, error in result.failures:
+                click.echo(f"{result.granule_href}: {path}: {error}", err=True)
+                report.append((result.granule_href, f"{path}: {error}"))
+        elapsed = time.perf_counter() - start
+
+        if failures is not None:
+            write_failure_report(report, failures)
+        failed = len(set(href for href, _ in report))
+        click.echo(f"Verified {count} scene(s), {failed} not matching, "
+                   f"{bytes_read / 1e6:.0f} MB in {elapsed:.1f}s "
+                   f"({bytes_read / 1e6 / elapsed if elapsed > 0 else 0:.0f}"
+                   " MB/s)")
+        if report:
+            raise click.exceptions.Exit(1)
+
+    @sentinel1grd.command(
+        "validate",
+        short_help="Validate many STAC items offline, in parallel",
+    )
+    @click.argument("src")
+    @click.option("-w",
+                  "--workers",
+                  type=int,
+                  help="Number of worker processes, defaults to the CPU count")
+    @click.option("--failures",
+                  help="Write the invalid items and their errors as JSON to "
+                  "this file")
+    def validate_command(src, workers, failures):
+        """Validates STAC items against the schemas bundled with this package
+
+        Exits with status 1 if any item is invalid.
+
+        Args:
+            src (str): a STAC Item JSON file, a newline-delimited JSON file
+                of items, a directory searched for JSON files or a glob
+                pattern matching JSON files
+        """
+        from stactools.sentinel1_grd.validation import validate_item_files
+
+        result = validate_item_files(src, workers=workers)
+
+        if failures is not None:
+            result.write_failure_report(failures)
+        for name, error in result.failures:
+            click.echo(f"{name}: {error}", err=True)
+
+        click.echo(f"Validated {result.count} item(s), "
+                   f"{len(result.failures)} invalid, "
+                   f"in {result.elapsed:.1f}s "
+                   f"({result.throughput:.0f} items/s)")
+        if result.failures:
+            raise click.exceptions.Exit(1)
 
-        return sentinel1grd
+    return sentinel1grd
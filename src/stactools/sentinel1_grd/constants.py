@@ -61,3 +61,10 @@ SENTINEL_LICENSE = Link(
     target="https://sentinel.esa.int/documents/" +
     "247904/690755/Sentinel_Data_Legal_Notice",
 )
+
+SENTINEL_GRD_COLLECTION_ID = "sentinel-1-grd"
+SENTINEL_GRD_COLLECTION_TITLE = "Sentinel-1 Level-1 Ground Range Detected (GRD)"
+SENTINEL_GRD_COLLECTION_DESCRIPTION = (
+    "Sentinel-1 Level-1 Ground Range Detected (GRD) products consist of "
+    "focused SAR data that has been detected, multi-looked and projected to "
+    "ground range using an Earth ellipsoid model.")
@@ -0,0 +1,161 @@
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Optional
+
+from fsspec.core import url_to_fs  # type: ignore
+
+
+def product_id_from_href(granule_href: str) -> str:
+    """Returns the product id of a granule from its HREF alone.
+
+    This is the name of the SAFE directory, which is what
+    :attr:`ProductMetadata.product_id` returns, or the name of the archive
+    without its ``.zip`` extension for zipped granules.
+    """
+    name = os.path.basename(granule_href.rstrip("/"))
+    if name.lower().endswith(".zip"):
+        name = name[:-len(".zip")]
+    return name
+
+
+def granule_fingerprint(granule_href: str) -> str:
+    """Returns a string that changes whenever a granule is modified.
+
+    The fingerprint is taken from a single stat of the granule's
+    ``manifest.safe`` (or of the archive for zipped granules): the ETag or
+    checksum if the store provides one, otherwise its size and modification
+    time.
+    """
+    if granule_href.lower().endswith(".zip"):
+        href = granule_href
+    else:
+        href = os.path.join(granule_href, "manifest.safe")
+
+    fs, path = url_to_fs(href)
+    info = fs.info(path)
+
+    for key in ["ETag", "etag", "md5", "checksum"]:
+        if info.get(key):
+            return str(info[key])
+
+    for key in ["mtime", "LastModified", "last_modified", "created"]:
+        if info.get(key):
+            return f"{info.get('size')}:{info[key]}"
+
+    return str(info.get("size"))
+
+
+def item_options_key(footprint_tolerance: Optional[float] = None,
+                     cog_dir: Optional[str] = None,
+                     thumbnail_dir: Optional[str] = None) -> str:
+    """Returns a string that identifies the options an item was created with.
+
+    Items created from the same granule with other options differ, so the
+    key is stored in the :class:`ItemIndex` next to the fingerprint. The
+    arguments are those of :func:`~stactools.sentinel1_grd.stac.create_item`.
+    """
+    return json.dumps(
+        {
+            "footprint_tolerance": footprint_tolerance,
+            "cog_dir": cog_dir,
+            "thumbnail_dir": thumbnail_dir,
+        },
+        sort_keys=True)
+
+
+class ItemIndex:
+    """An on-disk index of the items written for each granule.
+
+    The index is a SQLite database keyed by product id. It records the
+    fingerprint of the granule (see :func:`granule_fingerprint`), the
+    options the item was created with (see :func:`item_options_key`) and
+    the HREF of the item that was written for it, so that a later batch run
+    can skip granules that have not changed since.
+
+    Updates are committed in batches of ``commit_every`` and when the
+    index is closed.
+
+    Args:
+        path (str): The path to the SQLite database. It is created if it
+            does not exist.
+        commit_every (int): The number of updates per transaction.
+            Defaults to 1000.
+    """
+    def __init__(self, path: str, commit_every: int = 1000) -> None:
+        self.path = path
+        self.commit_every = commit_every
+        self._pending = 0
+        self._connection = sqlite3.connect(path)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("CREATE TABLE IF NOT EXISTS items ("
+                                 "product_id TEXT PRIMARY KEY, "
+                                 "granule_href TEXT NOT NULL, "
+                                 "fingerprint TEXT NOT NULL, "
+                                 "item_href TEXT NOT NULL, "
+                                 "updated TEXT NOT NULL, "
+                                 "options TEXT NOT NULL DEFAULT '')")
+        columns = [
+            x["name"]
+            for x in self._connection.execute("PRAGMA table_info(items)")
+        ]
+        if "options" not in columns:
+            # Indexes written before options were recorded
+            self._connection.execute("ALTER TABLE items ADD COLUMN "
+                                     "options TEXT NOT NULL DEFAULT ''")
+        self._connection.commit()
+
+    def __enter__(self) -> "ItemIndex":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.commit()
+        self._connection.close()
+
+    def commit(self) -> None:
+        self._connection.commit()
+        self._pending = 0
+
+    def get(self, product_id: str) -> Optional[sqlite3.Row]:
+        """Returns the index record of a product, or None."""
+        return self._connection.execute(
+            "SELECT * FROM items WHERE product_id = ?",
+            (product_id, )).fetchone()
+
+    def is_current(self,
+                   product_id: str,
+                   fingerprint: str,
+                   item_href: str,
+                   options: str = "") -> bool:
+        """Returns True if the item of a product is up to date.
+
+        That is the case when the granule has the same fingerprint as when
+        the item was last written, the item was written to the same HREF
+        with the same options, and it still exists.
+        """
+        record = self.get(product_id)
+        return (record is not None and record["fingerprint"] == fingerprint
+                and record["item_href"] == item_href
+                and record["options"] == options and os.path.exists(item_href))
+
+    def update(self,
+               product_id: str,
+               granule_href: str,
+               fingerprint: str,
+               item_href: str,
+               options: str = "") -> None:
+        """Records that the item of a product has been written."""
+        self._connection.execute(
+            "INSERT OR REPLACE INTO items (product_id, granule_href, "
+            "fingerprint, item_href, updated, options) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (product_id, granule_href, fingerprint, item_href,
+             datetime.now(timezone.utc).isoformat(), options),
+        )
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
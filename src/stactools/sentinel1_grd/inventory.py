@@ -0,0 +1,409 @@
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Length of a Sentinel-1 product name without extension, such as
+# S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8
+NAME_LENGTH = 67
+
+# Names parsed and inserted per transaction by InventoryIndex
+DEFAULT_BATCH_SIZE = 100000
+
+# Page cache of the inventory database, in KiB. Inserting millions of
+# scenes is about twice as fast when the indices fit in it.
+CACHE_SIZE = 256 * 1024
+
+# Character positions of the fields of a product name
+_PLATFORM = slice(0, 3)
+_MODE = slice(4, 6)
+_PRODUCT_TYPE = slice(7, 10)
+_RESOLUTION = slice(10, 11)
+_LEVEL = slice(12, 13)
+_PRODUCT_CLASS = slice(13, 14)
+_POLARISATION = slice(14, 16)
+_START = 17
+_STOP = 33
+_ORBIT = slice(49, 55)
+_DATATAKE = slice(56, 62)
+_UNIQUE_ID = slice(63, 67)
+_SCENE_KEY = slice(0, 62)
+_SEPARATORS = [3, 6, 11, 16, 32, 48, 55, 62]
+
+# Relative orbit of an absolute orbit, as (absolute - offset) % 175 + 1
+RELATIVE_ORBIT_OFFSETS = {"S1A": 73, "S1B": 27}
+ORBITS_PER_CYCLE = 175
+
+# Value of each ASCII character as a hexadecimal digit, -1 for the others
+_HEX_DIGITS = np.full(256, -1, dtype=np.int64)
+for _i, _c in enumerate("0123456789ABCDEF"):
+    _HEX_DIGITS[ord(_c)] = _i
+    _HEX_DIGITS[ord(_c.lower())] = _i
+
+
+def scene_name(href: str) -> str:
+    """Returns the product name of a granule HREF, without the ``.SAFE``
+    and ``.zip`` extensions. This is the id of its item."""
+    # Called for every line of a listing, so string methods are used
+    # instead of os.path
+    name = href.rstrip("/").rpartition("/")[2]
+    for extension in [".zip", ".safe"]:
+        if name[-len(extension):].lower() == extension:
+            name = name[:-len(extension)]
+    return name
+
+
+def _text(raw: np.ndarray, field: slice) -> np.ndarray:
+    width = field.stop - field.start
+    return np.ascontiguousarray(
+        raw[:, field]).view(f"S{width}").ravel().astype(f"U{width}")
+
+
+def _number(digits: np.ndarray) -> np.ndarray:
+    # Decimal digits, as a (names, digits) array, to integers
+    powers = 10**np.arange(digits.shape[1] - 1, -1, -1)
+    return digits.astype(np.int64) @ powers
+
+
+def _datetimes(digits: np.ndarray, start: int,
+               valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # YYYYMMDDTHHMMSS to datetime64, with calendar arithmetic rather than
+    # string parsing. Returns the times, and whether each one is a date.
+    year = _number(digits[:, start:start + 4])
+    month = _number(digits[:, start + 4:start + 6])
+    day = _number(digits[:, start + 6:start + 8])
+    hour = _number(digits[:, start + 9:start + 11])
+    minute = _number(digits[:, start + 11:start + 13])
+    second = _number(digits[:, start + 13:start + 15])
+
+    valid = (valid & (month >= 1) & (month <= 12) & (day >= 1) & (hour < 24)
+             & (minute < 60) & (second < 60))
+    year = np.where(valid, year, 1970)
+    month = np.where(valid, month, 1)
+    day = np.where(valid, day, 1)
+
+    months = (year - 1970).astype("datetime64[Y]").astype("datetime64[M]") + (
+        month - 1)
+    days = months.astype("datetime64[D]") + (day - 1)
+    # Days past the end of their month, such as February 30th
+    valid &= days.astype("datetime64[M]") == months
+
+    values = (days.astype("datetime64[s]") + hour * 3600 + minute * 60 +
+              second)
+    values[~valid] = np.datetime64("NaT")
+    return values, valid
+
+
+class SceneNames:
+    """The fields of many product names, as NumPy arrays.
+
+    Product names such as
+    ``S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8``
+    have a fixed layout, so all names are parsed at once by slicing a
+    ``(names, 67)`` array of characters, without a regular expression or a
+    Python loop per name. Names that do not have the layout are marked as
+    not :attr:`valid`, and their fields are meaningless.
+
+    Use :func:`parse_scene_names` to create it.
+
+    Attributes:
+        name (np.ndarray): The names, without extension.
+        valid (np.ndarray): Whether each name has the product name layout.
+        platform (np.ndarray): ``S1A``, ``S1B``...
+        mode (np.ndarray): The instrument mode, such as ``IW``.
+        product_type (np.ndarray): ``GRD``, ``SLC``...
+        resolution (np.ndarray): ``F``, ``H`` or ``M``.
+        level (np.ndarray): The processing level, such as ``1``.
+        product_class (np.ndarray): ``S`` for standard products, ``A`` for
+            annotation products.
+        polarisation (np.ndarray): ``SH``, ``SV``, ``DH`` or ``DV``.
+        start_datetime (np.ndarray): The start times, as ``datetime64[s]``.
+        end_datetime (np.ndarray): The stop times, as ``datetime64[s]``.
+        absolute_orbit (np.ndarray): The absolute orbit numbers.
+        relative_orbit (np.ndarray): The relative orbit numbers, or 0 for
+            platforms without a known offset in
+            :data:`RELATIVE_ORBIT_OFFSETS`.
+        datatake_id (np.ndarray): The datatake ids, as in ``s1:datatake_id``.
+        unique_id (np.ndarray): The product unique identifiers, which is
+            all that differs between reprocessings of a product.
+        scene_key (np.ndarray): The names without their unique identifier,
+            which are the same for all reprocessings of a product.
+    """
+    def __init__(self, names: List[str]) -> None:
+        self.name = np.array(names, dtype=str)
+        lengths = np.array([len(x) for x in names], dtype=np.int64)
+        raw = np.frombuffer("".join(
+            x.ljust(NAME_LENGTH)[:NAME_LENGTH]
+            for x in names).encode("ascii", "replace"),
+                            dtype=np.uint8).reshape(-1, NAME_LENGTH)
+
+        # Characters that are not digits wrap around to values above 9
+        digits = raw - np.uint8(ord("0"))
+        is_digit = digits <= 9
+        datatake = _HEX_DIGITS[raw[:, _DATATAKE]]
+        self.valid = ((lengths == NAME_LENGTH)
+                      & np.all(raw[:, _SEPARATORS] == ord("_"), axis=1)
+                      & (raw[:, _START + 8] == ord("T"))
+                      & (raw[:, _STOP + 8] == ord("T"))
+                      & np.all(is_digit[:, _START:_START + 8], axis=1)
+                      & np.all(is_digit[:, _START + 9:_START + 15], axis=1)
+                      & np.all(is_digit[:, _STOP:_STOP + 8], axis=1)
+                      & np.all(is_digit[:, _STOP + 9:_STOP + 15], axis=1)
+                      & np.all(is_digit[:, _ORBIT], axis=1)
+                      & np.all(datatake >= 0, axis=1))
+
+        self.platform = _text(raw, _PLATFORM)
+        self.mode = _text(raw, _MODE)
+        self.product_type = _text(raw, _PRODUCT_TYPE)
+        self.resolution = _text(raw, _RESOLUTION)
+        self.level = _text(raw, _LEVEL)
+        self.product_class = _text(raw, _PRODUCT_CLASS)
+        self.polarisation = _text(raw, _POLARISATION)
+        self.unique_id = _text(raw, _UNIQUE_ID)
+        self.scene_key = self.name.astype(f"U{_SCENE_KEY.stop}")
+
+        self.start_datetime, self.valid = _datetimes(digits, _START,
+                                                     self.valid)
+        self.end_datetime, self.valid = _datetimes(digits, _STOP, self.valid)
+
+        self.absolute_orbit = np.where(self.valid, _number(digits[:, _ORBIT]),
+                                       0)
+        self.datatake_id = np.where(
+            self.valid,
+            np.clip(datatake, 0, None) @ (16**np.arange(5, -1, -1)), 0)
+
+        self.relative_orbit = np.zeros(len(names), dtype=np.int64)
+        for platform, offset in RELATIVE_ORBIT_OFFSETS.items():
+            mask = self.valid & (self.platform == platform)
+            self.relative_orbit[mask] = (
+                (self.absolute_orbit[mask] - offset) % ORBITS_PER_CYCLE + 1)
+
+    def __len__(self) -> int:
+        return len(self.name)
+
+
+def parse_scene_names(names: Iterable[str]) -> SceneNames:
+    """Parses many product names at once.
+
+    Args:
+        names (Iterable[str]): Product names or granule HREFs. The
+            directory, the ``.SAFE`` and the ``.zip`` extension of HREFs are
+            ignored.
+
+    Returns:
+        SceneNames: The fields of the names.
+    """
+    return SceneNames([scene_name(x) for x in names])
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class InventoryIndex:
+    """A queryable inventory of scenes, built from their names alone.
+
+    The inventory is a SQLite database of the scenes of a listing, such as
+    the granules of a bucket, with the fields of their names (see
+    :class:`SceneNames`), and of the scenes that are already in the
+    catalogue. No manifest is read, so listings of millions of granules can
+    be indexed in minutes and queried with :meth:`missing` and
+    :meth:`duplicates` to plan a backfill.
+
+    Scenes are matched on their :attr:`SceneNames.scene_key`, so a scene
+    is catalogued if any of its reprocessings is.
+
+    Args:
+        path (str): The path to the SQLite database. It is created if it
+            does not exist.
+        batch_size (int): The number of names parsed and inserted per
+            transaction.
+    """
+    def __init__(self,
+                 path: str,
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self._connection = sqlite3.connect(path)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute(f"PRAGMA cache_size = -{CACHE_SIZE}")
+        self._connection.executescript(
+            "CREATE TABLE IF NOT EXISTS scenes ("
+            "name TEXT PRIMARY KEY, "
+            "href TEXT NOT NULL, "
+            "scene_key TEXT NOT NULL, "
+            "platform TEXT NOT NULL, "
+            "mode TEXT NOT NULL, "
+            "product_type TEXT NOT NULL, "
+            "resolution TEXT NOT NULL, "
+            "polarisation TEXT NOT NULL, "
+            "start_datetime TEXT NOT NULL, "
+            "end_datetime TEXT NOT NULL, "
+            "absolute_orbit INTEGER NOT NULL, "
+            "relative_orbit INTEGER NOT NULL, "
+            "datatake_id INTEGER NOT NULL, "
+            "unique_id TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS scenes_scene_key "
+            "ON scenes (scene_key);"
+            "CREATE INDEX IF NOT EXISTS scenes_start_datetime "
+            "ON scenes (start_datetime);"
+            "CREATE INDEX IF NOT EXISTS scenes_absolute_orbit "
+            "ON scenes (absolute_orbit);"
+            "CREATE TABLE IF NOT EXISTS catalogue ("
+            "name TEXT PRIMARY KEY, "
+            "scene_key TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS catalogue_scene_key "
+            "ON catalogue (scene_key);")
+        self._connection.commit()
+
+    def __enter__(self) -> "InventoryIndex":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._connection.commit()
+        self._connection.close()
+
+    def _batches(self, hrefs: Iterable[str]) -> Iterator[List[str]]:
+        iterator = iter(hrefs)
+        while True:
+            batch = list(islice(iterator, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def add_scenes(self, hrefs: Iterable[str]) -> int:
+        """Adds the scenes of a listing.
+
+        Args:
+            hrefs (Iterable[str]): The granule HREFs or product names. This
+                can be a generator. Names that are not product names are
+                skipped.
+
+        Returns:
+            int: The number of scenes added.
+        """
+        count = 0
+        for batch in self._batches(hrefs):
+            names = SceneNames([scene_name(x) for x in batch])
+            valid = np.flatnonzero(names.valid)
+            if len(valid) < len(batch):
+                logger.warning(
+                    f"Skipped {len(batch) - len(valid)} invalid scene names")
+            # Columns are converted to Python lists at once, which is much
+            # faster than indexing the arrays row by row
+            columns = [
+                names.name[valid],
+                np.array(batch, dtype=object)[valid],
+                names.scene_key[valid],
+                names.platform[valid],
+                names.mode[valid],
+                names.product_type[valid],
+                names.resolution[valid],
+                names.polarisation[valid],
+                np.datetime_as_string(names.start_datetime[valid]),
+                np.datetime_as_string(names.end_datetime[valid]),
+                names.absolute_orbit[valid],
+                names.relative_orbit[valid],
+                names.datatake_id[valid],
+                names.unique_id[valid],
+            ]
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO scenes VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                zip(*(x.tolist() for x in columns)))
+            self._connection.commit()
+            count += len(valid)
+        return count
+
+    def add_catalogued(self, names: Iterable[str]) -> int:
+        """Adds scenes that are already in the catalogue.
+
+        Args:
+            names (Iterable[str]): Item ids, product names or granule HREFs.
+                This can be a generator.
+
+        Returns:
+            int: The number of scenes added.
+        """
+        count = 0
+        for batch in self._batches(names):
+            parsed = SceneNames([scene_name(x) for x in batch])
+            valid = np.flatnonzero(parsed.valid)
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO catalogue VALUES (?, ?)",
+                zip(parsed.name[valid].tolist(),
+                    parsed.scene_key[valid].tolist()))
+            self._connection.commit()
+            count += len(valid)
+        return count
+
+    def missing(self,
+                start: Optional[datetime] = None,
+                end: Optional[datetime] = None,
+                min_orbit: Optional[int] = None,
+                max_orbit: Optional[int] = None,
+                relative_orbit: Optional[int] = None) -> Iterator[sqlite3.Row]:
+        """Yields the scenes of the listing that are not in the catalogue.
+
+        Args:
+            start (Optional[datetime]): Only scenes that start at or after
+                this time (UTC).
+            end (Optional[datetime]): Only scenes that start before this time
+                (UTC).
+            min_orbit (Optional[int]): Only scenes of this absolute orbit or
+                a later one.
+            max_orbit (Optional[int]): Only scenes of this absolute orbit or
+                an earlier one.
+            relative_orbit (Optional[int]): Only scenes of this relative
+                orbit.
+
+        Returns:
+            Iterator[sqlite3.Row]: The scenes, by start time. All
+            reprocessings of a missing scene are yielded.
+        """
+        conditions = [
+            "NOT EXISTS (SELECT 1 FROM catalogue "
+            "WHERE catalogue.scene_key = scenes.scene_key)"
+        ]
+        parameters: List[object] = []
+        for condition, value in [("start_datetime >= ?", _iso(start)),
+                                 ("start_datetime < ?", _iso(end)),
+                                 ("absolute_orbit >= ?", min_orbit),
+                                 ("absolute_orbit <= ?", max_orbit),
+                                 ("relative_orbit = ?", relative_orbit)]:
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        yield from self._connection.execute(
+            f"SELECT * FROM scenes WHERE {' AND '.join(conditions)} "
+            "ORDER BY start_datetime, name", parameters)
+
+    def duplicates(self) -> Iterator[Tuple[str, List[str]]]:
+        """Yields the scenes of the listing that have several reprocessings,
+        which differ only by their unique identifier.
+
+        Returns:
+            Iterator[Tuple[str, List[str]]]: The scene key and the sorted
+            names of each duplicated scene, by scene key.
+        """
+        for row in self._connection.execute(
+                "SELECT scene_key, group_concat(name, ' ') AS names "
+                "FROM scenes GROUP BY scene_key HAVING count(*) > 1 "
+                "ORDER BY scene_key"):
+            yield row["scene_key"], sorted(row["names"].split(" "))
+
+    def __len__(self) -> int:
+        return self._connection.execute(
+            "SELECT count(*) FROM scenes").fetchone()[0]
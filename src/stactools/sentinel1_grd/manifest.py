@@ -0,0 +1,301 @@
+import hashlib
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+from fsspec.core import url_to_fs  # type: ignore
+from lxml import etree  # type: ignore
+from stactools.core.io.xml import XmlElement
+
+from .profiling import Profile
+from .xml_cache import open_xml
+
+MANIFEST_NAMESPACES = {
+    "gml": "http://www.opengis.net/gml",
+    "safe": "http://www.esa.int/safe/sentinel-1.0",
+    "s1": "http://www.esa.int/safe/sentinel-1.0/sentinel-1",
+    "s1sarl1": "http://www.esa.int/safe/sentinel-1.0/sentinel-1/sar/level-1",
+}
+
+
+def _compile(path: str) -> etree.XPath:
+    return etree.XPath(f"metadataWrap/xmlData/{path}/text()",
+                       namespaces=MANIFEST_NAMESPACES)
+
+
+# The manifest fields used to build items, grouped by the ID of the
+# metadataObject they live in. The paths are anchored at the
+# metadataObject, so each one only visits the nodes along its own path.
+MANIFEST_FIELDS: Dict[str, Dict[str, etree.XPath]] = {
+    "platform": {
+        "nssdc_identifier":
+        _compile("safe:platform/safe:nssdcIdentifier"),
+        "family_name":
+        _compile("safe:platform/safe:familyName"),
+        "number":
+        _compile("safe:platform/safe:number"),
+        "instrument_mode":
+        _compile("safe:platform/safe:instrument/safe:extension/"
+                 "s1sarl1:instrumentMode/s1sarl1:mode"),
+    },
+    "measurementOrbitReference": {
+        "orbit_number":
+        _compile("safe:orbitReference/safe:orbitNumber[@type='start']"),
+        "relative_orbit_number":
+        _compile(
+            "safe:orbitReference/safe:relativeOrbitNumber[@type='start']"),
+        "cycle_number":
+        _compile("safe:orbitReference/safe:cycleNumber"),
+        "pass":
+        _compile("safe:orbitReference/safe:extension/"
+                 "s1:orbitProperties/s1:pass"),
+    },
+    "generalProductInformation": {
+        "instrument_configuration_id":
+        _compile("s1sarl1:standAloneProductInformation/"
+                 "s1sarl1:instrumentConfigurationID"),
+        "mission_datatake_id":
+        _compile(
+            "s1sarl1:standAloneProductInformation/s1sarl1:missionDataTakeID"),
+        "polarisations":
+        _compile("s1sarl1:standAloneProductInformation/"
+                 "s1sarl1:transmitterReceiverPolarisation"),
+        "product_type":
+        _compile("s1sarl1:standAloneProductInformation/s1sarl1:productType"),
+    },
+    "acquisitionPeriod": {
+        "start_time": _compile("safe:acquisitionPeriod/safe:startTime"),
+        "stop_time": _compile("safe:acquisitionPeriod/safe:stopTime"),
+    },
+    "measurementFrameSet": {
+        "footprint":
+        _compile("safe:frameSet/safe:frame/safe:footPrint/"
+                 "gml:coordinates"),
+    },
+}
+
+
+class ManifestError(Exception):
+    pass
+
+
+class DataObject(NamedTuple):
+    """A file of a granule, as listed in the ``dataObjectSection`` of its
+    manifest.
+
+    Args:
+        id (str): The ID of the data object in the manifest.
+        path (str): The path of the file, relative to the granule.
+        href (str): The HREF of the file.
+        size (Optional[int]): The size of the file, in bytes.
+        checksum (Optional[str]): The hexadecimal checksum of the file.
+        checksum_name (Optional[str]): The checksum algorithm, e.g. ``MD5``.
+    """
+    id: str
+    path: str
+    href: str
+    size: Optional[int]
+    checksum: Optional[str]
+    checksum_name: Optional[str]
+
+
+def read_manifest_fields(root: XmlElement) -> Dict[str, List[str]]:
+    """Extracts the texts of all :data:`MANIFEST_FIELDS` from a manifest.
+
+    The metadata objects of the manifest are visited once, and only the
+    nodes along the path of each field below them are touched.
+
+    Args:
+        root (XmlElement): The root element of a ``manifest.safe``.
+
+    Returns:
+        Dict[str, List[str]]: The texts of each field, keyed by field name.
+    """
+    metadata_section = root.element.find("metadataSection")
+    if metadata_section is None:
+        raise ManifestError("Manifest does not have a metadataSection")
+
+    fields: Dict[str, List[str]] = {}
+    for metadata_object in metadata_section:
+        xpaths = MANIFEST_FIELDS.get(metadata_object.get("ID"), {})
+        for name, xpath in xpaths.items():
+            fields[name] = [str(x) for x in xpath(metadata_object)]
+
+    return fields
+
+
+class SafeManifest:
+    """The parsed ``manifest.safe`` of a Sentinel-1 GRD granule.
+
+    The manifest is read once per granule and shared between
+    :class:`~stactools.sentinel1_grd.metadata_links.MetadataLinks`,
+    :class:`~stactools.sentinel1_grd.product_metadata.ProductMetadata`
+    and the property fillers, so that each granule costs a single read.
+
+    It also resolves the HREFs of the other files of the granule. The
+    granule can either be a SAFE directory or a zipped SAFE archive
+    (``.SAFE.zip``), local or on any store fsspec can read. Files inside an
+    archive are addressed with fsspec chained URLs
+    (``zip://<member>::<archive href>``), so only the central directory and
+    the members that are actually read are fetched from the archive.
+
+    The granule is listed once, through fsspec, the first time a directory
+    listing is needed. The manifest itself is read the first time
+    :attr:`root` is accessed, so that the listing and the read can be
+    issued concurrently.
+
+    Args:
+        granule_href (str): The HREF to the granule.
+        profile (Optional[Profile]): If given, the read of the manifest is
+            accounted for in this profile.
+    """
+    def __init__(self,
+                 granule_href: str,
+                 profile: Optional[Profile] = None) -> None:
+        self.granule_href = granule_href
+        self.profile = profile
+
+        if self.is_archive:
+            self._fs, _ = url_to_fs(f"zip://::{granule_href}")
+            manifests = [
+                x for x in self._fs.zip.namelist()
+                if os.path.basename(x) == "manifest.safe"
+            ]
+            if not manifests:
+                raise ManifestError(
+                    f"Archive at {granule_href} does not contain a manifest.safe"
+                )
+            self._root_path = os.path.dirname(min(manifests, key=len))
+            # Archives can also hold the content of the SAFE directory at
+            # their root, in which case the archive is named after it
+            self.granule_name = (os.path.basename(self._root_path)
+                                 or os.path.basename(granule_href)[:-4])
+        else:
+            self._fs, self._root_path = url_to_fs(granule_href)
+            self._root_path = self._root_path.rstrip("/")
+            self.granule_name = os.path.basename(granule_href.rstrip("/"))
+
+        self.href = self.join("manifest.safe")
+        self._root: Optional[XmlElement] = None
+        self._files: Optional[List[str]] = None
+        self._fields: Optional[Dict[str, List[str]]] = None
+        self._data_objects: Optional[Dict[str, DataObject]] = None
+        self._data: Optional[bytes] = None
+        self._checksum: Optional[str] = None
+
+    @property
+    def root(self) -> XmlElement:
+        """The root element of the manifest, parsed once."""
+        if self._root is None:
+            # Read through fsspec rather than the default StacIO, so that
+            # zipped and remote granules do not depend on use_fsspec()
+            with open_xml(self.href, self.profile) as f:
+                self._data = f.read()
+            self._root = XmlElement(etree.fromstring(self._data))
+        return self._root
+
+    @property
+    def data_object(self) -> DataObject:
+        """The manifest itself, as a :class:`DataObject`.
+
+        The manifest does not list itself in its ``dataObjectSection``, so
+        its size and MD5 checksum are those of the bytes that were read.
+        """
+        self.root
+        assert self._data is not None
+        if self._checksum is None:
+            self._checksum = hashlib.md5(self._data).hexdigest()
+        return DataObject("manifest", "manifest.safe", self.href,
+                          len(self._data), self._checksum, "MD5")
+
+    @property
+    def fields(self) -> Dict[str, List[str]]:
+        """The texts of all :data:`MANIFEST_FIELDS`, keyed by field name.
+
+        The fields are extracted in a single pass over the metadata objects
+        of the manifest the first time they are needed.
+        """
+        if self._fields is None:
+            self._fields = read_manifest_fields(self.root)
+        return self._fields
+
+    def find_text(self, field: str) -> Optional[str]:
+        """Returns the text of a manifest field, or None if it is missing."""
+        texts = self.fields.get(field)
+        return texts[0] if texts else None
+
+    def find_text_or_throw(self, field: str) -> str:
+        """Returns the text of a manifest field.
+
+        Raises:
+            ManifestError: If the field is missing from the manifest.
+        """
+        text = self.find_text(field)
+        if text is None:
+            raise ManifestError(
+                f"Cannot find {field} in manifest at {self.href}")
+        return text
+
+    @property
+    def data_objects(self) -> Dict[str, DataObject]:
+        """The files listed in the ``dataObjectSection`` of the manifest,
+        keyed by their path relative to the granule.
+
+        The section is read once, the first time it is needed.
+        """
+        if self._data_objects is None:
+            section = self.root.element.find("dataObjectSection")
+            if section is None:
+                raise ManifestError(f"Manifest at {self.href} does not have a "
+                                    "dataObjectSection")
+            data_objects = {}
+            for data_object in section.iterfind("dataObject"):
+                for byte_stream in data_object.iterfind("byteStream"):
+                    location = byte_stream.find("fileLocation")
+                    if location is None or not location.get("href"):
+                        continue
+                    # Remove relative prefix that some paths have
+                    path = location.get("href").strip("./")
+                    checksum = byte_stream.find("checksum")
+                    size = byte_stream.get("size")
+                    data_objects[path] = DataObject(
+                        data_object.get("ID"),
+                        path,
+                        self.join(*path.split("/")),
+                        int(size) if size else None,
+                        None if checksum is None else
+                        (checksum.text or "").strip().lower() or None,
+                        None
+                        if checksum is None else checksum.get("checksumName"),
+                    )
+            self._data_objects = data_objects
+        return self._data_objects
+
+    @property
+    def is_archive(self) -> bool:
+        return self.granule_href.lower().endswith(".zip")
+
+    @property
+    def files(self) -> List[str]:
+        """The paths of all files of the granule, relative to the granule."""
+        if self._files is None:
+            prefix = f"{self._root_path}/" if self._root_path else ""
+            self._files = sorted(x[len(prefix):]
+                                 for x in self._fs.find(self._root_path)
+                                 if x.startswith(prefix))
+        return self._files
+
+    def join(self, *paths: str) -> str:
+        """Returns the HREF of a file, given its path inside the granule."""
+        if self.is_archive:
+            member = "/".join((self._root_path, ) + paths).lstrip("/")
+            return f"zip://{member}::{self.granule_href}"
+        else:
+            return os.path.join(self.granule_href, *paths)
+
+    def listdir(self, *paths: str) -> List[str]:
+        """Lists the names of the files in a directory of the granule."""
+        directory = "/".join(paths)
+        return [
+            os.path.basename(x) for x in self.files
+            if os.path.dirname(x) == directory
+        ]
@@ -1,34 +1,35 @@
-import os
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import pystac
 
-from stactools.core.io.xml import XmlElement
-
+from .calibration import CalibrationLUT, read_calibration
 from .constants import SAFE_MANIFEST_ASSET_KEY
+from .manifest import ManifestError, SafeManifest
+from .noise import NoiseVectors
 
-
-class ManifestError(Exception):
-    pass
+__all__ = ["ManifestError", "MetadataLinks"]
 
 
 class MetadataLinks:
     def __init__(
         self,
         granule_href: str,
+        manifest: Optional[SafeManifest] = None,
     ):
+        if manifest is None:
+            manifest = SafeManifest(granule_href)
+
         self.granule_href = granule_href
-        self.href = os.path.join(granule_href, "manifest.safe")
+        self.manifest = manifest
+        self.href = manifest.href
 
-        root = XmlElement.from_file(self.href)
-        data_object_section = root.find("dataObjectSection")
+        data_object_section = manifest.root.find("dataObjectSection")
         if data_object_section is None:
             raise ManifestError(
                 f"Manifest at {self.href} does not have a dataObjectSection")
 
         self._data_object_section = data_object_section
-        self.product_metadata_href = os.path.join(granule_href,
-                                                  "manifest.safe")
+        self.product_metadata_href = manifest.href
 
     def _find_href(self, xpaths: List[str]) -> Optional[str]:
         file_path = None
@@ -42,41 +43,75 @@ class MetadataLinks:
         else:
             # Remove relative prefix that some paths have
             file_path = file_path.strip("./")
-            return os.path.join(self.granule_href, file_path)
+            return self.manifest.join(file_path)
 
     @property
     def thumbnail_href(self) -> Optional[str]:
-        preview = os.path.join(self.granule_href, "preview")
-        return os.path.join(preview, "quick-look.png")
+        """The HREF to the quick-look of the granule, or None if the granule
+        does not have one, like some Azure and trimmed granules."""
+        if "quick-look.png" not in self.manifest.listdir("preview"):
+            return None
+        return self.manifest.join("preview", "quick-look.png")
+
+    @property
+    def _annotation_files(self) -> List[Tuple[str, str]]:
+        return [(x, self.manifest.join("annotation", x))
+                for x in self.manifest.listdir("annotation")
+                if x.endswith("xml")]
+
+    @property
+    def _calibration_files(self) -> List[Tuple[str, str]]:
+        return [(x, self.manifest.join("annotation", "calibration", x))
+                for x in self.manifest.listdir("annotation", "calibration")
+                if x.endswith("xml")]
 
     @property
     def annotation_hrefs(self) -> List[str]:
-        annotation_path = os.path.join(self.granule_href, "annotation")
-        return [
-            os.path.join(annotation_path, x)
-            for x in os.listdir(annotation_path) if x.endswith("xml")
-        ]
+        return [href for _, href in self._annotation_files]
 
     @property
     def calibration_hrefs(self) -> List[str]:
-        calibration_path = os.path.join(self.granule_href,
-                                        "annotation/calibration")
         return [
-            os.path.join(calibration_path, x)
-            for x in os.listdir(calibration_path)
-            if x.endswith("xml") and "calibration" in x
+            href for name, href in self._calibration_files
+            if "calibration" in name
         ]
 
     @property
     def noise_hrefs(self) -> List[str]:
-        calibration_path = os.path.join(self.granule_href,
-                                        "annotation/calibration")
         return [
-            os.path.join(calibration_path, x)
-            for x in os.listdir(calibration_path)
-            if x.endswith("xml") and "noise" in x
+            href for name, href in self._calibration_files if "noise" in name
         ]
 
+    def read_calibrations(
+            self,
+            cache_dir: Optional[str] = None) -> Dict[str, CalibrationLUT]:
+        """Reads the calibration vectors of every polarisation.
+
+        Args:
+            cache_dir (Optional[str]): A directory to cache the parsed
+                vectors in. See
+                :func:`~stactools.sentinel1_grd.calibration.read_calibration`.
+
+        Returns:
+            Dict[str, CalibrationLUT]: The calibration vectors, by
+            polarisation (e.g. ``VV``).
+        """
+        luts = [
+            read_calibration(href, cache_dir)
+            for href in self.calibration_hrefs
+        ]
+        return {str(lut.polarisation): lut for lut in luts}
+
+    def read_noise_vectors(self) -> Dict[str, NoiseVectors]:
+        """Reads the thermal noise vectors of every polarisation.
+
+        Returns:
+            Dict[str, NoiseVectors]: The noise vectors, by polarisation
+            (e.g. ``VV``).
+        """
+        vectors = [NoiseVectors.from_xml(href) for href in self.noise_hrefs]
+        return {str(x.polarisation): x for x in vectors}
+
     def create_manifest_asset(self):
         asset = pystac.Asset(href=self.href,
                              media_type=pystac.MediaType.XML,
@@ -85,64 +120,64 @@ class MetadataLinks:
 
     def create_product_asset(self):
         assets = []
-        for x in self.annotation_hrefs:
+        for name, href in self._annotation_files:
             asset = pystac.Asset(
-                href=x,
+                href=href,
                 media_type=pystac.MediaType.XML,
                 title="Product Schema",
                 roles=["metadata"],
             )
             # Account for different names in SAFE and in Azure
-            if len(x.split("/")[-1].split(".")[0].split("-")) > 3:
+            if len(name.split(".")[0].split("-")) > 3:
                 assets.append((
-                    f"product-{x.split('/')[-1].split('-')[1]}"
-                    f"-{x.split('/')[-1].split('-')[3]}",
+                    f"product-{name.split('-')[1]}-{name.split('-')[3]}",
                     asset,
                 ))
             else:
-                assets.append(
-                    (f"product-{x.split('.')[0].split('/')[-1]}", asset))
+                assets.append((f"product-{name.split('.')[0]}", asset))
 
         return assets
 
     def create_calibration_asset(self):
         assets = []
-        for x in self.calibration_hrefs:
+        for name, href in self._calibration_files:
+            if "calibration" not in name:
+                continue
             asset = pystac.Asset(
-                href=x,
+                href=href,
                 media_type=pystac.MediaType.XML,
                 title="Calibration Schema",
                 roles=["metadata"],
             )
             # Account for different names in SAFE and in Azure
-            if len(x.split("/")[-1].split(".")[0].split("-")) > 3:
+            if len(name.split(".")[0].split("-")) > 3:
                 assets.append((
-                    f"calibration-{x.split('/')[-1].split('-')[1]}"
-                    f"-{x.split('/')[-1].split('-')[3]}",
+                    f"calibration-{name.split('-')[2]}-{name.split('-')[4]}",
                     asset,
                 ))
             else:
-                assets.append((x.split(".")[0].split("/")[-1], asset))
+                assets.append((name.split(".")[0], asset))
 
         return assets
 
     def create_noise_asset(self):
         assets = []
-        for x in self.noise_hrefs:
+        for name, href in self._calibration_files:
+            if "noise" not in name:
+                continue
             asset = pystac.Asset(
-                href=x,
+                href=href,
                 media_type=pystac.MediaType.XML,
                 title="Noise Schema",
                 roles=["metadata"],
             )
             # Account for different names in SAFE and in Azure
-            if len(x.split("/")[-1].split(".")[0].split("-")) > 3:
+            if len(name.split(".")[0].split("-")) > 3:
                 assets.append((
-                    f"calibration-{x.split('/')[-1].split('-')[1]}"
-                    f"-{x.split('/')[-1].split('-')[3]}",
+                    f"noise-{name.split('-')[2]}-{name.split('-')[4]}",
                     asset,
                 ))
             else:
-                assets.append((x.split(".")[0].split("/")[-1], asset))
+                assets.append((name.split(".")[0], asset))
 
         return assets
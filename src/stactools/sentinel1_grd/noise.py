@@ -0,0 +1,237 @@
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+from lxml import etree  # type: ignore
+
+from .calibration import (Window, block_windows, interpolation_weights,
+                          parse_numbers)
+from .xml_cache import open_xml
+
+# Rows of the image per block yielded by NoiseVectors.blocks. A block of a
+# full-width IW scene is about 100 MB of float32.
+DEFAULT_BLOCK_ROWS = 1024
+
+
+class NoiseError(Exception):
+    pass
+
+
+# Products before IPF 2.9 only have range vectors, under other names
+_RANGE_VECTORS = etree.XPath("noiseRangeVectorList/noiseRangeVector"
+                             " | noiseVectorList/noiseVector")
+_AZIMUTH_VECTORS = etree.XPath("noiseAzimuthVectorList/noiseAzimuthVector")
+_POLARISATION = etree.XPath("adsHeader/polarisation/text()")
+
+
+def _find_text(element, tags: List[str], href: str) -> str:
+    for tag in tags:
+        text = element.findtext(tag)
+        if text is not None:
+            return text
+    raise NoiseError(f"Noise vector at {href} does not have a {tags[0]}")
+
+
+def _ragged(texts: List[str], dtype) -> Tuple[np.ndarray, np.ndarray]:
+    # Concatenates vectors of different sizes, and returns them with the
+    # offsets of each vector in the result
+    vectors = [parse_numbers([text], dtype) for text in texts]
+    offsets = np.zeros(len(vectors) + 1, dtype=np.int64)
+    np.cumsum([x.size for x in vectors], out=offsets[1:])
+    if not vectors:
+        return np.zeros(0, dtype=dtype), offsets
+    return np.concatenate(vectors), offsets
+
+
+class NoiseVectors:
+    """The thermal noise vectors of one polarisation, as NumPy arrays.
+
+    The range vectors sample the noise at a coarse grid of image lines and
+    pixels, and the azimuth vectors (from IPF 2.9) give a gain along the
+    lines of each block of a swath. Vectors can have different sizes, so
+    the samples of all vectors are concatenated in a single array, and the
+    samples of vector ``i`` are ``offsets[i]:offsets[i + 1]``.
+
+    The noise field is the range noise interpolated bilinearly onto the
+    image, times the azimuth gain. Use :meth:`interpolate` to get it for a
+    window of the image, or :meth:`blocks` to iterate over the whole image
+    in bounded memory. Noise vectors are small and picklable, so blocks can
+    also be interpolated in parallel, one window per worker.
+
+    Attributes:
+        range_line (np.ndarray): The image line of each range vector.
+        range_pixel (np.ndarray): The image pixels of the range vectors.
+        range_lut (np.ndarray): The ``float32`` noise of the range vectors.
+        range_offsets (np.ndarray): The offsets of each range vector in
+            ``range_pixel`` and ``range_lut``.
+        azimuth_swath (List[str]): The swath of each azimuth vector.
+        azimuth_bounds (np.ndarray): The ``(first_line, first_sample,
+            last_line, last_sample)`` of each azimuth vector, inclusive.
+        azimuth_line (np.ndarray): The image lines of the azimuth vectors.
+        azimuth_lut (np.ndarray): The ``float32`` gain of the azimuth
+            vectors.
+        azimuth_offsets (np.ndarray): The offsets of each azimuth vector in
+            ``azimuth_line`` and ``azimuth_lut``.
+        polarisation (Optional[str]): The polarisation, e.g. ``VV``.
+    """
+    def __init__(self,
+                 range_line: np.ndarray,
+                 range_pixel: np.ndarray,
+                 range_lut: np.ndarray,
+                 range_offsets: np.ndarray,
+                 azimuth_swath: Optional[List[str]] = None,
+                 azimuth_bounds: Optional[np.ndarray] = None,
+                 azimuth_line: Optional[np.ndarray] = None,
+                 azimuth_lut: Optional[np.ndarray] = None,
+                 azimuth_offsets: Optional[np.ndarray] = None,
+                 polarisation: Optional[str] = None) -> None:
+        self.range_line = range_line
+        self.range_pixel = range_pixel
+        self.range_lut = range_lut
+        self.range_offsets = range_offsets
+        self.azimuth_swath = azimuth_swath or []
+        self.azimuth_bounds = (np.zeros(
+            (0,
+             4), dtype=np.int64) if azimuth_bounds is None else azimuth_bounds)
+        self.azimuth_line = (np.zeros(0, dtype=np.int64)
+                             if azimuth_line is None else azimuth_line)
+        self.azimuth_lut = (np.zeros(0, dtype=np.float32)
+                            if azimuth_lut is None else azimuth_lut)
+        self.azimuth_offsets = (np.zeros(1, dtype=np.int64) if
+                                azimuth_offsets is None else azimuth_offsets)
+        self.polarisation = polarisation
+
+    @classmethod
+    def from_xml(cls, href: str) -> "NoiseVectors":
+        """Parses the noise vectors of a noise XML file.
+
+        Args:
+            href (str): The HREF to the ``noise-*.xml`` file.
+
+        Returns:
+            NoiseVectors: The noise vectors.
+        """
+        with open_xml(href) as f:
+            root = etree.parse(f).getroot()
+
+        range_vectors = _RANGE_VECTORS(root)
+        if not range_vectors:
+            raise NoiseError(f"Noise at {href} does not have range vectors")
+        range_line = parse_numbers(
+            [_find_text(x, ["line"], href) for x in range_vectors], np.int64)
+        range_pixel, range_offsets = _ragged(
+            [_find_text(x, ["pixel"], href) for x in range_vectors], np.int64)
+        range_lut, lut_offsets = _ragged([
+            _find_text(x, ["noiseRangeLut", "noiseLut"], href)
+            for x in range_vectors
+        ], np.float32)
+        if not np.array_equal(range_offsets, lut_offsets):
+            raise NoiseError(
+                f"Noise range vectors at {href} have different numbers of "
+                "pixels and values")
+
+        azimuth_vectors = _AZIMUTH_VECTORS(root)
+        azimuth_bounds = np.array([[
+            int(_find_text(x, [tag], href)) for tag in [
+                "firstAzimuthLine", "firstRangeSample", "lastAzimuthLine",
+                "lastRangeSample"
+            ]
+        ] for x in azimuth_vectors],
+                                  dtype=np.int64).reshape(-1, 4)
+        azimuth_line, azimuth_offsets = _ragged(
+            [_find_text(x, ["line"], href) for x in azimuth_vectors], np.int64)
+        azimuth_lut, lut_offsets = _ragged([
+            _find_text(x, ["noiseAzimuthLut"], href) for x in azimuth_vectors
+        ], np.float32)
+        if not np.array_equal(azimuth_offsets, lut_offsets):
+            raise NoiseError(
+                f"Noise azimuth vectors at {href} have different numbers of "
+                "lines and values")
+
+        polarisation = _POLARISATION(root)
+        return cls(range_line, range_pixel, range_lut, range_offsets,
+                   [x.findtext("swath") or "" for x in azimuth_vectors],
+                   azimuth_bounds, azimuth_line, azimuth_lut, azimuth_offsets,
+                   str(polarisation[0]) if polarisation else None)
+
+    def _range_vector(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, stop = self.range_offsets[i], self.range_offsets[i + 1]
+        return self.range_pixel[start:stop], self.range_lut[start:stop]
+
+    def _azimuth_vector(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, stop = self.azimuth_offsets[i], self.azimuth_offsets[i + 1]
+        return self.azimuth_line[start:stop], self.azimuth_lut[start:stop]
+
+    def interpolate(self, window: Window) -> np.ndarray:
+        """Interpolates the noise field onto every pixel of a window.
+
+        Only the vectors around the window are read, and the memory used is
+        about twice the size of the result.
+
+        Args:
+            window (Window): The image window, as
+                ``((row_start, row_stop), (col_start, col_stop))`` with the
+                stops excluded, like rasterio windows.
+
+        Returns:
+            np.ndarray: The ``float32`` noise, of the shape of the window.
+        """
+        (row_start, row_stop), (col_start, col_stop) = window
+        rows = np.arange(row_start, row_stop)
+        cols = np.arange(col_start, col_stop)
+
+        # Range noise, interpolated along the pixels of the vectors around
+        # the window first
+        below, above, weight = interpolation_weights(rows, self.range_line)
+        vectors = np.unique(np.concatenate([below, above]))
+        along_pixels = np.stack([
+            np.interp(cols, *self._range_vector(v)).astype(np.float32)
+            for v in vectors
+        ])
+        position = np.searchsorted(vectors, np.arange(self.range_line.size))
+        weight = weight[:, np.newaxis]
+        field = along_pixels[position[below]]
+        field *= 1 - weight
+        field += weight * along_pixels[position[above]]
+
+        # Azimuth gain, on the part of each block inside the window
+        for i, (first_line, first_sample, last_line,
+                last_sample) in enumerate(self.azimuth_bounds):
+            block_rows = slice(
+                max(first_line, row_start) - row_start,
+                min(last_line + 1, row_stop) - row_start)
+            block_cols = slice(
+                max(first_sample, col_start) - col_start,
+                min(last_sample + 1, col_stop) - col_start)
+            if (block_rows.start >= block_rows.stop
+                    or block_cols.start >= block_cols.stop):
+                continue
+            gain = np.interp(rows[block_rows],
+                             *self._azimuth_vector(i)).astype(np.float32)
+            field[block_rows, block_cols] *= gain[:, np.newaxis]
+
+        return field
+
+    def blocks(
+        self,
+        shape: Tuple[int, int],
+        block_rows: int = DEFAULT_BLOCK_ROWS,
+        block_cols: Optional[int] = None
+    ) -> Iterator[Tuple[Window, np.ndarray]]:
+        """Yields the noise field of the image block by block.
+
+        Only one block is held in memory at a time.
+
+        Args:
+            shape (Tuple[int, int]): The number of lines and samples of the
+                image, e.g. from
+                :class:`~stactools.sentinel1_grd.annotation.AnnotationHeader`.
+            block_rows (int): The number of rows of each block.
+            block_cols (Optional[int]): The number of columns of each
+                block. Defaults to the width of the image.
+
+        Returns:
+            Iterator[Tuple[Window, np.ndarray]]: The window of each block
+            and its noise.
+        """
+        for window in block_windows(shape, block_rows, block_cols):
+            yield window, self.interpolate(window)
@@ -0,0 +1,250 @@
+from datetime import datetime
+from typing import (Any, Dict, Iterable, Iterator, List, NamedTuple, Optional,
+                    Union)
+
+import numpy as np
+import pystac
+from pystac.utils import str_to_datetime
+from shapely.geometry import shape  # type: ignore
+from shapely.strtree import STRtree  # type: ignore
+
+from .inventory import NAME_LENGTH
+from .product_metadata import ProductRecord
+
+# Kinds of overlaps, from the most to the least redundant
+REPROCESSING = "reprocessing"
+DUPLICATE = "duplicate"
+OVERLAP = "overlap"
+
+# Seconds by which time intervals may miss each other and still be
+# considered overlapping. Consecutive slices of a datatake share their
+# boundary time.
+DEFAULT_TIME_TOLERANCE = 1.0
+
+# Footprint and time interval intersection over union above which two
+# scenes of different names are duplicates
+DEFAULT_DUPLICATE_IOU = 0.9
+DEFAULT_DUPLICATE_TIME_OVERLAP = 0.9
+
+
+class Footprint(NamedTuple):
+    """The footprint and acquisition interval of a scene.
+
+    See :func:`footprint_from_item` and :func:`footprint_from_record`.
+    """
+    id: str
+    geometry: Any
+    start_datetime: datetime
+    end_datetime: datetime
+    datatake_id: Optional[str]
+
+    @property
+    def scene_key(self) -> str:
+        """The id without the unique identifier of the product, which is
+        the same for all reprocessings of a scene."""
+        if len(self.id) == NAME_LENGTH:
+            return self.id[:-5]
+        return self.id
+
+
+class Overlap(NamedTuple):
+    """Two scenes whose footprints and acquisition intervals overlap.
+
+    ``kind`` is :data:`REPROCESSING` if the scenes only differ by their
+    unique identifier, :data:`DUPLICATE` if they overlap at least as much
+    as the duplicate thresholds of the index, and :data:`OVERLAP` otherwise,
+    as neighbouring slices do.
+    """
+    first: str
+    second: str
+    kind: str
+    iou: float
+    time_overlap: float
+
+
+def footprint_from_item(item: Union[pystac.Item, Dict[str, Any]]) -> Footprint:
+    """Returns the footprint of an item, or of its JSON object."""
+    if isinstance(item, pystac.Item):
+        item = item.to_dict(include_self_link=False)
+    properties = item["properties"]
+    start = properties.get("start_datetime") or properties["datetime"]
+    end = properties.get("end_datetime") or properties["datetime"]
+    return Footprint(item["id"], shape(item["geometry"]),
+                     str_to_datetime(start), str_to_datetime(end),
+                     properties.get("s1:datatake_id"))
+
+
+def footprint_from_record(record: ProductRecord) -> Footprint:
+    """Returns the footprint of a
+    :class:`~stactools.sentinel1_grd.product_metadata.ProductRecord`."""
+    return Footprint(record.scene_id, shape(record.geometry),
+                     record.start_datetime, record.end_datetime,
+                     record.datatake_id)
+
+
+def _intersection_over_union(first: float, second: float,
+                             intersection: float) -> float:
+    union = first + second - intersection
+    return intersection / union if union > 0 else 1.0
+
+
+class FootprintIndex:
+    """A spatial and temporal index of scene footprints.
+
+    Footprints are sorted by start time, so the scenes whose acquisition
+    overlaps that of a scene are found with a binary search. Their bounding
+    boxes are then compared at once, and only the footprints whose boxes
+    intersect are intersected. Finding all overlapping pairs takes
+    O(n log n) time plus the number of pairs, instead of comparing every
+    pair. Areas are queried through a shapely STRtree.
+
+    Args:
+        footprints (Iterable[Footprint]): The footprints of the scenes.
+        time_tolerance (float): Seconds by which acquisition intervals may
+            miss each other and still be considered overlapping.
+        duplicate_iou (float): The intersection over union of the
+            footprints above which two scenes are duplicates.
+        duplicate_time_overlap (float): The intersection over union of the
+            acquisition intervals above which two scenes are duplicates.
+    """
+    def __init__(
+        self,
+        footprints: Iterable[Footprint],
+        time_tolerance: float = DEFAULT_TIME_TOLERANCE,
+        duplicate_iou: float = DEFAULT_DUPLICATE_IOU,
+        duplicate_time_overlap: float = DEFAULT_DUPLICATE_TIME_OVERLAP
+    ) -> None:
+        self.footprints = sorted(footprints,
+                                 key=lambda x: (x.start_datetime, x.id))
+        self.time_tolerance = time_tolerance
+        self.duplicate_iou = duplicate_iou
+        self.duplicate_time_overlap = duplicate_time_overlap
+
+        self._starts = np.array(
+            [x.start_datetime.timestamp() for x in self.footprints],
+            dtype=np.float64)
+        self._ends = np.array(
+            [x.end_datetime.timestamp() for x in self.footprints],
+            dtype=np.float64)
+        self._bounds = np.array([x.geometry.bounds for x in self.footprints],
+                                dtype=np.float64).reshape(-1, 4)
+        self._areas = np.array([x.geometry.area for x in self.footprints],
+                               dtype=np.float64)
+        self._tree: Optional[STRtree] = None
+
+    def __len__(self) -> int:
+        return len(self.footprints)
+
+    @property
+    def tree(self) -> STRtree:
+        """The STRtree of the footprints, built when first used."""
+        if self._tree is None:
+            self._tree = STRtree([x.geometry for x in self.footprints])
+        return self._tree
+
+    def _query_tree(self, geometry: Any) -> List[int]:
+        if hasattr(self.tree, "query_items"):
+            # shapely < 2 returns geometries from query
+            return list(self.tree.query_items(geometry))
+        return list(self.tree.query(geometry))
+
+    def query(self,
+              geometry: Any,
+              start: Optional[datetime] = None,
+              end: Optional[datetime] = None) -> List[Footprint]:
+        """Lists the footprints that intersect an area and time range.
+
+        Args:
+            geometry (shapely.geometry.base.BaseGeometry): The area.
+            start (Optional[datetime]): If given, only scenes acquired at or
+                after this time, within the time tolerance.
+            end (Optional[datetime]): If given, only scenes acquired at or
+                before this time, within the time tolerance.
+
+        Returns:
+            List[Footprint]: The footprints, by start time.
+        """
+        result = []
+        for index in sorted(self._query_tree(geometry)):
+            if start is not None and (self._ends[index] + self.time_tolerance <
+                                      start.timestamp()):
+                continue
+            if end is not None and (self._starts[index] - self.time_tolerance >
+                                    end.timestamp()):
+                continue
+            if self.footprints[index].geometry.intersects(geometry):
+                result.append(self.footprints[index])
+        return result
+
+    def overlaps(self, min_iou: float = 0.0) -> Iterator[Overlap]:
+        """Yields every pair of scenes that overlap in space and time.
+
+        Args:
+            min_iou (float): Only pairs whose footprints have at least this
+                intersection over union.
+
+        Returns:
+            Iterator[Overlap]: The pairs, by start time of their first
+            scene.
+        """
+        # The scenes starting after scene i and before it ends are the
+        # only ones whose acquisition can overlap it
+        stops = np.searchsorted(self._starts,
+                                self._ends + self.time_tolerance,
+                                side="right")
+        for i, first in enumerate(self.footprints):
+            candidates = np.arange(i + 1, stops[i])
+            if len(candidates) == 0:
+                continue
+            bounds = self._bounds[candidates]
+            x_min, y_min, x_max, y_max = self._bounds[i]
+            candidates = candidates[(bounds[:, 0] <= x_max)
+                                    & (bounds[:, 2] >= x_min)
+                                    & (bounds[:, 1] <= y_max)
+                                    & (bounds[:, 3] >= y_min)]
+            for j in candidates.tolist():
+                second = self.footprints[j]
+                if not first.geometry.intersects(second.geometry):
+                    continue
+                iou = _intersection_over_union(
+                    self._areas[i], self._areas[j],
+                    first.geometry.intersection(second.geometry).area)
+                if iou < min_iou:
+                    continue
+                time_overlap = _intersection_over_union(
+                    self._ends[i] - self._starts[i],
+                    self._ends[j] - self._starts[j],
+                    max(
+                        0.0,
+                        min(self._ends[i], self._ends[j]) -
+                        max(self._starts[i], self._starts[j])))
+                if first.scene_key == second.scene_key:
+                    kind = REPROCESSING
+                elif (iou >= self.duplicate_iou
+                      and time_overlap >= self.duplicate_time_overlap):
+                    kind = DUPLICATE
+                else:
+                    kind = OVERLAP
+                yield Overlap(first.id, second.id, kind, float(iou),
+                              float(time_overlap))
+
+    def duplicates(self) -> Iterator[Overlap]:
+        """Yields the pairs of scenes that are reprocessings or duplicates
+        of each other, see :meth:`overlaps`."""
+        for overlap in self.overlaps():
+            if overlap.kind != OVERLAP:
+                yield overlap
+
+    def datatakes(self) -> Dict[str, List[str]]:
+        """Groups the scenes by datatake.
+
+        Returns:
+            Dict[str, List[str]]: The ids of the scenes of each datatake, by
+            start time. Scenes without a datatake id are left out.
+        """
+        groups: Dict[str, List[str]] = {}
+        for footprint in self.footprints:
+            if footprint.datatake_id is not None:
+                groups.setdefault(footprint.datatake_id,
+                                  []).append(footprint.id)
+        return groups
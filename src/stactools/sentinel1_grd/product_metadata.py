@@ -1,49 +1,140 @@
 from datetime import datetime
 import os
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, NamedTuple, Optional, List, Tuple
 
+import numpy as np
 from shapely.geometry import mapping, Polygon  # type: ignore
 from pystac.utils import str_to_datetime
 
-from stactools.core.io.xml import XmlElement
+from .manifest import SafeManifest
 
 
 class ProductMetadataError(Exception):
     pass
 
 
+def _mid_datetime(start_datetime: datetime,
+                  end_datetime: datetime) -> datetime:
+    # Midway between start and end, without a timezone
+    start_time = start_datetime.replace(tzinfo=None)
+    end_time = end_datetime.replace(tzinfo=None)
+
+    return start_time + (end_time - start_time) / 2
+
+
+def _metadata_dict(start_datetime: datetime, end_datetime: datetime,
+                   instrument_configuration_id: Optional[str],
+                   datatake_id: Optional[str]) -> Dict[str, Any]:
+    result = {
+        "start_datetime": str(start_datetime),
+        "end_datetime": str(end_datetime),
+        "s1:instrument_configuration_ID": instrument_configuration_id,
+        "s1:datatake_id": datatake_id,
+    }
+
+    return {k: v for k, v in result.items() if v is not None}
+
+
+class ProductRecord(NamedTuple):
+    """The metadata of a Sentinel-1 GRD product, extracted eagerly.
+
+    Unlike :class:`ProductMetadata`, a record does not hold on to the
+    parsed manifest: it is a small, immutable tuple of plain values, cheap to
+    keep in memory and to send between processes. It has the properties of
+    :class:`ProductMetadata` that items are built from, so it can be used in
+    its place. See :meth:`ProductMetadata.to_record` and
+    :func:`read_product_record`.
+    """
+    href: str
+    product_id: str
+    start_datetime: datetime
+    end_datetime: datetime
+    platform: str
+    cycle_number: Optional[str]
+    absolute_orbit: Optional[int]
+    relative_orbit: Optional[int]
+    orbit_state: Optional[str]
+    platform_international_designator: Optional[str]
+    instrument_mode: Optional[str]
+    product_type: Optional[str]
+    polarisations: Tuple[str, ...]
+    instrument_configuration_id: Optional[str]
+    datatake_id: Optional[str]
+    bbox: Tuple[float, ...]
+    # The type and nested coordinate tuples of the footprint GeoJSON
+    geometry_type: str
+    coordinates: Any
+    image_paths: Tuple[str, ...]
+
+    @property
+    def scene_id(self) -> str:
+        """The STAC Item id: the product id without the .SAFE extension."""
+        return self.product_id.split(".")[0]
+
+    @property
+    def geometry(self) -> Dict[str, Any]:
+        """The footprint, as GeoJSON."""
+        return {"type": self.geometry_type, "coordinates": self.coordinates}
+
+    @property
+    def get_datetime(self) -> datetime:
+        return _mid_datetime(self.start_datetime, self.end_datetime)
+
+    @property
+    def metadata_dict(self) -> Dict[str, Any]:
+        return _metadata_dict(self.start_datetime, self.end_datetime,
+                              self.instrument_configuration_id,
+                              self.datatake_id)
+
+
+def _optional_int(text: Optional[str]) -> Optional[int]:
+    return int(text) if text is not None else None
+
+
 class ProductMetadata:
+    """Metadata of a Sentinel-1 GRD product, read from its manifest.
+
+    Args:
+        href (str): The HREF to the ``manifest.safe``.
+        manifest (Optional[SafeManifest]): The parsed manifest, if it has
+            already been read.
+        footprint (Optional[Polygon]): The footprint of the product. If not
+            given, the four corner footprint of the manifest is used.
+    """
     def __init__(
         self,
         href,
+        manifest: Optional[SafeManifest] = None,
+        footprint: Optional[Polygon] = None,
     ) -> None:
         self.href = href
-        self._root = XmlElement.from_file(href)
-
-        def _get_geometries():
-            # Find the footprint descriptor
-            footprint_text = self._root.findall(".//gml:coordinates")
-            if footprint_text is None:
-                ProductMetadataError(
-                    f"Cannot parse footprint from product metadata at {self.href}"
-                )
-            # Convert to values
-            footprint_value = [
-                float(x)
-                for x in footprint_text[0].text.replace(" ", ",").split(",")
-            ]
-
-            footprint_points = [
-                p[::-1] for p in list(zip(*[iter(footprint_value)] * 2))
-            ]
-
-            footprint_polygon = Polygon(footprint_points)
+        if manifest is None:
+            manifest = SafeManifest(os.path.dirname(href))
+        self._manifest = manifest
+
+        def _get_geometries(footprint_polygon):
+            if footprint_polygon is None:
+                # Find the footprint descriptor
+                footprint_text = self._manifest.find_text("footprint")
+                if footprint_text is None:
+                    raise ProductMetadataError(
+                        "Cannot parse footprint from product metadata at "
+                        f"{self.href}")
+                # "lat,lon lat,lon ..." to an array of (lon, lat) points
+                footprint_points = np.array(
+                    footprint_text.replace(" ", ",").split(","),
+                    dtype=np.float64).reshape(-1, 2)[:, ::-1]
+
+                footprint_polygon = Polygon(footprint_points)
             geometry = mapping(footprint_polygon)
             bbox = footprint_polygon.bounds
 
             return (bbox, geometry)
 
-        self.bbox, self.geometry = _get_geometries()
+        self.bbox, self.geometry = _get_geometries(footprint)
+
+        self._start_datetime: Optional[datetime] = None
+        self._end_datetime: Optional[datetime] = None
 
     @property
     def scene_id(self) -> str:
@@ -62,84 +153,123 @@ class ProductMetadata:
     @property
     def product_id(self) -> str:
         # Parse the name from href as it doesn't exist in xml files
-        href = self.href
-        result = href.split("/")[-2]
-        if result is None:
-            raise ValueError(
-                "Cannot determine product ID using product metadata "
-                f"at {self.href}")
-        else:
-            return result
+        return self._manifest.granule_name
 
     @property
     def get_datetime(self) -> datetime:
-        start_time = self._root.findall(".//safe:startTime")[0].text
-        end_time = self._root.findall(".//safe:stopTime")[0].text
-
-        central_time = (
-            datetime.strptime(start_time, "%Y-%m-%dT%H:%M:%S.%f") +
-            (datetime.strptime(end_time, "%Y-%m-%dT%H:%M:%S.%f") -
-             datetime.strptime(start_time, "%Y-%m-%dT%H:%M:%S.%f")) / 2)
-
-        if central_time is None:
-            raise ValueError(
-                "Cannot determine product start time using product metadata "
-                f"at {self.href}")
-        else:
-            return str_to_datetime(str(central_time))
+        return _mid_datetime(self.start_datetime, self.end_datetime)
 
     @property
     def start_datetime(self) -> datetime:
-        time = self._root.findall(".//safe:startTime")
+        if self._start_datetime is None:
+            time = self._manifest.find_text("start_time")
+            if time is None:
+                raise ValueError(
+                    "Cannot determine product start time using product metadata "
+                    f"at {self.href}")
+            self._start_datetime = str_to_datetime(f"{time}Z")
 
-        if time is None:
-            raise ValueError(
-                "Cannot determine product start time using product metadata "
-                f"at {self.href}")
-        else:
-            return str_to_datetime(f"{time[0].text}Z")
+        return self._start_datetime
 
     @property
     def end_datetime(self) -> datetime:
-        time = self._root.findall(".//safe:stopTime")
+        if self._end_datetime is None:
+            time = self._manifest.find_text("stop_time")
+            if time is None:
+                raise ValueError(
+                    "Cannot determine product end time using product metadata "
+                    f"at {self.href}")
+            self._end_datetime = str_to_datetime(f"{time}Z")
 
-        if time is None:
-            raise ValueError(
-                "Cannot determine product start time using product metadata "
-                f"at {self.href}")
-        else:
-            return str_to_datetime(f"{time[0].text}Z")
+        return self._end_datetime
 
     @property
-    def platform(self) -> Optional[str]:
+    def platform(self) -> str:
 
-        family_name = self._root.findall(".//safe:familyName")[0].text
-        platform_name = self._root.findall(".//safe:number")[0].text
+        family_name = self._manifest.find_text_or_throw("family_name")
+        platform_name = self._manifest.find_text_or_throw("number")
 
         return family_name + platform_name
 
     @property
     def cycle_number(self) -> Optional[str]:
 
-        return self._root.findall(".//safe:cycleNumber")[0].text
+        return self._manifest.find_text("cycle_number")
 
     @property
     def image_paths(self) -> List[str]:
-        head_folder = os.path.dirname(self.href)
-        measurements = os.path.join(head_folder, "measurement")
-        return [x for x in os.listdir(measurements) if x.endswith("tiff")]
+        return [
+            x for x in self._manifest.listdir("measurement")
+            if x.endswith("tiff")
+        ]
 
     @property
     def metadata_dict(self) -> Dict[str, Any]:
-        result = {
-            "start_datetime":
-            str(self.start_datetime),
-            "end_datetime":
-            str(self.end_datetime),
-            "s1:instrument_configuration_ID":
-            self._root.findall(".//s1sarl1:instrumentConfigurationID")[0].text,
-            "s1:datatake_id":
-            self._root.findall(".//s1sarl1:missionDataTakeID")[0].text,
-        }
-
-        return {k: v for k, v in result.items() if v is not None}
+        return _metadata_dict(
+            self.start_datetime, self.end_datetime,
+            self._manifest.find_text("instrument_configuration_id"),
+            self._manifest.find_text("mission_datatake_id"))
+
+    def to_record(self) -> ProductRecord:
+        """Extracts every field at once into a :class:`ProductRecord`.
+
+        The record does not reference the manifest, so the parsed manifest
+        is freed once this object and the
+        :class:`~stactools.sentinel1_grd.manifest.SafeManifest` are no
+        longer used.
+
+        Returns:
+            ProductRecord: The metadata of the product.
+        """
+        manifest = self._manifest
+        return ProductRecord(
+            href=self.href,
+            product_id=self.product_id,
+            start_datetime=self.start_datetime,
+            end_datetime=self.end_datetime,
+            platform=self.platform,
+            cycle_number=self.cycle_number,
+            absolute_orbit=_optional_int(manifest.find_text("orbit_number")),
+            relative_orbit=_optional_int(
+                manifest.find_text("relative_orbit_number")),
+            orbit_state=manifest.find_text("pass"),
+            platform_international_designator=manifest.find_text(
+                "nssdc_identifier"),
+            instrument_mode=manifest.find_text("instrument_mode"),
+            product_type=manifest.find_text("product_type"),
+            polarisations=tuple(manifest.fields.get("polarisations", [])),
+            instrument_configuration_id=manifest.find_text(
+                "instrument_configuration_id"),
+            datatake_id=manifest.find_text("mission_datatake_id"),
+            bbox=tuple(self.bbox),
+            geometry_type=self.geometry["type"],
+            coordinates=_freeze(self.geometry["coordinates"]),
+            image_paths=tuple(self.image_paths),
+        )
+
+
+def _freeze(coordinates: Any) -> Any:
+    # Nested lists of coordinates to nested tuples
+    if isinstance(coordinates, (list, tuple)):
+        return tuple(_freeze(x) for x in coordinates)
+    return coordinates
+
+
+def read_product_record(granule_href: str,
+                        footprint: Optional[Polygon] = None) -> ProductRecord:
+    """Reads the metadata of a product into a :class:`ProductRecord`.
+
+    Only the manifest of the granule is read, and it is freed before this
+    returns.
+
+    Args:
+        granule_href (str): The HREF to the granule: a SAFE directory or a
+            zipped SAFE archive.
+        footprint (Optional[Polygon]): The footprint of the product. If not
+            given, the four corner footprint of the manifest is used.
+
+    Returns:
+        ProductRecord: The metadata of the product.
+    """
+    manifest = SafeManifest(granule_href)
+    return ProductMetadata(manifest.href, manifest, footprint).to_record()
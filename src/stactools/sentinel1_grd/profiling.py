@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import fsspec  # type: ignore
+
+# The phases of item creation, in the order they run
+PHASES = [
+    "manifest_parse",
+    "listing",
+    "annotation_parse",
+    "extension_fill",
+    "asset_building",
+    "cog_conversion",
+    "thumbnail_rendering",
+    "serialization",
+]
+
+
+class _CountingFile:
+    """Wraps a binary file object and reports the bytes read from it."""
+    def __init__(self, f: Any, profile: "Profile", href: str) -> None:
+        self._f = f
+        self._profile = profile
+        self._href = href
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        self._profile.record_read(self._href, len(data))
+        return data
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._f, name)
+
+
+class Profile:
+    """Wall time and I/O accounting of a STAC Item creation.
+
+    Pass a profile to :func:`~stactools.sentinel1_grd.stac.create_item` to
+    record the wall time spent in each phase (see :data:`PHASES`) and the
+    number of opens and bytes read for every file of the granule. Phases
+    that run concurrently, such as the manifest and the annotation reads,
+    overlap in wall time, so their sum can exceed :attr:`total`.
+
+    A profile is safe to update from several threads.
+
+    Args:
+        granule_href (Optional[str]): The HREF to the granule, included in
+            the JSON output.
+    """
+    def __init__(self, granule_href: Optional[str] = None) -> None:
+        self.granule_href = granule_href
+        self.phases: Dict[str, float] = {}
+        self.files: Dict[str, Dict[str, int]] = {}
+        self._start = time.perf_counter()
+        self._end: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> float:
+        """The wall time from the creation of the profile until it was
+        stopped, or until now."""
+        end = time.perf_counter() if self._end is None else self._end
+        return end - self._start
+
+    def stop(self) -> None:
+        """Freezes :attr:`total`."""
+        self._end = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Adds the wall time of the block to the phase ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def _file(self, href: str) -> Dict[str, int]:
+        return self.files.setdefault(href, {"opens": 0, "bytes_read": 0})
+
+    def record_open(self, href: str) -> None:
+        with self._lock:
+            self._file(href)["opens"] += 1
+
+    def record_read(self, href: str, size: int) -> None:
+        with self._lock:
+            self._file(href)["bytes_read"] += size
+
+    @contextmanager
+    def open(self, href: str, **kwargs: Any) -> Iterator[_CountingFile]:
+        """Opens a file for binary reading through fsspec and accounts for
+        the open and every byte read from it.
+
+        Keyword arguments, such as ``block_size``, are passed to
+        :func:`fsspec.open`.
+        """
+        self.record_open(href)
+        with fsspec.open(href, "rb", **kwargs) as f:
+            yield _CountingFile(f, self, href)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "granule_href": self.granule_href,
+                "total": self.total,
+                "phases": dict(self.phases),
+                "files": {k: dict(v)
+                          for k, v in self.files.items()},
+                "opens": sum(x["opens"] for x in self.files.values()),
+                "bytes_read":
+                sum(x["bytes_read"] for x in self.files.values()),
+            }
+
+    def to_json(self, **kwargs: Any) -> str:
+        """Returns the profile as JSON. Keyword arguments are passed to
+        :func:`json.dumps`."""
+        return json.dumps(self.to_dict(), **kwargs)
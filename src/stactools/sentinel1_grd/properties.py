@@ -1,89 +1,137 @@
-from stactools.core.io.xml import XmlElement
+from pystac.extensions.file import FileExtension
 from pystac.extensions.sar import FrequencyBand, Polarization
 from pystac.extensions.sat import OrbitState
 
+# Multihash function codes of the checksums a manifest can list, see
+# https://github.com/multiformats/multicodec/blob/master/table.csv
+MULTIHASH_CODES = {"MD5": 0xd5, "SHA1": 0x11, "SHA256": 0x12, "SHA512": 0x13}
 
-def fill_sar_properties(sar_ext, href):
+
+def multihash(checksum_name, checksum):
+    """Encodes a hexadecimal checksum as a hexadecimal multihash, as used by
+    ``file:checksum``.
+
+    Args:
+        checksum_name (str): The checksum algorithm, e.g. ``MD5``.
+        checksum (str): The hexadecimal checksum.
+
+    Returns:
+        Optional[str]: The multihash, or None if the algorithm has no
+        multihash code.
+    """
+    code = MULTIHASH_CODES.get(checksum_name.upper().replace("-", ""))
+    if code is None:
+        return None
+    return f"{code:02x}{len(checksum) // 2:02x}{checksum.lower()}"
+
+
+def fill_sar_properties(sar_ext, manifest, annotation=None):
     """Fills the properties for SAR.
 
     Based on the sar Extension.py
 
     Args:
         input_ext (pystac.extensions.sar.SarExtension): The extension to be populated.
-        href (str): The HREF to the scene, this is expected to be an XML file.
+        manifest (SafeManifest): The parsed manifest of the scene.
+        annotation (AnnotationHeader): The header of a product annotation
+            of the scene, used for the pixel spacing. If not given, the
+            nominal 10m pixel spacing is used.
 
     Returns:
         pystac.Asset: An asset with the SAR relevant properties.
     """
-    # Read meta file
-    root = XmlElement.from_file(href)
-
     # Fixed properties
     sar_ext.frequency_band = FrequencyBand("C")
     sar_ext.center_frequency = 5.405
     sar_ext.looks_range = 5
     sar_ext.looks_azimuth = 1
-    sar_ext.pixel_spacing_range = 10
+
+    if annotation is not None:
+        sar_ext.pixel_spacing_range = annotation.range_pixel_spacing
+        sar_ext.pixel_spacing_azimuth = annotation.azimuth_pixel_spacing
+    else:
+        sar_ext.pixel_spacing_range = 10
 
     # Read properties
-    sar_ext.instrument_mode = root.findall(".//s1sarl1:mode")[0].text
+    sar_ext.instrument_mode = manifest.find_text_or_throw("instrument_mode")
     sar_ext.polarizations = [
-        Polarization(x.text)
-        for x in root.findall(".//s1sarl1:transmitterReceiverPolarisation")
+        Polarization(x) for x in manifest.fields.get("polarisations", [])
     ]
-    sar_ext.product_type = root.findall(".//s1sarl1:productType")[0].text
+    sar_ext.product_type = manifest.find_text_or_throw("product_type")
 
 
-def fill_sat_properties(sat_ext, href):
+def fill_sat_properties(sat_ext, manifest):
     """Fills the properties for SAR.
 
     Based on the sar Extension.py
 
     Args:
         input_ext (pystac.extensions.sar.SarExtension): The extension to be populated.
-        href (str): The HREF to the scene, this is expected to be an XML file.
+        manifest (SafeManifest): The parsed manifest of the scene.
 
     Returns:
         pystac.Asset: An asset with the SAR relevant properties.
     """
-    # Read meta file
-    root = XmlElement.from_file(href)
-
-    sat_ext.platform_international_designator = root.findall(
-        ".//safe:nssdcIdentifier")[0].text
+    sat_ext.platform_international_designator = manifest.find_text(
+        "nssdc_identifier")
 
-    orbit_state = root.findall(".//s1:pass")[0].text
+    orbit_state = manifest.find_text_or_throw("pass")
     sat_ext.orbit_state = OrbitState(orbit_state.lower())
 
-    sat_ext.absolute_orbit = int(root.findall(".//safe:orbitNumber")[0].text)
+    sat_ext.absolute_orbit = int(manifest.find_text_or_throw("orbit_number"))
 
     sat_ext.relative_orbit = int(
-        root.findall(".//safe:relativeOrbitNumber")[0].text)
+        manifest.find_text_or_throw("relative_orbit_number"))
 
 
-def fill_proj_properties(proj_ext, meta_links, product_meta):
+def fill_proj_properties(proj_ext, product_meta, annotation):
     """Fills the properties for SAR.
 
     Based on the sar Extension.py
 
     Args:
         input_ext (pystac.extensions.sar.SarExtension): The extension to be populated.
-        href (str): The HREF to the scene, this is expected to be an XML file.
+        product_meta (ProductMetadata): The product metadata of the scene.
+        annotation (AnnotationHeader): The header of a product annotation
+            of the scene.
 
     Returns:
         pystac.Asset: An asset with the SAR relevant properties.
     """
-    # Read meta file
-    links = meta_links.create_product_asset()
-    root = XmlElement.from_file(links[0][1].href)
-
     proj_ext.epsg = 4326
 
     proj_ext.geometry = product_meta.geometry
 
     proj_ext.bbox = product_meta.bbox
 
-    x_size = int(root.findall(".//numberOfSamples")[0].text)
-    y_size = int(root.findall(".//numberOfLines")[0].text)
+    # Rows then columns, like the proj:shape of the measurement assets
+    proj_ext.shape = [annotation.number_of_lines, annotation.number_of_samples]
+
 
-    proj_ext.shape = [x_size, y_size]
+def fill_file_properties(item, manifest):
+    """Fills the file properties of the assets of an item.
+
+    The size and checksum of every file of the scene are listed in the
+    ``dataObjectSection`` of the manifest, so no file is opened or stat'ed.
+    Assets are matched to the files by HREF, and assets of files the
+    manifest does not list are left as they are.
+
+    Args:
+        item (pystac.Item): The item, with its assets.
+        manifest (SafeManifest): The parsed manifest of the scene.
+    """
+    data_objects = {x.href: x for x in manifest.data_objects.values()}
+    data_objects[manifest.href] = manifest.data_object
+    for asset in item.assets.values():
+        data_object = data_objects.get(asset.href)
+        if data_object is None:
+            continue
+        file_ext = FileExtension.ext(asset, add_if_missing=True)
+        if data_object.size is not None:
+            file_ext.size = data_object.size
+        if (data_object.checksum is not None
+                and data_object.checksum_name is not None):
+            checksum = multihash(data_object.checksum_name,
+                                 data_object.checksum)
+            if checksum is not None:
+                file_ext.checksum = checksum
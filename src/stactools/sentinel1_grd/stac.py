@@ -1,14 +1,23 @@
+import asyncio
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from typing import Any, Callable, ContextManager, Optional, TypeVar
 
 import pystac
+from pystac.stac_io import DefaultStacIO
 from pystac.extensions.eo import EOExtension
 from pystac.extensions.sar import SarExtension
 from pystac.extensions.sat import SatExtension
 from pystac.extensions.projection import ProjectionExtension
 
+from .annotation import AnnotationError, AnnotationHeader
+from .manifest import SafeManifest
 from .metadata_links import MetadataLinks
 from .product_metadata import ProductMetadata
+from .profiling import Profile
 
 from .constants import (
     SENTINEL_PROVIDER,
@@ -20,97 +29,297 @@ from .properties import (
     fill_sar_properties,
     fill_sat_properties,
     fill_proj_properties,
+    fill_file_properties,
 )
 
 from .bands import image_asset_from_href
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
 
-def create_item(granule_href: str) -> pystac.Item:
+
+def _phase(profile: Optional[Profile], name: str) -> ContextManager:
+    return nullcontext() if profile is None else profile.phase(name)
+
+
+def _timed(profile: Optional[Profile], name: str, function: Callable[..., T],
+           *args: Any) -> T:
+    with _phase(profile, name):
+        return function(*args)
+
+
+def ensure_fsspec() -> None:
+    """Reads and writes STAC objects through fsspec, so that items can be
+    saved to remote HREFs.
+
+    This calls :func:`stactools.core.use_fsspec` unless another
+    :class:`pystac.StacIO` than the pystac default has been set. It is not
+    done when the package is imported, but by the functions that save
+    items, in each worker process, and when a command runs.
+    """
+    if type(pystac.StacIO.default()) is DefaultStacIO:
+        import stactools.core
+
+        stactools.core.use_fsspec()
+
+
+def _read_manifest(manifest: SafeManifest) -> None:
+    manifest.root
+    manifest.fields
+
+
+def create_item(granule_href: str,
+                profile: Optional[Profile] = None,
+                footprint_tolerance: Optional[float] = None,
+                cog_dir: Optional[str] = None,
+                thumbnail_dir: Optional[str] = None) -> pystac.Item:
+    """Create a STC Item from a Sentinel-1 GRD scene.
+
+    This is a blocking wrapper around :func:`create_item_async`. It can
+    also be called from inside a running event loop, in which case it
+    blocks that loop until the item is created.
+
+    Args:
+        granule_href (str): The HREF to the granule.
+            This is expected to be a path to a SAFE directory or to a
+            zipped SAFE archive (``.SAFE.zip``). Asset HREFs of a zipped
+            granule point into the archive.
+        profile (Optional[Profile]): If given, the wall time of each phase
+            and the I/O of each file are recorded in this profile.
+        footprint_tolerance (Optional[float]): If given, the footprint is
+            built from the edge of the geolocation grid of the annotation,
+            which follows the swath much more closely than the four corners
+            of the manifest, and simplified to this tolerance, in degrees.
+            With 0, every edge tie point is kept.
+        cog_dir (Optional[str]): If given, the measurements are converted
+            to Cloud Optimized GeoTIFFs in this directory, and the data
+            assets point to them. See
+            :func:`~stactools.sentinel1_grd.cog.convert_to_cog`.
+        thumbnail_dir (Optional[str]): If given and the granule does not
+            have a quick-look, a thumbnail is rendered from the VV or HH
+            measurement to ``<item id>.png`` in this directory. See
+            :func:`~stactools.sentinel1_grd.thumbnail.render_thumbnail`.
+
+    Returns:
+        pystac.Item: An item representing the Sentinel-1 GRD scene.
+    """
+    coroutine = create_item_async(granule_href, profile, footprint_tolerance,
+                                  cog_dir, thumbnail_dir)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    # asyncio.run cannot be nested, so inside a running event loop (e.g. a
+    # notebook or an async application), the item is created in its own
+    # loop on a worker thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+async def create_item_async(
+        granule_href: str,
+        profile: Optional[Profile] = None,
+        footprint_tolerance: Optional[float] = None,
+        cog_dir: Optional[str] = None,
+        thumbnail_dir: Optional[str] = None) -> pystac.Item:
     """Create a STC Item from a Sentinel-1 GRD scene.
 
+    The granule is listed once through fsspec, and the manifest and the
+    product annotation are read concurrently, which hides most of the
+    latency of remote stores.
+
     Args:
         granule_href (str): The HREF to the granule.
-            This is expected to be a path to a SAFE archive.
+            This is expected to be a path to a SAFE directory or to a
+            zipped SAFE archive (``.SAFE.zip``). Asset HREFs of a zipped
+            granule point into the archive.
+        profile (Optional[Profile]): If given, the wall time of each phase
+            and the I/O of each file are recorded in this profile.
+        footprint_tolerance (Optional[float]): If given, the footprint is
+            built from the edge of the geolocation grid of the annotation,
+            which follows the swath much more closely than the four corners
+            of the manifest, and simplified to this tolerance, in degrees.
+            With 0, every edge tie point is kept.
+        cog_dir (Optional[str]): If given, the measurements are converted
+            to Cloud Optimized GeoTIFFs in this directory, and the data
+            assets point to them. See
+            :func:`~stactools.sentinel1_grd.cog.convert_to_cog`.
+        thumbnail_dir (Optional[str]): If given and the granule does not
+            have a quick-look, a thumbnail is rendered from the VV or HH
+            measurement to ``<item id>.png`` in this directory. See
+            :func:`~stactools.sentinel1_grd.thumbnail.render_thumbnail`.
 
     Returns:
         pystac.Item: An item representing the Sentinel-1 GRD scene.
     """
+    loop = asyncio.get_running_loop()
+
+    manifest = await loop.run_in_executor(
+        None,
+        partial(_timed, profile, "manifest_parse", SafeManifest, granule_href,
+                profile))
 
-    metalinks = MetadataLinks(granule_href)
-
-    product_metadata = ProductMetadata(metalinks.product_metadata_href)
-
-    item = pystac.Item(
-        id=product_metadata.scene_id,
-        geometry=product_metadata.geometry,
-        bbox=product_metadata.bbox,
-        datetime=product_metadata.get_datetime,
-        properties={},
-        stac_extensions=[],
-    )
-
-    # ---- Add Extensions ----
-    # sar
-    sar = SarExtension.ext(item, add_if_missing=True)
-    fill_sar_properties(sar, metalinks.product_metadata_href)
-
-    # sat
-    sat = SatExtension.ext(item, add_if_missing=True)
-    fill_sat_properties(sat, metalinks.product_metadata_href)
-
-    # eo
-    EOExtension.ext(item, add_if_missing=True)
-
-    # proj
-    proj = ProjectionExtension.ext(item, add_if_missing=True)
-    fill_proj_properties(proj, metalinks, product_metadata)
-
-    # --Common metadata--
-    item.common_metadata.providers = [SENTINEL_PROVIDER]
-    item.common_metadata.platform = product_metadata.platform
-    item.common_metadata.constellation = SENTINEL_CONSTELLATION
-
-    # s1 properties
-    item.properties.update({**product_metadata.metadata_dict})
-
-    # Add assets to item
-    item.add_asset(*metalinks.create_manifest_asset())
-
-    # Annotations for bands
-    for asset_obj in metalinks.create_product_asset():
-        item.add_asset(asset_obj[0], asset_obj[1])
-
-    # Calibrations for bands
-    for asset_obj in metalinks.create_calibration_asset():
-        item.add_asset(asset_obj[0], asset_obj[1])
-
-    # Noise for bands
-    for asset_obj in metalinks.create_noise_asset():
-        item.add_asset(asset_obj[0], asset_obj[1])
-
-    # Thumbnail
-    if metalinks.thumbnail_href is not None:
-        item.add_asset(
-            "thumbnail",
-            pystac.Asset(
-                href=metalinks.thumbnail_href,
-                media_type=pystac.MediaType.PNG,
-                roles=["thumbnail"],
-            ),
+    # The manifest is read while the granule is being listed, and the
+    # annotation as soon as the listing tells where it is
+    manifest_read = loop.run_in_executor(
+        None,
+        partial(_timed, profile, "manifest_parse", _read_manifest, manifest))
+    try:
+        annotation_names = await loop.run_in_executor(
+            None,
+            partial(_timed, profile, "listing", manifest.listdir,
+                    "annotation"))
+        annotation_name = next(
+            (x for x in annotation_names if x.endswith("xml")), None)
+        if annotation_name is None:
+            raise AnnotationError(
+                f"Granule {granule_href} does not have a product annotation")
+    except Exception:
+        # Do not leave the manifest being read in the background, and do not
+        # let its own exception go unretrieved
+        await asyncio.gather(manifest_read, return_exceptions=True)
+        raise
+    annotation_href = manifest.join("annotation", annotation_name)
+
+    # Image size, pixel spacing and the geolocation grid are the same for
+    # all polarisations, so a single annotation is enough
+    annotation_read = loop.run_in_executor(
+        None,
+        partial(
+            _timed, profile, "annotation_parse",
+            partial(AnnotationHeader,
+                    geolocation_grid=footprint_tolerance is not None,
+                    profile=profile), annotation_href))
+
+    _, annotation = await asyncio.gather(manifest_read, annotation_read)
+
+    item = _create_item(manifest, annotation, profile, footprint_tolerance)
+
+    # The COG and thumbnail modules need rasterio, which is only imported
+    # when they are used
+    if cog_dir is not None:
+        from .cog import convert_item_assets
+
+        await loop.run_in_executor(
+            None,
+            partial(_timed, profile, "cog_conversion", convert_item_assets,
+                    item, cog_dir))
+
+    # After the COG conversion, so that the thumbnail is read from overviews
+    if thumbnail_dir is not None and "thumbnail" not in item.assets:
+        from .thumbnail import render_item_thumbnail
+
+        await loop.run_in_executor(
+            None,
+            partial(_timed, profile, "thumbnail_rendering",
+                    render_item_thumbnail, item,
+                    os.path.join(thumbnail_dir, f"{item.id}.png")))
+
+    return item
+
+
+def _create_item(manifest: SafeManifest,
+                 annotation: AnnotationHeader,
+                 profile: Optional[Profile] = None,
+                 footprint_tolerance: Optional[float] = None) -> pystac.Item:
+    with _phase(profile, "extension_fill"):
+        metalinks = MetadataLinks(manifest.granule_href, manifest)
+
+        footprint = None
+        if (footprint_tolerance is not None
+                and annotation.geolocation_grid is not None):
+            footprint = annotation.geolocation_grid.footprint(
+                footprint_tolerance)
+
+        product_metadata = ProductMetadata(metalinks.product_metadata_href,
+                                           manifest, footprint).to_record()
+
+        item = pystac.Item(
+            id=product_metadata.scene_id,
+            geometry=product_metadata.geometry,
+            bbox=list(product_metadata.bbox),
+            datetime=product_metadata.get_datetime,
+            properties={},
+            stac_extensions=[],
         )
 
-    image_assets = dict([
-        image_asset_from_href(
-            os.path.join(granule_href, "measurement", image_path),
-            item,
-        ) for image_path in product_metadata.image_paths
-    ])
+        # ---- Add Extensions ----
+        # sar
+        sar = SarExtension.ext(item, add_if_missing=True)
+        fill_sar_properties(sar, manifest, annotation)
+
+        # sat
+        sat = SatExtension.ext(item, add_if_missing=True)
+        fill_sat_properties(sat, manifest)
+
+        # eo
+        EOExtension.ext(item, add_if_missing=True)
+
+        # proj
+        proj = ProjectionExtension.ext(item, add_if_missing=True)
+        fill_proj_properties(proj, product_metadata, annotation)
+
+        # --Common metadata--
+        item.common_metadata.providers = [SENTINEL_PROVIDER]
+        item.common_metadata.platform = product_metadata.platform
+        item.common_metadata.constellation = SENTINEL_CONSTELLATION
+
+        # s1 properties
+        item.properties.update({**product_metadata.metadata_dict})
+        item.properties["s1:incidence_angle_mid_swath"] = (
+            annotation.incidence_angle_mid_swath)
+        # The near and far range angles come from the geolocation grid,
+        # which is only read when the footprint is built from it
+        if annotation.incidence_angle_near is not None:
+            item.properties["s1:incidence_angle_near"] = (
+                annotation.incidence_angle_near)
+            item.properties["s1:incidence_angle_far"] = (
+                annotation.incidence_angle_far)
+
+    with _phase(profile, "asset_building"):
+        # Add assets to item
+        item.add_asset(*metalinks.create_manifest_asset())
+
+        # Annotations for bands
+        for asset_obj in metalinks.create_product_asset():
+            item.add_asset(asset_obj[0], asset_obj[1])
+
+        # Calibrations for bands
+        for asset_obj in metalinks.create_calibration_asset():
+            item.add_asset(asset_obj[0], asset_obj[1])
+
+        # Noise for bands
+        for asset_obj in metalinks.create_noise_asset():
+            item.add_asset(asset_obj[0], asset_obj[1])
+
+        # Thumbnail
+        if metalinks.thumbnail_href is not None:
+            item.add_asset(
+                "thumbnail",
+                pystac.Asset(
+                    href=metalinks.thumbnail_href,
+                    media_type=pystac.MediaType.PNG,
+                    roles=["thumbnail"],
+                ),
+            )
+
+        image_assets = dict([
+            image_asset_from_href(
+                manifest.join("measurement", image_path),
+                item,
+                pixel_spacing=annotation.range_pixel_spacing,
+                profile=profile,
+            ) for image_path in product_metadata.image_paths
+        ])
+
+        for key, asset in image_assets.items():
+            assert key not in item.assets
+            item.add_asset(key, asset)
 
-    for key, asset in image_assets.items():
-        assert key not in item.assets
-        item.add_asset(key, asset)
+        # file
+        fill_file_properties(item, manifest)
 
     # --Links--
     item.links.append(SENTINEL_LICENSE)
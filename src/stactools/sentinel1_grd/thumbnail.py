@@ -0,0 +1,126 @@
+import logging
+import posixpath
+import warnings
+from typing import Optional, Tuple
+
+import numpy as np
+import pystac
+import rasterio  # type: ignore
+from fsspec.core import url_to_fs  # type: ignore
+from rasterio.enums import Resampling  # type: ignore
+from rasterio.errors import NotGeoreferencedWarning  # type: ignore
+from rasterio.io import MemoryFile  # type: ignore
+
+from .cog import _open
+
+logger = logging.getLogger(__name__)
+
+# Size of the longest side of rendered thumbnails, in pixels
+DEFAULT_THUMBNAIL_SIZE = 512
+
+# Measurements rendered as thumbnails, by asset key, in order of preference
+THUMBNAIL_POLARISATIONS = ["vv", "hh"]
+
+
+def scale_to_db(
+    data: np.ndarray, percentiles: Tuple[float, float] = (2, 98)
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Scales amplitudes to an 8-bit image in decibels.
+
+    Args:
+        data (np.ndarray): The digital numbers of a GRD measurement, which
+            are amplitudes. Zeros are no data.
+        percentiles (Tuple[float, float]): The percentiles of the decibels
+            stretched to 0 and 255.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The ``uint8`` image and its alpha
+        mask, 0 where there is no data.
+    """
+    valid = data > 0
+    db = np.zeros(data.shape, dtype=np.float32)
+    db[valid] = 20 * np.log10(data[valid])
+    if valid.any():
+        low, high = np.percentile(db[valid], percentiles)
+    else:
+        low, high = 0.0, 1.0
+    image = np.clip((db - low) * (255 / max(high - low, 1e-6)), 0, 255)
+    image = np.where(valid, image, 0).astype(np.uint8)
+    return image, np.where(valid, 255, 0).astype(np.uint8)
+
+
+def render_thumbnail(href: str,
+                     dst: str,
+                     size: int = DEFAULT_THUMBNAIL_SIZE) -> str:
+    """Renders a measurement as a PNG thumbnail in decibels.
+
+    The measurement is read decimated to the size of the thumbnail, with
+    nearest neighbour resampling, so only the rows that make it into the
+    thumbnail are read, or the closest overview of a COG. The thumbnail is
+    in the image geometry, like the quick-look of the SAFE products.
+
+    Args:
+        href (str): The HREF to the measurement.
+        dst (str): The HREF of the PNG file to write.
+        size (int): The size of the longest side of the thumbnail.
+
+    Returns:
+        str: ``dst``.
+    """
+    with _open(href) as dataset:
+        factor = max(dataset.width / size, dataset.height / size, 1)
+        shape = (max(1, round(dataset.height / factor)),
+                 max(1, round(dataset.width / factor)))
+        data = dataset.read(1, out_shape=shape, resampling=Resampling.nearest)
+
+    image, alpha = scale_to_db(data)
+    with warnings.catch_warnings():
+        # PNGs are not georeferenced
+        warnings.simplefilter("ignore", NotGeoreferencedWarning)
+        with rasterio.Env(GDAL_PAM_ENABLED="NO"), MemoryFile() as memfile:
+            with memfile.open(driver="PNG",
+                              width=shape[1],
+                              height=shape[0],
+                              count=2,
+                              dtype="uint8") as png:
+                png.write(np.stack([image, alpha]))
+            png_data = memfile.read()
+
+    fs, path = url_to_fs(dst)
+    fs.makedirs(posixpath.dirname(path), exist_ok=True)
+    with fs.open(path, "wb") as f:
+        f.write(png_data)
+    return dst
+
+
+def render_item_thumbnail(
+        item: pystac.Item,
+        dst: str,
+        size: int = DEFAULT_THUMBNAIL_SIZE) -> Optional[pystac.Asset]:
+    """Renders the thumbnail of an item from its VV or HH measurement, and
+    adds it as the ``thumbnail`` asset.
+
+    Args:
+        item (pystac.Item): The item.
+        dst (str): The HREF of the PNG file to write.
+        size (int): The size of the longest side of the thumbnail.
+
+    Returns:
+        Optional[pystac.Asset]: The thumbnail asset, or None if the item
+        has no VV or HH measurement or it could not be read.
+    """
+    keys = [x for x in THUMBNAIL_POLARISATIONS if x in item.assets]
+    if not keys:
+        return None
+    href = item.assets[keys[0]].href
+    try:
+        render_thumbnail(href, dst, size)
+    except OSError as e:
+        logger.warning(f"Could not render a thumbnail from {href}: {e}")
+        return None
+
+    asset = pystac.Asset(href=dst,
+                         media_type=pystac.MediaType.PNG,
+                         roles=["thumbnail"])
+    item.add_asset("thumbnail", asset)
+    return asset
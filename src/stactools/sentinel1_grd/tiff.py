@@ -0,0 +1,283 @@
+import struct
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import fsspec  # type: ignore
+import numpy as np
+
+from .profiling import Profile
+
+# Bytes fetched per range read. The header, the first IFD and the GCPs of
+# a Sentinel-1 measurement usually fit in the first block.
+BLOCK_SIZE = 16384
+
+# Parsed headers kept by read_tiff_header
+CACHE_SIZE = 256
+
+# TIFF tags, by name
+TAGS = {
+    "image_width": 256,
+    "image_length": 257,
+    "bits_per_sample": 258,
+    "compression": 259,
+    "samples_per_pixel": 277,
+    "rows_per_strip": 278,
+    "tile_width": 322,
+    "tile_length": 323,
+    "sample_format": 339,
+    "model_pixel_scale": 33550,
+    "model_tiepoint": 33922,
+    "geo_key_directory": 34735,
+    "gdal_nodata": 42113,
+}
+_TAG_IDS = set(TAGS.values())
+
+# Struct format and size of the TIFF field types
+_FIELD_TYPES = {
+    1: ("B", 1),
+    2: ("s", 1),
+    3: ("H", 2),
+    4: ("I", 4),
+    5: ("II", 8),
+    6: ("b", 1),
+    7: ("B", 1),
+    8: ("h", 2),
+    9: ("i", 4),
+    10: ("ii", 8),
+    11: ("f", 4),
+    12: ("d", 8),
+    16: ("Q", 8),
+    17: ("q", 8),
+    18: ("Q", 8),
+}
+
+# raster:bands data types, by TIFF SampleFormat and BitsPerSample
+_DATA_TYPES = {
+    (1, 8): "uint8",
+    (1, 16): "uint16",
+    (1, 32): "uint32",
+    (1, 64): "uint64",
+    (2, 8): "int8",
+    (2, 16): "int16",
+    (2, 32): "int32",
+    (2, 64): "int64",
+    (3, 16): "float16",
+    (3, 32): "float32",
+    (3, 64): "float64",
+    (5, 32): "cint16",
+    (5, 64): "cint32",
+    (6, 64): "cfloat32",
+    (6, 128): "cfloat64",
+}
+
+
+class TiffError(Exception):
+    pass
+
+
+class EmptyTiffError(TiffError):
+    """Raised for TIFF files of 0 bytes, like the measurements of
+    stripped-down granules."""
+    pass
+
+
+class _RangeReader:
+    """Reads byte ranges of a file in blocks of :data:`BLOCK_SIZE`, and
+    keeps the blocks read.
+
+    The file is opened like the XML files of a granule, through the profile
+    if there is one, so that its opens and bytes read are accounted for.
+    """
+    def __init__(self, href: str, profile: Optional[Profile] = None) -> None:
+        self.href = href
+        self.blocks: Dict[int, bytes] = {}
+        self.reads = 0
+        self._opened = (fsspec.open(href, "rb", block_size=BLOCK_SIZE)
+                        if profile is None else profile.open(
+                            href, block_size=BLOCK_SIZE))
+        self._file = self._opened.__enter__()
+
+    def close(self) -> None:
+        self._opened.__exit__(None, None, None)
+
+    def _block(self, index: int) -> bytes:
+        if index not in self.blocks:
+            self.reads += 1
+            self._file.seek(index * BLOCK_SIZE)
+            self.blocks[index] = self._file.read(BLOCK_SIZE)
+        return self.blocks[index]
+
+    def read(self, offset: int, size: int) -> bytes:
+        data = b"".join(
+            self._block(i)
+            for i in range(offset //
+                           BLOCK_SIZE, (offset + size - 1) // BLOCK_SIZE + 1))
+        start = offset % BLOCK_SIZE
+        if len(data) < start + size:
+            raise TiffError(
+                f"TIFF at {self.href} ends before byte {offset + size}")
+        return data[start:start + size]
+
+
+class TiffHeader:
+    """The first image file directory (IFD) of a TIFF file.
+
+    Only the header and the IFD are read, with a few range reads, and never
+    the pixels. Both classic TIFF and BigTIFF are supported.
+
+    Args:
+        href (str): The HREF to the TIFF file.
+        profile (Optional[Profile]): If given, the open and the bytes read
+            are accounted for in this profile.
+    """
+    def __init__(self, href: str, profile: Optional[Profile] = None) -> None:
+        self.href = href
+        self.tags: Dict[int, Tuple[Any, ...]] = {}
+        reader = _RangeReader(href, profile)
+        try:
+            self._read_ifd(reader)
+        finally:
+            reader.close()
+        self.reads = reader.reads
+
+    def _read_ifd(self, reader: _RangeReader) -> None:
+        href = self.href
+        if not reader._block(0):
+            raise EmptyTiffError(f"TIFF at {href} is empty")
+        header = reader.read(0, 8)
+        if header[:2] == b"II":
+            byte_order = "<"
+        elif header[:2] == b"MM":
+            byte_order = ">"
+        else:
+            raise TiffError(f"File at {href} is not a TIFF")
+
+        version = struct.unpack(f"{byte_order}H", header[2:4])[0]
+        if version == 42:
+            offset = struct.unpack(f"{byte_order}I", header[4:8])[0]
+            count_format, entry_format, entry_size = "H", "HHI", 12
+        elif version == 43:
+            offset = struct.unpack(f"{byte_order}Q", reader.read(8, 8))[0]
+            count_format, entry_format, entry_size = "Q", "HHQ", 20
+        else:
+            raise TiffError(f"File at {href} is not a TIFF")
+
+        count_size = struct.calcsize(count_format)
+        count = struct.unpack(f"{byte_order}{count_format}",
+                              reader.read(offset, count_size))[0]
+        entries = reader.read(offset + count_size, count * entry_size)
+        value_size = entry_size - struct.calcsize(f"={entry_format}")
+
+        for i in range(count):
+            entry = entries[i * entry_size:(i + 1) * entry_size]
+            tag, field_type, value_count = struct.unpack(
+                f"{byte_order}{entry_format}", entry[:-value_size])
+            # Values of other tags, such as the strip offsets of large
+            # images, are not read
+            if tag not in _TAG_IDS or field_type not in _FIELD_TYPES:
+                continue
+            value_format, type_size = _FIELD_TYPES[field_type]
+            size = type_size * value_count
+            if size <= value_size:
+                data = entry[-value_size:][:size]
+            else:
+                value_offset = struct.unpack(
+                    f"{byte_order}{'I' if value_size == 4 else 'Q'}",
+                    entry[-value_size:])[0]
+                data = reader.read(value_offset, size)
+            if field_type == 2:
+                self.tags[tag] = (data.rstrip(b"\x00").decode("latin-1"), )
+            else:
+                self.tags[tag] = struct.unpack(
+                    f"{byte_order}{value_format * value_count}", data)
+
+    def _tag(self, name: str, default: Any = None) -> Any:
+        values = self.tags.get(TAGS[name])
+        return default if not values else values[0]
+
+    @property
+    def width(self) -> int:
+        return int(self._tag("image_width"))
+
+    @property
+    def height(self) -> int:
+        return int(self._tag("image_length"))
+
+    @property
+    def shape(self) -> List[int]:
+        """The ``[height, width]`` of the image, as ``proj:shape``."""
+        return [self.height, self.width]
+
+    @property
+    def samples_per_pixel(self) -> int:
+        return int(self._tag("samples_per_pixel", 1))
+
+    @property
+    def bits_per_sample(self) -> int:
+        return int(self._tag("bits_per_sample", 1))
+
+    @property
+    def data_type(self) -> Optional[str]:
+        """The data type of the samples, as in ``raster:bands``, or None if
+        it has no equivalent."""
+        return _DATA_TYPES.get((int(self._tag("sample_format",
+                                              1)), self.bits_per_sample))
+
+    @property
+    def nodata(self) -> Optional[float]:
+        """The GDAL nodata value, if any."""
+        value = self._tag("gdal_nodata")
+        if value is None or not value.strip():
+            return None
+        return float(value)
+
+    @property
+    def compression(self) -> int:
+        return int(self._tag("compression", 1))
+
+    @property
+    def gcps(self) -> np.ndarray:
+        """The ground control points, as an array of ``(pixel, line, z, x,
+        y, z)`` rows from the GeoTIFF ModelTiepoint tag."""
+        values = self.tags.get(TAGS["model_tiepoint"], ())
+        return np.array(values, dtype=np.float64).reshape(-1, 6)
+
+    @property
+    def is_georeferenced_by_gcps(self) -> bool:
+        """Whether the image is located by GCPs rather than a transform."""
+        return (TAGS["model_pixel_scale"] not in self.tags
+                and len(self.gcps) > 1)
+
+
+_headers: "OrderedDict[str, TiffHeader]" = OrderedDict()
+_headers_lock = threading.Lock()
+
+
+def read_tiff_header(href: str,
+                     profile: Optional[Profile] = None) -> TiffHeader:
+    """Reads the header of a TIFF file.
+
+    The last :data:`CACHE_SIZE` headers are cached per HREF, so that
+    converting the same measurement again, for instance in the items and
+    in a collection, does not read it twice.
+
+    Args:
+        href (str): The HREF to the TIFF file.
+        profile (Optional[Profile]): If given and the header is not cached,
+            the open and the bytes read are accounted for in this profile.
+
+    Returns:
+        TiffHeader: The header.
+    """
+    with _headers_lock:
+        if href in _headers:
+            _headers.move_to_end(href)
+            return _headers[href]
+
+    header = TiffHeader(href, profile)
+    with _headers_lock:
+        _headers[href] = header
+        if len(_headers) > CACHE_SIZE:
+            _headers.popitem(last=False)
+    return header
@@ -0,0 +1,383 @@
+import json
+import logging
+import os
+import time
+import traceback
+import urllib.request
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Tuple, Union)
+
+import jsonschema  # type: ignore
+import jsonschema.validators  # type: ignore
+import pystac
+from pystac.stac_object import STACObjectType
+from pystac.validation import set_validator
+from pystac.validation.stac_validator import JsonSchemaSTACValidator
+
+from .batch import (Document, iter_item_documents, map_granules,
+                    write_failure_report)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_DIRECTORY = os.path.join(os.path.dirname(__file__), "schemas")
+
+# The schemas of the items this package creates, and the schemas they
+# reference, by URI. The files are copies of the published schemas, so that
+# items can be validated offline.
+BUNDLED_SCHEMAS = {
+    "https://schemas.stacspec.org/v1.0.0/item-spec/json-schema/item.json":
+    "item-v1.0.0.json",
+    "https://schemas.stacspec.org/v1.0.0/item-spec/json-schema/basics.json":
+    "basics-v1.0.0.json",
+    "https://schemas.stacspec.org/v1.0.0/item-spec/json-schema/datetime.json":
+    "datetime-v1.0.0.json",
+    "https://schemas.stacspec.org/v1.0.0/item-spec/json-schema/instrument.json":
+    "instrument-v1.0.0.json",
+    "https://schemas.stacspec.org/v1.0.0/item-spec/json-schema/licensing.json":
+    "licensing-v1.0.0.json",
+    "https://schemas.stacspec.org/v1.0.0/item-spec/json-schema/provider.json":
+    "provider-v1.0.0.json",
+    "https://geojson.org/schema/Feature.json":
+    "geojson-Feature.json",
+    "https://geojson.org/schema/Geometry.json":
+    "geojson-Geometry.json",
+    "https://stac-extensions.github.io/sar/v1.0.0/schema.json":
+    "sar-v1.0.0.json",
+    "https://stac-extensions.github.io/sat/v1.0.0/schema.json":
+    "sat-v1.0.0.json",
+    "https://stac-extensions.github.io/eo/v1.0.0/schema.json":
+    "eo-v1.0.0.json",
+    "https://stac-extensions.github.io/projection/v1.0.0/schema.json":
+    "projection-v1.0.0.json",
+    "https://stac-extensions.github.io/raster/v1.0.0/schema.json":
+    "raster-v1.0.0.json",
+    "https://stac-extensions.github.io/file/v2.0.0/schema.json":
+    "file-v2.0.0.json",
+}
+
+DEFAULT_CHUNK_SIZE = 256
+
+
+def load_schemas(directory: str = SCHEMA_DIRECTORY) -> Dict[str, Any]:
+    """Reads the bundled schemas.
+
+    Args:
+        directory (str): The directory of the schema files.
+
+    Returns:
+        Dict[str, Any]: The schemas, by URI.
+    """
+    schemas = {}
+    for uri, file_name in BUNDLED_SCHEMAS.items():
+        with open(os.path.join(directory, file_name)) as f:
+            schemas[uri] = json.load(f)
+    return schemas
+
+
+def update_schemas(directory: str = SCHEMA_DIRECTORY) -> None:
+    """Downloads the published version of each bundled schema.
+
+    This needs network access, and is only needed when a schema is added
+    to :data:`BUNDLED_SCHEMAS` or a published schema is fixed.
+
+    Args:
+        directory (str): The directory the schema files are written to.
+    """
+    for uri, file_name in BUNDLED_SCHEMAS.items():
+        with urllib.request.urlopen(uri) as response:
+            schema = json.load(response)
+        with open(os.path.join(directory, file_name), "w") as f:
+            json.dump(schema, f, indent=2)
+            f.write("\n")
+
+
+class BundledSchemaValidator(JsonSchemaSTACValidator):
+    """A STAC validator that uses the bundled schemas.
+
+    Each schema is read and compiled once, when it is first used, instead of
+    being fetched and checked again for every object. If ``fastjsonschema``
+    is installed, :meth:`item_errors` checks items with schemas compiled to
+    Python code, which is an order of magnitude faster, and only uses
+    ``jsonschema`` to explain the errors of invalid items. Schemas that are not
+    bundled are fetched as pystac does, except by :meth:`item_errors`,
+    which never uses the network.
+
+    It can be used by :meth:`pystac.Item.validate`, see
+    :func:`use_bundled_schemas`, or called directly with
+    :meth:`item_errors`, which lists every schema an item does not conform
+    to instead of stopping at the first.
+
+    Args:
+        schemas (Optional[Dict[str, Any]]): The schemas, by URI. Defaults to
+            the bundled schemas.
+    """
+    def __init__(self, schemas: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__()
+        self.schemas = load_schemas() if schemas is None else schemas
+        self._validators: Dict[str, Any] = {}
+        self._compiled: Dict[str, Optional[Callable[[Any], Any]]] = {}
+        self._registry: Any = None
+
+    def _resolution_kwargs(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            from referencing import Registry, Resource  # type: ignore
+        except ImportError:
+            # jsonschema < 4.18 resolves references with a RefResolver
+            return {
+                "resolver":
+                jsonschema.validators.RefResolver.from_schema(
+                    schema, store=self.schemas)
+            }
+        if self._registry is None:
+            self._registry = Registry().with_resources(
+                (uri, Resource.from_contents(schema))
+                for uri, schema in self.schemas.items())
+        return {"registry": self._registry}
+
+    def validator(self, schema_uri: str) -> Any:
+        """Returns the compiled validator of a schema.
+
+        Args:
+            schema_uri (str): The URI of the schema.
+
+        Returns:
+            jsonschema.protocols.Validator: The validator.
+
+        Raises:
+            KeyError: If the schema is not bundled.
+        """
+        schema_uri = schema_uri.rstrip("#")
+        validator = self._validators.get(schema_uri)
+        if validator is None:
+            if schema_uri not in self.schemas:
+                raise KeyError(f"No bundled schema for {schema_uri}")
+            schema = self.schemas[schema_uri]
+            cls = jsonschema.validators.validator_for(schema)
+            validator = cls(schema, **self._resolution_kwargs(schema))
+            self._validators[schema_uri] = validator
+        return validator
+
+    def _compile(self, schema_uri: str) -> Optional[Callable[[Any], Any]]:
+        if schema_uri not in self._compiled:
+            try:
+                import fastjsonschema  # type: ignore
+            except ImportError:
+                self._compiled[schema_uri] = None
+            else:
+                # Formats are not asserted, as by jsonschema and pystac
+                self._compiled[schema_uri] = fastjsonschema.compile(
+                    self.schemas[schema_uri],
+                    handlers={
+                        "https": lambda uri: self.schemas[uri.split("#")[0]]
+                    },
+                    use_formats=False)
+        return self._compiled[schema_uri]
+
+    def _validate_from_uri(self, stac_dict: Dict[str, Any],
+                           schema_uri: str) -> None:
+        if schema_uri.rstrip("#") not in self.schemas:
+            super()._validate_from_uri(stac_dict, schema_uri)
+            return
+        error = jsonschema.exceptions.best_match(
+            self.validator(schema_uri).iter_errors(stac_dict))
+        if error is not None:
+            raise error
+
+    def item_errors(self, item: Dict[str, Any]) -> List[str]:
+        """Lists the schemas an item does not conform to.
+
+        Args:
+            item (Dict[str, Any]): The JSON object of the item.
+
+        Returns:
+            List[str]: One message per failing schema, naming the schema and
+            the most relevant error. Empty if the item is valid.
+        """
+        if item.get("type") != "Feature":
+            return ["Not a STAC Item"]
+        schema_uris = [
+            self.schema_uri_map.get_object_schema_uri(
+                STACObjectType.ITEM, item.get("stac_version", ""))
+        ] + list(item.get("stac_extensions", []))
+
+        messages = []
+        for schema_uri in schema_uris:
+            try:
+                validator = self.validator(schema_uri)
+            except KeyError as e:
+                messages.append(str(e.args[0]))
+                continue
+            compiled = self._compile(schema_uri.rstrip("#"))
+            if compiled is not None:
+                try:
+                    compiled(item)
+                    continue
+                except Exception as e:
+                    message = str(e)
+            error = jsonschema.exceptions.best_match(
+                validator.iter_errors(item))
+            if error is not None:
+                path = "/".join(str(x) for x in error.absolute_path)
+                message = f"{error.message} at /{path}"
+            elif compiled is None:
+                continue
+            messages.append(f"{schema_uri}: {message}")
+        return messages
+
+
+def use_bundled_schemas() -> BundledSchemaValidator:
+    """Makes pystac validate objects against the bundled schemas.
+
+    After this, :meth:`pystac.Item.validate` works offline for the items
+    this package creates, and no longer fetches the schemas each time.
+
+    Returns:
+        BundledSchemaValidator: The validator pystac now uses.
+    """
+    validator = BundledSchemaValidator()
+    set_validator(validator)
+    return validator
+
+
+class ValidationResult:
+    """The outcome of validating many items.
+
+    Args:
+        count (int): The number of items validated.
+        failures (List[Tuple[str, str]]): The name of each invalid item, an
+            HREF or item id, and why it is invalid.
+        elapsed (float): The wall time of the validation, in seconds.
+    """
+    def __init__(self, count: int, failures: List[Tuple[str, str]],
+                 elapsed: float) -> None:
+        self.count = count
+        self.failures = failures
+        self.elapsed = elapsed
+
+    @property
+    def throughput(self) -> float:
+        """Items validated per second."""
+        return self.count / self.elapsed if self.elapsed > 0 else 0.0
+
+    def write_failure_report(self, href: str) -> None:
+        """Writes the failures as a JSON list of ``href``/``error`` objects."""
+        write_failure_report(self.failures, href)
+
+
+# The validator of the current process, compiled on first use, so that the
+# schemas are read and compiled once per worker
+_validator: Optional[BundledSchemaValidator] = None
+
+
+def _get_validator() -> BundledSchemaValidator:
+    global _validator
+    if _validator is None:
+        _validator = BundledSchemaValidator()
+    return _validator
+
+
+def _validate_chunk(
+        documents: List[Document]) -> Tuple[int, List[Tuple[str, str]]]:
+    validator = _get_validator()
+    count = 0
+    failures = []
+    for name, document in documents:
+        try:
+            if document is None:
+                with open(name) as f:
+                    item = json.load(f)
+                # Collections, failure reports and the like are skipped
+                if not isinstance(item, dict) or item.get("type") != "Feature":
+                    continue
+            else:
+                item = json.loads(document)
+            count += 1
+            errors = validator.item_errors(item)
+        except Exception:
+            errors = [traceback.format_exc()]
+        if errors:
+            failures.append((name, "\n".join(errors)))
+    return count, failures
+
+
+def _chunks(documents: Iterable[Document],
+            chunk_size: int) -> Iterator[List[Document]]:
+    chunk: List[Document] = []
+    for document in documents:
+        chunk.append(document)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _validate_documents(documents: Iterable[Document], workers: Optional[int],
+                        chunk_size: int) -> ValidationResult:
+    start = time.perf_counter()
+    count = 0
+    failures: List[Tuple[str, str]] = []
+    for chunk_count, chunk_failures in map_granules(
+            _validate_chunk, _chunks(documents, chunk_size), workers):
+        count += chunk_count
+        for name, error in chunk_failures:
+            logger.warning(f"Invalid item {name}")
+            failures.append((name, error))
+    return ValidationResult(count, failures, time.perf_counter() - start)
+
+
+def validate_items(items: Iterable[Union[pystac.Item, Dict[str, Any]]],
+                   workers: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> ValidationResult:
+    """Validates many items against the bundled schemas, in parallel.
+
+    Items are validated against the core item schema and the schema of each
+    of their extensions, offline. An invalid item does not stop the
+    validation; it is recorded in the result instead.
+
+    Args:
+        items (Iterable[Union[pystac.Item, Dict[str, Any]]]): The items, or
+            their JSON objects. This can be a generator.
+        workers (Optional[int]): The number of worker processes. Defaults
+            to the number of CPUs. With a single worker, items are validated
+            in the current process.
+        chunk_size (int): The number of items sent to a worker at a time.
+
+    Returns:
+        ValidationResult: The invalid items, by id, and timing of the
+        validation.
+    """
+    def _documents() -> Iterator[Document]:
+        for item in items:
+            if isinstance(item, pystac.Item):
+                item = item.to_dict(include_self_link=False)
+            # As JSON text, so that tuples are checked as the arrays they
+            # are written as
+            yield (str(item.get("id")), json.dumps(item))
+
+    return _validate_documents(_documents(), workers, chunk_size)
+
+
+def validate_item_files(
+        src: str,
+        workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE) -> ValidationResult:
+    """Validates the items of files against the bundled schemas, in parallel.
+
+    Files are read and parsed by the workers. JSON files that are not STAC
+    Items, such as collections, are skipped.
+
+    Args:
+        src (str): Either a STAC Item JSON file, a newline-delimited JSON
+            file of items, a directory that is searched for JSON files, or a
+            glob pattern matching JSON files.
+        workers (Optional[int]): The number of worker processes. Defaults
+            to the number of CPUs. With a single worker, items are validated
+            in the current process.
+        chunk_size (int): The number of items sent to a worker at a time.
+
+    Returns:
+        ValidationResult: The invalid items, by HREF (and line, for
+        newline-delimited JSON), and timing of the validation.
+    """
+    return _validate_documents(iter_item_documents(src), workers, chunk_size)
@@ -0,0 +1,223 @@
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from fsspec.core import url_to_fs  # type: ignore
+
+from .manifest import DataObject, SafeManifest
+
+logger = logging.getLogger(__name__)
+
+# Size of the chunks the files are read and hashed in. Large enough for
+# hashlib to release the GIL and for remote stores to stream efficiently.
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Threads hashing the files of a granule
+DEFAULT_THREADS = 4
+
+
+class VerificationError(Exception):
+    pass
+
+
+class FileVerification(NamedTuple):
+    """The outcome of checking a file of a granule against its manifest.
+
+    Args:
+        path (str): The path of the file, relative to the granule.
+        error (Optional[str]): Why the file does not match the manifest, or
+            None if it does.
+        hashed (bool): Whether the file was hashed. Files
+            are not hashed if the manifest does not list their checksum, or
+            if verification stopped at a size mismatch.
+        bytes_read (int): The number of bytes hashed.
+    """
+    path: str
+    error: Optional[str]
+    hashed: bool
+    bytes_read: int
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class GranuleVerification:
+    """The outcome of checking all files of a granule against its manifest.
+
+    Args:
+        granule_href (str): The HREF of the granule.
+        files (List[FileVerification]): The outcome for each file listed in
+            the manifest, in manifest order.
+        elapsed (float): The wall time of the check, in seconds.
+    """
+    def __init__(self, granule_href: str, files: List[FileVerification],
+                 elapsed: float) -> None:
+        self.granule_href = granule_href
+        self.files = files
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return all(x.ok for x in self.files)
+
+    @property
+    def failures(self) -> List[Tuple[str, str]]:
+        """The path and error of every file that does not match."""
+        return [(x.path, x.error) for x in self.files if x.error is not None]
+
+    @property
+    def bytes_read(self) -> int:
+        return sum(x.bytes_read for x in self.files)
+
+    @property
+    def throughput(self) -> float:
+        """Bytes hashed per second."""
+        return self.bytes_read / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def check_size(data_object: DataObject) -> Optional[str]:
+    """Compares the size of a file with the size listed in the manifest.
+
+    This only needs a ``stat`` of the file, or a HEAD request on remote
+    stores, so it is done before any file is hashed.
+
+    Returns:
+        Optional[str]: The mismatch, or None if the sizes are equal or the
+        manifest does not list a size.
+    """
+    fs, path = url_to_fs(data_object.href)
+    try:
+        size = fs.size(path)
+    except FileNotFoundError:
+        return "File is missing"
+    except OSError as e:
+        return str(e) or repr(e)
+    if data_object.size is not None and size != data_object.size:
+        return (f"Size is {size} bytes, "
+                f"manifest lists {data_object.size} bytes")
+    return None
+
+
+def check_checksum(
+        data_object: DataObject,
+        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[Optional[str], int]:
+    """Streams a file in chunks and compares its checksum with the manifest.
+
+    Args:
+        data_object (DataObject): The file.
+        chunk_size (int): The size of the chunks the file is read in.
+
+    Returns:
+        Tuple[Optional[str], int]: The mismatch, or None if the checksums
+        are equal, and the number of bytes hashed.
+    """
+    if data_object.checksum is None or data_object.checksum_name is None:
+        return None, 0
+    try:
+        digest = hashlib.new(data_object.checksum_name.lower().replace(
+            "-", ""))
+    except ValueError:
+        raise VerificationError(
+            f"Unsupported checksum {data_object.checksum_name} "
+            f"for {data_object.path}")
+
+    fs, path = url_to_fs(data_object.href)
+    bytes_read = 0
+    with fs.open(path, "rb", block_size=chunk_size) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            bytes_read += len(chunk)
+
+    checksum = digest.hexdigest()
+    if checksum != data_object.checksum:
+        return (f"{data_object.checksum_name} checksum is {checksum}, "
+                f"manifest lists {data_object.checksum}"), bytes_read
+    return None, bytes_read
+
+
+def _hash(data_object: DataObject,
+          chunk_size: int) -> Tuple[Optional[str], int]:
+    try:
+        return check_checksum(data_object, chunk_size)
+    except (OSError, VerificationError) as e:
+        return str(e) or repr(e), 0
+
+
+def verify_granule(granule_href: str,
+                   threads: int = DEFAULT_THREADS,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   fail_fast: bool = True) -> GranuleVerification:
+    """Checks the files of a granule against the sizes and checksums listed
+    in the ``dataObjectSection`` of its manifest.
+
+    The sizes of all files are checked first. Then the files are streamed
+    in chunks and hashed on a thread pool, largest first, so that reading
+    one file overlaps with hashing others.
+
+    Args:
+        granule_href (str): The HREF of the granule, a SAFE directory or a
+            zipped SAFE archive.
+        threads (int): The number of files hashed at a time.
+        chunk_size (int): The size of the chunks files are read in.
+        fail_fast (bool): If True, no file is hashed when the size of any
+            file does not match.
+
+    Returns:
+        GranuleVerification: The outcome for each file.
+    """
+    start = time.perf_counter()
+    data_objects = list(SafeManifest(granule_href).data_objects.values())
+
+    with ThreadPoolExecutor(threads) as executor:
+        size_errors = list(executor.map(check_size, data_objects))
+        to_hash = [
+            x for x, error in zip(data_objects, size_errors) if error is None
+        ]
+        if fail_fast and len(to_hash) < len(data_objects):
+            to_hash = []
+        to_hash.sort(key=lambda x: x.size or 0, reverse=True)
+        checksums = dict(
+            zip((x.path for x in to_hash),
+                executor.map(lambda x: _hash(x, chunk_size), to_hash)))
+
+    files = []
+    for data_object, size_error in zip(data_objects, size_errors):
+        if data_object.path in checksums:
+            error, bytes_read = checksums[data_object.path]
+            files.append(
+                FileVerification(data_object.path, error, data_object.checksum
+                                 is not None, bytes_read))
+        else:
+            files.append(
+                FileVerification(data_object.path, size_error, False, 0))
+    return GranuleVerification(granule_href, files,
+                               time.perf_counter() - start)
+
+
+def verify_granules(granule_hrefs: Iterable[str],
+                    threads: int = DEFAULT_THREADS,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    fail_fast: bool = True) -> Iterator[GranuleVerification]:
+    """Checks many granules, one after the other, see
+    :func:`verify_granule`.
+
+    Granules whose manifest cannot be read are reported with a single
+    failure for ``manifest.safe``.
+    """
+    for granule_href in granule_hrefs:
+        start = time.perf_counter()
+        try:
+            yield verify_granule(granule_href, threads, chunk_size, fail_fast)
+        except Exception as e:
+            logger.debug(f"Failed to verify {granule_href}", exc_info=True)
+            yield GranuleVerification(granule_href, [
+                FileVerification("manifest.safe",
+                                 str(e) or repr(e), False, 0)
+            ],
+                                      time.perf_counter() - start)
@@ -0,0 +1,220 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import fsspec  # type: ignore
+from fsspec.core import url_to_fs  # type: ignore
+
+from .profiling import Profile
+
+DEFAULT_MAX_SIZE = 1024**3
+
+# Fields of fsspec file infos that change when a file is rewritten, in order
+# of preference. Object stores give an ETag, local files a modification time.
+VERSION_FIELDS = ["ETag", "etag", "md5Hash", "mtime", "LastModified"]
+
+CACHE_FILE_EXTENSION = ".xml"
+
+
+class XmlCache:
+    """A local, content-addressed cache of the XML files of granules.
+
+    Files are stored under a key derived from their HREF, size and ETag (or
+    modification time, for stores without ETags), so a file that changes
+    is downloaded again. The key of a member of a zipped granule is derived
+    from the size and ETag of the archive, so a rewritten archive is read
+    again even when the member keeps its size. When the cache grows over
+    ``max_size``, the least recently used files are evicted.
+
+    Finding the version of a file costs a metadata request (an HTTP HEAD
+    on object stores) on every read, hits included. Sentinel-1 product names
+    are unique, so a granule that is never rewritten under the same name
+    can be read with ``revalidate=False``, which keys files on their HREF
+    only and makes hits free of any request.
+
+    The cache can be shared by several processes. Writes are atomic, and
+    each process evicts on its own view of the cache size.
+
+    Args:
+        directory (str): The directory of the cache. It is created if
+            needed.
+        max_size (int): The size limit of the cache, in bytes.
+        revalidate (bool): Whether to check that a cached file is the
+            current version of the file. If False, cached files are trusted.
+    """
+    def __init__(self,
+                 directory: str,
+                 max_size: int = DEFAULT_MAX_SIZE,
+                 revalidate: bool = True) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.revalidate = revalidate
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_downloaded = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self) -> Iterator[os.DirEntry]:
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(CACHE_FILE_EXTENSION):
+                    yield entry
+
+    def key(self, href: str) -> str:
+        """Returns the cache key of the current version of a file."""
+        if not self.revalidate:
+            return hashlib.sha256(href.encode("utf-8")).hexdigest()
+
+        # The version of a member of an archive (``zip://<member>::<archive
+        # href>``) is the version of the archive, which is also cheaper to
+        # get than opening the archive
+        fs, path = url_to_fs(href.split("::")[-1])
+        info = fs.info(path)
+        version = next(
+            (str(info[x]) for x in VERSION_FIELDS if info.get(x) is not None),
+            "")
+        return hashlib.sha256(f"{href}\0{info.get('size')}\0{version}".encode(
+            "utf-8")).hexdigest()
+
+    def read(self, href: str) -> bytes:
+        """Returns the content of a file, from the cache if it is there, and
+        caches it otherwise."""
+        path = os.path.join(self.directory,
+                            self.key(href) + CACHE_FILE_EXTENSION)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            pass
+        else:
+            # The modification time of the cached files orders them by
+            # last use
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                self.hits += 1
+            return data
+
+        with fsspec.open(href, "rb") as f:
+            data = f.read()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.misses += 1
+            self.bytes_downloaded += len(data)
+            self._size += len(data)
+            if self._size > self.max_size:
+                self._evict()
+        return data
+
+    def _evict(self) -> None:
+        # Removes the least recently used files down to 90% of the limit, so
+        # that the directory is not scanned on every miss
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= 0.9 * self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self._size -= size
+            self.evictions += 1
+
+    @property
+    def size(self) -> int:
+        """The size of the cached files, in bytes."""
+        return self._size
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """The hits, misses, evictions, bytes downloaded and size of the
+        cache since it was created."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "bytes_downloaded": self.bytes_downloaded,
+                "size": self._size,
+            }
+
+
+_cache: Optional[XmlCache] = None
+
+
+def enable_xml_cache(directory: str,
+                     max_size: int = DEFAULT_MAX_SIZE,
+                     revalidate: bool = True) -> XmlCache:
+    """Caches all XML reads of granules in ``directory`` from now on.
+
+    Args:
+        directory (str): The directory of the cache.
+        max_size (int): The size limit of the cache, in bytes.
+        revalidate (bool): Whether to check that a cached file is the
+            current version of the file. See :class:`XmlCache`.
+
+    Returns:
+        XmlCache: The cache, for its :attr:`XmlCache.stats`.
+    """
+    global _cache
+    _cache = XmlCache(directory, max_size, revalidate)
+    return _cache
+
+
+def disable_xml_cache() -> None:
+    """Stops caching XML reads."""
+    global _cache
+    _cache = None
+
+
+def get_xml_cache() -> Optional[XmlCache]:
+    """Returns the cache of XML reads, or None if they are not cached."""
+    return _cache
+
+
+@contextmanager
+def open_xml(href: str, profile: Optional[Profile] = None) -> Iterator[Any]:
+    """Opens an XML file of a granule for binary reading, through the cache
+    if it is enabled.
+
+    Args:
+        href (str): The HREF to the file.
+        profile (Optional[Profile]): If given, the open and the bytes read
+            are accounted for in this profile.
+    """
+    cache = _cache
+    if cache is None:
+        opened = (fsspec.open(href, "rb")
+                  if profile is None else profile.open(href))
+        with opened as f:
+            yield f
+        return
+
+    data = cache.read(href)
+    if profile is not None:
+        profile.record_open(href)
+        profile.record_read(href, len(data))
+    yield io.BytesIO(data)
@@ -1,3 +1,7 @@
 from stactools.testing import TestData
 
 test_data = TestData(__file__)
+
+GRANULE_NAME = (
+    "S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE")
+GRANULE_HREF = test_data.get_path(f"data-files/{GRANULE_NAME}")
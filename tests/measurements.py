@@ -0,0 +1,44 @@
+from typing import Any, Optional
+
+import numpy as np
+import rasterio
+from rasterio.control import GroundControlPoint
+
+
+def write_measurement(path: str,
+                      data: Optional[np.ndarray] = None,
+                      **kwargs: Any) -> np.ndarray:
+    """Writes a GeoTIFF like the Sentinel-1 measurements, which are uint16
+    and located by a 10 x 21 grid of GCPs.
+
+    Args:
+        path (str): The path of the file to write.
+        data (Optional[np.ndarray]): The ``(1, height, width)`` image.
+            Defaults to 1000 x 2000 ones of the ``dtype`` in ``kwargs``.
+        kwargs: Creation options that override the defaults. With a
+            ``transform``, the image is not located by GCPs.
+
+    Returns:
+        np.ndarray: The image written.
+    """
+    if data is None:
+        data = np.ones((1, 1000, 2000), dtype=kwargs.get("dtype", "uint16"))
+    _, height, width = data.shape
+    profile = dict(driver="GTiff",
+                   width=width,
+                   height=height,
+                   count=1,
+                   dtype=data.dtype.name,
+                   crs="EPSG:4326")
+    if "transform" not in kwargs:
+        profile["gcps"] = [
+            GroundControlPoint(row=row * (height // 10),
+                               col=col * (width // 20),
+                               x=10 + col * 0.01,
+                               y=50 + row * 0.01,
+                               z=0) for row in range(10) for col in range(21)
+        ]
+    profile.update(kwargs)
+    with rasterio.open(path, "w", **profile) as dataset:
+        dataset.write(data)
+    return data
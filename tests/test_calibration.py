@@ -0,0 +1,89 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from stactools.sentinel1_grd.calibration import (CALIBRATION_LUTS,
+                                                 CalibrationLUT,
+                                                 interpolation_weights,
+                                                 parse_numbers,
+                                                 read_calibration)
+from stactools.sentinel1_grd.metadata_links import MetadataLinks
+from tests import test_data
+
+GRANULE_HREF = test_data.get_path(
+    "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE"
+)
+CALIBRATION_HREF = os.path.join(
+    GRANULE_HREF, "annotation", "calibration",
+    "calibration-s1a-iw-grd-vv-20210809t173953-20210809t174018-039156-049f13-001.xml"
+)
+
+
+class CalibrationTest(unittest.TestCase):
+    def test_parses_calibration_vectors(self):
+        lut = CalibrationLUT.from_xml(CALIBRATION_HREF)
+
+        self.assertEqual(lut.polarisation, "VV")
+        self.assertEqual(lut.absolute_calibration_constant, 1.0)
+        self.assertEqual(lut.line.shape, (27, ))
+        self.assertEqual(lut.line[:2].tolist(), [0, 667])
+        self.assertEqual(lut.pixel.shape, (27, 655))
+        self.assertEqual(lut.pixel[0, :2].tolist(), [0, 40])
+        for name in CALIBRATION_LUTS:
+            values = getattr(lut, name)
+            self.assertEqual(values.shape, (27, 655))
+            self.assertEqual(values.dtype, np.float32)
+        self.assertAlmostEqual(float(lut.sigma_nought[0, 0]), 662.8682, 3)
+        self.assertAlmostEqual(float(lut.gamma[0, 0]), 614.4983, 3)
+
+    def test_interpolation_weights(self):
+        xp = parse_numbers(["0 10", "20"], np.int64)
+        self.assertEqual(xp.tolist(), [0, 10, 20])
+
+        below, above, weight = interpolation_weights(
+            np.array([-5, 0, 5, 10, 25]), xp)
+        self.assertEqual(below.tolist(), [0, 0, 0, 1, 1])
+        self.assertEqual(above.tolist(), [1, 1, 1, 2, 2])
+        self.assertEqual(weight.tolist(), [0, 0, 0.5, 0, 1])
+
+        below, above, weight = interpolation_weights(np.array([3]), xp[:1])
+        self.assertEqual((below.tolist(), above.tolist(), weight.tolist()),
+                         ([0], [0], [0]))
+
+    def test_interpolates_onto_window(self):
+        lut = CalibrationLUT.from_xml(CALIBRATION_HREF)
+
+        # At the calibration vector samples, the values are the samples
+        window = lut.interpolate(((0, 668), (0, 41)))
+        self.assertEqual(window.shape, (668, 41))
+        self.assertEqual(window.dtype, np.float32)
+        self.assertAlmostEqual(window[0, 0], lut.sigma_nought[0, 0], 3)
+        self.assertAlmostEqual(window[0, 40], lut.sigma_nought[0, 1], 3)
+        self.assertAlmostEqual(window[667, 40], lut.sigma_nought[1, 1], 3)
+
+        # Half way between samples, the values are the mean of the samples
+        window = lut.interpolate(((0, 1), (20, 21)), "beta_nought")
+        self.assertAlmostEqual(
+            window[0,
+                   0], (lut.beta_nought[0, 0] + lut.beta_nought[0, 1]) / 2, 3)
+
+    def test_caches_calibration_vectors(self):
+        with TemporaryDirectory() as cache_dir:
+            lut = read_calibration(CALIBRATION_HREF, cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            cached = read_calibration(CALIBRATION_HREF, cache_dir)
+            self.assertIsInstance(cached.sigma_nought, np.memmap)
+            self.assertEqual(cached.polarisation, "VV")
+            for name in CALIBRATION_LUTS:
+                np.testing.assert_array_equal(getattr(cached, name),
+                                              getattr(lut, name))
+            np.testing.assert_array_equal(
+                cached.interpolate(((100, 110), (1000, 1010)), "dn"),
+                lut.interpolate(((100, 110), (1000, 1010)), "dn"))
+
+    def test_reads_calibrations_by_polarisation(self):
+        luts = MetadataLinks(GRANULE_HREF).read_calibrations()
+        self.assertEqual(set(luts), {"VV", "VH"})
@@ -0,0 +1,68 @@
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pystac
+import rasterio
+
+from stactools.sentinel1_grd.cog import convert_to_cog, overview_factors
+from stactools.sentinel1_grd.stac import create_item
+from tests import GRANULE_HREF, GRANULE_NAME
+from tests.measurements import write_measurement
+
+
+def _write_measurement(path: str) -> np.ndarray:
+    # A striped image, so that the conversion can be checked pixel by pixel
+    return write_measurement(
+        path,
+        np.arange(700 * 1200, dtype=np.uint16).reshape(1, 700, 1200))
+
+
+class CogTest(unittest.TestCase):
+    def test_overview_factors(self):
+        self.assertEqual(overview_factors(25000, 17000), [2, 4, 8, 16, 32, 64])
+        self.assertEqual(overview_factors(512, 300), [])
+        self.assertEqual(overview_factors(513, 300), [2])
+
+    def test_convert_to_cog(self):
+        with TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "iw-vv.tiff")
+            data = _write_measurement(src)
+            dst = os.path.join(tmp, "cogs", "iw-vv.tif")
+
+            self.assertEqual(
+                convert_to_cog(src, dst, threads=3, block_size=256), dst)
+
+            self.assertEqual(os.listdir(os.path.dirname(dst)), ["iw-vv.tif"])
+            with rasterio.open(dst) as dataset:
+                self.assertEqual(dataset.block_shapes, [(256, 256)])
+                self.assertEqual(dataset.overviews(1), [2, 4, 8])
+                gcps, crs = dataset.gcps
+                self.assertEqual(len(gcps), 210)
+                self.assertEqual(crs.to_epsg(), 4326)
+                np.testing.assert_array_equal(dataset.read(), data)
+
+    def test_create_item_with_cogs(self):
+        with TemporaryDirectory() as tmp:
+            granule_href = os.path.join(tmp, GRANULE_NAME)
+            shutil.copytree(GRANULE_HREF, granule_href)
+            measurement_dir = os.path.join(granule_href, "measurement")
+            for name in os.listdir(measurement_dir):
+                _write_measurement(os.path.join(measurement_dir, name))
+
+            cog_dir = os.path.join(tmp, "cogs")
+            item = create_item(granule_href, cog_dir=cog_dir)
+
+            for key in ["vv", "vh"]:
+                asset = item.assets[key]
+                self.assertEqual(os.path.dirname(asset.href), cog_dir)
+                self.assertTrue(asset.href.endswith(".tif"))
+                self.assertEqual(asset.media_type, pystac.MediaType.COG)
+                self.assertEqual(asset.extra_fields["proj:shape"], [700, 1200])
+                self.assertEqual(asset.extra_fields["file:size"],
+                                 os.path.getsize(asset.href))
+                self.assertNotIn("file:checksum", asset.extra_fields)
+                with rasterio.open(asset.href) as dataset:
+                    self.assertEqual(dataset.overviews(1), [2, 4])
@@ -1,13 +1,22 @@
+import importlib.util
+import json
 import os
+import shutil
+import unittest
 import pystac
 from stactools.testing import CliTestCase
 from pystac.utils import is_absolute_href
 from tests import test_data
 from tempfile import TemporaryDirectory
 from pystac.extensions.eo import EOExtension
+from pystac.validation import RegisteredValidator, set_validator
 
-from stactools.sentinel1_grd.constants import SENTINEL_POLARISATIONS
+from stactools.sentinel1_grd.constants import (SENTINEL_LICENSE,
+                                               SENTINEL_POLARISATIONS)
 from stactools.sentinel1_grd.commands import create_sentinel1grd_command
+from stactools.sentinel1_grd.stac import create_item
+from stactools.sentinel1_grd.validation import use_bundled_schemas
+from stactools.sentinel1_grd.xml_cache import disable_xml_cache
 
 
 class CreateItemTest(CliTestCase):
@@ -31,6 +40,10 @@ class CreateItemTest(CliTestCase):
 
                 item = pystac.Item.from_file(os.path.join(tmp_dir, fname))
 
+                # Against the bundled schemas, which does not need the network
+                self.addCleanup(set_validator,
+                                RegisteredValidator.get_validator())
+                use_bundled_schemas()
                 item.validate()
 
                 self.assertEqual(item.id, item_id)
@@ -52,3 +65,337 @@ class CreateItemTest(CliTestCase):
                         x.lower() in list(SENTINEL_POLARISATIONS.keys()))
                     for x in bands_seen
                 ]
+
+    def test_create_items(self):
+        granule_href = test_data.get_path(
+            "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE"
+        )
+
+        with TemporaryDirectory() as src_dir, TemporaryDirectory() as tmp_dir:
+            shutil.copytree(
+                granule_href,
+                os.path.join(src_dir, os.path.basename(granule_href)))
+            # A granule with an unreadable manifest must not stop the batch
+            broken_href = os.path.join(src_dir, "S1A_BROKEN.SAFE")
+            os.mkdir(broken_href)
+            with open(os.path.join(broken_href, "manifest.safe"), "w") as f:
+                f.write("not xml")
+
+            cmd = [
+                "sentinel1grd", "create-items", src_dir, tmp_dir, "--workers",
+                "2"
+            ]
+            result = self.run_command(cmd)
+            self.assertEqual(result.exit_code, 0, msg=result.output)
+
+            item_paths = [
+                p for p in os.listdir(tmp_dir)
+                if p.endswith(".json") and p != "failures.json"
+            ]
+            self.assertEqual(len(item_paths), 1)
+            item = pystac.Item.from_file(os.path.join(tmp_dir, item_paths[0]))
+            self.assertEqual(
+                item.id,
+                "S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8"
+            )
+
+            with open(os.path.join(tmp_dir, "failures.json")) as f:
+                failures = json.load(f)
+            self.assertEqual([x["href"] for x in failures], [broken_href])
+
+    def test_create_items_uses_fsspec(self):
+        import stactools.core
+        from pystac.stac_io import DefaultStacIO
+        from stactools.core.io import FsspecStacIO
+
+        from stactools.sentinel1_grd.batch import create_items
+
+        granule_href = test_data.get_path(
+            "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE"
+        )
+        self.addCleanup(stactools.core.use_fsspec)
+
+        class CustomStacIO(DefaultStacIO):
+            pass
+
+        with TemporaryDirectory() as tmp_dir:
+            # The Python API sets up fsspec itself, without a command
+            pystac.StacIO.set_default(DefaultStacIO)
+            result = create_items([granule_href], tmp_dir, workers=1)
+            self.assertEqual(len(result.item_hrefs), 1)
+            self.assertIsInstance(pystac.StacIO.default(), FsspecStacIO)
+
+            # But keeps a StacIO set by the caller
+            pystac.StacIO.set_default(CustomStacIO)
+            create_items([granule_href], tmp_dir, workers=1)
+            self.assertIsInstance(pystac.StacIO.default(), CustomStacIO)
+
+            # And so do the commands
+            result = self.run_command(
+                ["sentinel1grd", "create-item", granule_href, tmp_dir])
+            self.assertEqual(result.exit_code, 0, msg=result.output)
+            self.assertIsInstance(pystac.StacIO.default(), CustomStacIO)
+
+    def test_create_items_skips_unchanged_granules(self):
+        granule_href = test_data.get_path(
+            "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE"
+        )
+
+        with TemporaryDirectory() as src_dir, TemporaryDirectory() as tmp_dir:
+            src_href = os.path.join(src_dir, os.path.basename(granule_href))
+            shutil.copytree(granule_href, src_href)
+            index_path = os.path.join(src_dir, "index.sqlite")
+            cmd = [
+                "sentinel1grd", "create-items", src_dir, tmp_dir, "--workers",
+                "1", "--index", index_path
+            ]
+
+            result = self.run_command(cmd)
+            self.assertIn("Created 1 item(s)", result.output)
+
+            result = self.run_command(cmd)
+            self.assertIn("Created 0 item(s)", result.output)
+            self.assertIn("(1 unchanged)", result.output)
+
+            # Touching the manifest marks the granule as changed
+            manifest_path = os.path.join(src_href, "manifest.safe")
+            stat = os.stat(manifest_path)
+            os.utime(manifest_path, (stat.st_atime, stat.st_mtime + 10))
+
+            result = self.run_command(cmd)
+            self.assertIn("Created 1 item(s)", result.output)
+
+            # So does deleting the item
+            for name in os.listdir(tmp_dir):
+                os.remove(os.path.join(tmp_dir, name))
+            result = self.run_command(cmd)
+            self.assertIn("Created 1 item(s)", result.output)
+
+            # Items created with other options are not up to date
+            result = self.run_command(cmd + ["--footprint-tolerance", "0"])
+            self.assertIn("Created 1 item(s)", result.output)
+            result = self.run_command(cmd + ["--footprint-tolerance", "0"])
+            self.assertIn("(1 unchanged)", result.output)
+
+    def test_create_item_with_profile(self):
+        granule_href = test_data.get_path(
+            "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE"
+        )
+
+        with TemporaryDirectory() as tmp_dir:
+            profile_path = os.path.join(tmp_dir, "profile.json")
+            cmd = [
+                "sentinel1grd", "create-item", granule_href, tmp_dir,
+                "--profile", profile_path
+            ]
+            result = self.run_command(cmd)
+            self.assertEqual(result.exit_code, 0, msg=result.output)
+
+            with open(profile_path) as f:
+                profile = json.load(f)
+            self.assertEqual(profile["granule_href"], granule_href)
+            self.assertIn("serialization", profile["phases"])
+            self.assertGreaterEqual(profile["total"],
+                                    profile["phases"]["serialization"])
+            self.assertGreater(profile["bytes_read"], 0)
+
+    def test_create_item_with_xml_cache(self):
+        granule_href = test_data.get_path(
+            "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE"
+        )
+        self.addCleanup(disable_xml_cache)
+
+        with TemporaryDirectory() as tmp_dir:
+            cache_dir = os.path.join(tmp_dir, "cache")
+            cmd = [
+                "sentinel1grd", "create-item", granule_href, tmp_dir,
+                "--xml-cache", cache_dir
+            ]
+            result = self.run_command(cmd)
+            self.assertEqual(result.exit_code, 0, msg=result.output)
+            self.assertIn("0 hit(s), 2 miss(es)", result.output)
+
+            result = self.run_command(cmd)
+            self.assertIn("2 hit(s), 0 miss(es)", result.output)
+
+            # Trusted entries are keyed on the HREF only
+            result = self.run_command(cmd + ["--xml-cache-trust"])
+            self.assertIn("0 hit(s), 2 miss(es)", result.output)
+            result = self.run_command(cmd + ["--xml-cache-trust"])
+            self.assertIn("2 hit(s), 0 miss(es)", result.output)
+
+    def test_create_collection(self):
+        granule_href = test_data.get_path(
+            "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE"
+        )
+
+        with TemporaryDirectory() as src_dir, TemporaryDirectory() as tmp_dir:
+            granule_list = os.path.join(src_dir, "granules.txt")
+            broken_href = os.path.join(src_dir, "S1A_BROKEN.SAFE")
+            with open(granule_list, "w") as f:
+                f.write(f"{granule_href}\n{broken_href}\n")
+
+            cmd = [
+                "sentinel1grd", "create-collection", granule_list, tmp_dir,
+                "--workers", "1"
+            ]
+            result = self.run_command(cmd)
+            self.assertEqual(result.exit_code, 0, msg=result.output)
+            self.assertIn("1 scene(s) failed", result.output)
+
+            collection = pystac.read_file(
+                os.path.join(tmp_dir, "collection.json"))
+            self.assertIsInstance(collection, pystac.Collection)
+            items = list(collection.get_all_items())
+            self.assertEqual(len(items), 1)
+            self.assertEqual(items[0].collection_id, collection.id)
+            self.assertEqual(items[0].get_root().id, collection.id)
+
+            self.assertEqual(collection.extent.spatial.bboxes, [items[0].bbox])
+            self.assertEqual(
+                collection.extent.temporal.intervals,
+                [[
+                    items[0].common_metadata.start_datetime,
+                    items[0].common_metadata.end_datetime
+                ]],
+            )
+            summaries = collection.summaries.to_dict()
+            self.assertEqual(summaries["sar:polarizations"], ["VH", "VV"])
+            self.assertEqual(summaries["sar:instrument_mode"], ["IW"])
+            self.assertEqual(summaries["platform"], ["SENTINEL-1A"])
+            self.assertEqual(summaries["sat:orbit_state"], ["ascending"])
+            self.assertEqual(summaries["sat:relative_orbit"], {
+                "minimum": 59,
+                "maximum": 59
+            })
+
+            # The item links are written after the other links, and the
+            # document is the collection itself
+            with open(os.path.join(tmp_dir, "collection.json")) as f:
+                collection_dict = json.load(f)
+            self.assertEqual(list(collection_dict)[-1], "links")
+            self.assertEqual(collection_dict["links"][-1]["rel"], "item")
+            collection_dict.pop("links")
+            expected = collection.to_dict()
+            expected.pop("links")
+            self.assertEqual(collection_dict, expected)
+
+            # The shared license link is not taken over by the collection
+            self.assertIsNone(SENTINEL_LICENSE.owner)
+
+    def test_create_items_as_ndjson(self):
+        granule_href = test_data.get_path(
+            "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE"
+        )
+
+        with TemporaryDirectory() as tmp_dir:
+            cmd = [
+                "sentinel1grd", "create-items", granule_href, tmp_dir,
+                "--workers", "1", "--format", "ndjson"
+            ]
+            result = self.run_command(cmd)
+            self.assertEqual(result.exit_code, 0, msg=result.output)
+
+            with open(os.path.join(tmp_dir, "items.ndjson")) as f:
+                lines = f.readlines()
+            self.assertEqual(len(lines), 1)
+            item = pystac.Item.from_dict(json.loads(lines[0]))
+            self.assertEqual(
+                item.id,
+                "S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8"
+            )
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"),
+                         "pyarrow is not installed")
+    def test_create_items_as_geoparquet(self):
+        import pyarrow.parquet as pq
+
+        granule_href = test_data.get_path(
+            "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE"
+        )
+
+        with TemporaryDirectory() as src_dir, TemporaryDirectory() as tmp_dir:
+            granule_list = os.path.join(src_dir, "granules.txt")
+            with open(granule_list, "w") as f:
+                f.write(f"{granule_href}\n" * 3)
+
+            cmd = [
+                "sentinel1grd", "create-items", granule_list, tmp_dir,
+                "--workers", "1", "--format", "geoparquet", "--row-group-size",
+                "2"
+            ]
+            result = self.run_command(cmd)
+            self.assertEqual(result.exit_code, 0, msg=result.output)
+
+            parquet_file = pq.ParquetFile(
+                os.path.join(tmp_dir, "items.parquet"))
+            self.assertEqual(parquet_file.metadata.num_rows, 3)
+            self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+            self.assertIn(b"geo", parquet_file.schema_arrow.metadata)
+
+            table = parquet_file.read()
+            self.assertEqual(
+                table.column("sar:polarizations").to_pylist(),
+                [["VV", "VH"]] * 3)
+            self.assertEqual(
+                set(
+                    table.column("assets").type[i].name
+                    for i in range(table.column("assets").type.num_fields)),
+                set(
+                    create_item(granule_href).to_dict(
+                        include_self_link=False)["assets"]),
+            )
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"),
+                         "pyarrow is not installed")
+    def test_write_geoparquet_with_mixed_schemas(self):
+        import pyarrow.parquet as pq
+
+        from stactools.sentinel1_grd.bulk import write_geoparquet
+
+        granule_href = test_data.get_path(
+            "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE"
+        )
+        item = create_item(granule_href).to_dict(include_self_link=False)
+        items = [json.loads(json.dumps(item)) for _ in range(3)]
+        # Columns missing from the first row of a row group, and from the
+        # first row group, must not be dropped
+        items[1]["properties"]["test:second"] = 2
+        items[1]["assets"]["extra"] = {"href": "extra.tif"}
+        items[2]["properties"]["test:third"] = "third"
+
+        with TemporaryDirectory() as tmp_dir:
+            href = os.path.join(tmp_dir, "items.parquet")
+            self.assertEqual(write_geoparquet(items, href, row_group_size=2),
+                             3)
+            parquet_file = pq.ParquetFile(href)
+            self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+            table = parquet_file.read()
+
+        self.assertEqual(
+            table.column("test:second").to_pylist(), [None, 2, None])
+        self.assertEqual(
+            table.column("test:third").to_pylist(), [None, None, "third"])
+        self.assertEqual([
+            x and x["href"] for x in table.column(
+                "assets").combine_chunks().field("extra").to_pylist()
+        ], [None, "extra.tif", None])
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"),
+                         "pyarrow is not installed")
+    def test_create_items_as_geoparquet_when_every_granule_fails(self):
+        import pyarrow.parquet as pq
+
+        from stactools.sentinel1_grd.batch import create_items_bulk
+
+        with TemporaryDirectory() as tmp_dir:
+            href = os.path.join(tmp_dir, "items.parquet")
+            result = create_items_bulk(["/does/not/exist.SAFE"],
+                                       href,
+                                       output_format="geoparquet",
+                                       workers=1)
+
+            self.assertEqual(result.item_count, 0)
+            self.assertEqual([x[0] for x in result.failures],
+                             ["/does/not/exist.SAFE"])
+            self.assertEqual(pq.ParquetFile(href).metadata.num_rows, 0)
@@ -0,0 +1,74 @@
+import subprocess
+import sys
+import unittest
+from typing import Dict
+
+# Modules that item creation needs, and that must not be imported before it
+ITEM_CREATION_MODULES = [
+    "stactools.sentinel1_grd.stac",
+    "stactools.sentinel1_grd.annotation",
+    "stactools.sentinel1_grd.manifest",
+    "lxml",
+]
+
+# Modules that only the optional stages need
+OPTIONAL_MODULES = ["rasterio", "pyarrow"]
+
+
+def import_times(code: str) -> Dict[str, int]:
+    """Runs ``code`` in a new interpreter with ``-X importtime``.
+
+    Returns:
+        Dict[str, int]: The cumulative import time of every module the code
+        imported, in microseconds.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            stderr=subprocess.PIPE,
+                            universal_newlines=True,
+                            check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+class ImportTest(unittest.TestCase):
+    def test_import_package(self):
+        times = import_times("import stactools.sentinel1_grd")
+
+        self.assertIn("stactools.sentinel1_grd", times)
+        for module in ITEM_CREATION_MODULES + OPTIONAL_MODULES + [
+                "stactools.core", "pystac", "shapely", "numpy", "fsspec"
+        ]:
+            self.assertNotIn(module, times)
+
+    def test_register_plugin(self):
+        # The stactools CLI imports stactools.core before the plugins
+        times = import_times(
+            "import stactools.core\n"
+            "import stactools.sentinel1_grd\n"
+            "class Registry:\n"
+            "    def register_subcommand(self, command):\n"
+            "        pass\n"
+            "stactools.sentinel1_grd.register_plugin(Registry())\n")
+
+        self.assertIn("stactools.sentinel1_grd.commands", times)
+        for module in ITEM_CREATION_MODULES + OPTIONAL_MODULES:
+            self.assertNotIn(module, times)
+
+    def test_create_item_is_imported_lazily(self):
+        times = import_times("from stactools.sentinel1_grd import create_item")
+
+        self.assertIn("stactools.sentinel1_grd.stac", times)
+        for module in OPTIONAL_MODULES:
+            self.assertNotIn(module, times)
+
+    def test_unknown_attribute(self):
+        import stactools.sentinel1_grd
+
+        with self.assertRaises(AttributeError):
+            stactools.sentinel1_grd.does_not_exist
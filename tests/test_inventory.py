@@ -0,0 +1,148 @@
+import os
+import unittest
+from datetime import datetime, timezone
+from tempfile import TemporaryDirectory
+
+import numpy as np
+from stactools.testing import CliTestCase
+
+from stactools.sentinel1_grd.commands import create_sentinel1grd_command
+from stactools.sentinel1_grd.inventory import (InventoryIndex,
+                                               parse_scene_names, scene_name)
+
+NAME = "S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8"
+
+LISTING = [
+    f"s3://bucket/{NAME}.SAFE",
+    # A reprocessing of the same scene
+    "s3://bucket/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_"
+    "049F13_A1B2.SAFE",
+    "s3://bucket/S1B_EW_GRDM_1SDH_20210810T060000_20210810T060030_028000_"
+    "0357A1_0C1D.SAFE.zip",
+    "s3://bucket/S1A_IW_GRDH_1SSV_20210821T173953_20210821T174018_039331_"
+    "04A4C2_1234/",
+]
+
+
+class SceneNamesTest(unittest.TestCase):
+    def test_scene_name(self):
+        self.assertEqual(scene_name(f"/data/{NAME}.SAFE/"), NAME)
+        self.assertEqual(scene_name(f"s3://bucket/{NAME}.SAFE.zip"), NAME)
+        self.assertEqual(scene_name(f"az://container/{NAME}"), NAME)
+
+    def test_parses_names(self):
+        names = parse_scene_names(LISTING)
+
+        self.assertEqual(len(names), 4)
+        self.assertTrue(names.valid.all())
+        self.assertEqual(names.name[0], NAME)
+        self.assertEqual(names.platform.tolist(), ["S1A", "S1A", "S1B", "S1A"])
+        self.assertEqual(names.mode[2], "EW")
+        self.assertEqual(names.product_type[0], "GRD")
+        self.assertEqual(names.resolution[2], "M")
+        self.assertEqual(names.polarisation.tolist(), ["DV", "DV", "DH", "SV"])
+        self.assertEqual(names.start_datetime[0],
+                         np.datetime64("2021-08-09T17:39:53"))
+        self.assertEqual(names.end_datetime[0],
+                         np.datetime64("2021-08-09T17:40:18"))
+        self.assertEqual(names.absolute_orbit[0], 39156)
+        # As in the manifest of the test scene
+        self.assertEqual(names.relative_orbit[0], 59)
+        self.assertEqual(names.datatake_id[0], 302867)
+        self.assertEqual(names.unique_id.tolist(),
+                         ["6FF8", "A1B2", "0C1D", "1234"])
+        self.assertEqual(names.scene_key[0], names.scene_key[1])
+        self.assertNotEqual(names.scene_key[0], names.scene_key[3])
+
+    def test_invalid_names(self):
+        names = parse_scene_names([
+            NAME,
+            "manifest.safe",
+            NAME.replace("20210809T173953", "20210230T173953"),
+            NAME.replace("039156", "03915X"),
+            NAME + "_extra",
+        ])
+
+        self.assertEqual(names.valid.tolist(),
+                         [True, False, False, False, False])
+        self.assertTrue(np.isnat(names.start_datetime[1:]).all())
+
+
+class InventoryIndexTest(unittest.TestCase):
+    def test_missing_and_duplicates(self):
+        with TemporaryDirectory() as tmp_dir:
+            with InventoryIndex(os.path.join(tmp_dir, "inventory.db"),
+                                batch_size=2) as index:
+                self.assertEqual(index.add_scenes(LISTING + ["not-a-scene"]),
+                                 4)
+                # Catalogued under another reprocessing
+                self.assertEqual(
+                    index.add_catalogued([
+                        "S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_"
+                        "039156_049F13_FFFF"
+                    ]), 1)
+                self.assertEqual(len(index), 4)
+
+                missing = list(index.missing())
+                self.assertEqual([x["href"] for x in missing],
+                                 [LISTING[2], LISTING[3]])
+                self.assertEqual(missing[0]["datatake_id"], 0x0357A1)
+
+                self.assertEqual(
+                    [
+                        x["href"] for x in index.missing(
+                            start=datetime(2021, 8, 15, tzinfo=timezone.utc))
+                    ],
+                    [LISTING[3]],
+                )
+                self.assertEqual(
+                    [x["href"] for x in index.missing(max_orbit=30000)],
+                    [LISTING[2]])
+                # 12 days and 175 orbits after the catalogued scene
+                self.assertEqual(
+                    [x["href"] for x in index.missing(relative_orbit=59)],
+                    [LISTING[3]])
+
+                self.assertEqual(list(index.duplicates()), [
+                    ("S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_"
+                     "049F13", [
+                         "S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_"
+                         "039156_049F13_6FF8",
+                         "S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_"
+                         "039156_049F13_A1B2"
+                     ])
+                ])
+
+
+class InventoryCommandsTest(CliTestCase):
+    def create_subcommand_functions(self):
+        return [create_sentinel1grd_command]
+
+    def test_inventory_commands(self):
+        with TemporaryDirectory() as tmp_dir:
+            listing = os.path.join(tmp_dir, "listing.txt")
+            with open(listing, "w") as f:
+                f.write("\n".join(LISTING) + "\n")
+            catalogue = os.path.join(tmp_dir, "catalogue.txt")
+            with open(catalogue, "w") as f:
+                f.write(NAME + "\n")
+            inventory = os.path.join(tmp_dir, "inventory.db")
+
+            result = self.run_command([
+                "sentinel1grd", "create-inventory", listing, inventory,
+                "--catalogue", catalogue
+            ])
+            self.assertEqual(result.exit_code, 0, msg=result.output)
+            self.assertIn("Indexed 4 scene(s) and 1 catalogued", result.output)
+
+            result = self.run_command([
+                "sentinel1grd", "missing-scenes", inventory, "--start",
+                "2021-08-10"
+            ])
+            self.assertEqual(result.exit_code, 0, msg=result.output)
+            self.assertEqual(result.output.split(), [LISTING[2], LISTING[3]])
+
+            result = self.run_command(
+                ["sentinel1grd", "duplicate-scenes", inventory])
+            self.assertEqual(result.exit_code, 0, msg=result.output)
+            self.assertEqual(len(result.output.splitlines()), 1)
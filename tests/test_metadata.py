@@ -1,19 +1,39 @@
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import shutil
 import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import fsspec
 import pystac
+from shapely.geometry import shape
 
+from pystac.extensions.file import FileExtension
 from pystac.extensions.sar import SarExtension
 from pystac.extensions.sat import SatExtension
 from pystac.extensions.projection import ProjectionExtension
+from stactools.sentinel1_grd.annotation import AnnotationError, AnnotationHeader
+from stactools.sentinel1_grd.manifest import SafeManifest
 from stactools.sentinel1_grd.metadata_links import MetadataLinks
-from stactools.sentinel1_grd.product_metadata import ProductMetadata
+from stactools.sentinel1_grd.batch import read_product_records
+from stactools.sentinel1_grd.product_metadata import (ProductMetadata,
+                                                      read_product_record)
+from stactools.sentinel1_grd.profiling import Profile
 
 from stactools.sentinel1_grd.properties import (
     fill_sar_properties,
     fill_sat_properties,
     fill_proj_properties,
+    multihash,
 )
+from stactools.sentinel1_grd.stac import create_item, create_item_async
+from stactools.sentinel1_grd.xml_cache import open_xml
 
-from tests import test_data
+from tests import GRANULE_HREF, GRANULE_NAME, test_data
 
 
 class Sentinel1MetadataTest(unittest.TestCase):
@@ -26,7 +46,10 @@ class Sentinel1MetadataTest(unittest.TestCase):
 
         metalinks = MetadataLinks(manifest_path)
 
-        product_metadata = ProductMetadata(metalinks.product_metadata_href)
+        product_metadata = ProductMetadata(metalinks.product_metadata_href,
+                                           metalinks.manifest)
+
+        annotation = AnnotationHeader(metalinks.annotation_hrefs[0])
 
         item = pystac.Item(
             id=product_metadata.scene_id,
@@ -40,21 +63,22 @@ class Sentinel1MetadataTest(unittest.TestCase):
         # ---- Add Extensions ----
         # sar
         sar = SarExtension.ext(item, add_if_missing=True)
-        fill_sar_properties(sar, metalinks.product_metadata_href)
+        fill_sar_properties(sar, metalinks.manifest, annotation)
 
         # sat
         sat = SatExtension.ext(item, add_if_missing=True)
-        fill_sat_properties(sat, metalinks.product_metadata_href)
+        fill_sat_properties(sat, metalinks.manifest)
 
         # proj
         proj = ProjectionExtension.ext(item, add_if_missing=True)
-        fill_proj_properties(proj, metalinks, product_metadata)
+        fill_proj_properties(proj, product_metadata, annotation)
 
         # Make a dictionary of the properties
         s1_props = {
             "bbox": item.bbox,
             "sar_band": item.properties["sar:frequency_band"],
             "centre_frequency": item.properties["sar:center_frequency"],
+            "pixel_spacing_range": item.properties["sar:pixel_spacing_range"],
             "polarizations": item.properties["sar:polarizations"],
             "epsg": item.properties["proj:epsg"],
             "product_type": item.properties["sar:product_type"],
@@ -65,12 +89,341 @@ class Sentinel1MetadataTest(unittest.TestCase):
             "bbox": (1.512143, 44.536255, 5.188996, 46.436539),
             "sar_band": "C",
             "centre_frequency": 5.405,
+            "pixel_spacing_range": 10.0,
             "polarizations": ["VV", "VH"],
             "epsg": 4326,
             "product_type": "GRD",
-            "shape": [26144, 16676],
+            "shape": [16676, 26144],
         }
 
         for k, v in expected.items():
             self.assertIn(k, s1_props)
             self.assertEqual(s1_props[k], v)
+
+    def test_product_record(self):
+        metalinks = MetadataLinks(GRANULE_HREF)
+        product_metadata = ProductMetadata(metalinks.product_metadata_href,
+                                           metalinks.manifest)
+
+        record = read_product_record(GRANULE_HREF)
+
+        self.assertEqual(record, product_metadata.to_record())
+        for name in [
+                "scene_id", "product_id", "start_datetime", "end_datetime",
+                "get_datetime", "platform", "cycle_number", "metadata_dict",
+                "geometry"
+        ]:
+            self.assertEqual(getattr(record, name),
+                             getattr(product_metadata, name), name)
+        self.assertEqual(record.bbox, product_metadata.bbox)
+        self.assertEqual(list(record.image_paths),
+                         product_metadata.image_paths)
+        self.assertEqual(record.absolute_orbit, 39156)
+        self.assertEqual(record.relative_orbit, 59)
+        self.assertEqual(record.orbit_state, "ASCENDING")
+        self.assertEqual(record.instrument_mode, "IW")
+        self.assertEqual(record.polarisations, ("VV", "VH"))
+        self.assertEqual(record.datatake_id, "302867")
+
+        # Immutable, slotted and cheap to pickle
+        with self.assertRaises(AttributeError):
+            record.platform = "SENTINEL-1B"
+        self.assertFalse(hasattr(record, "__dict__"))
+        data = pickle.dumps(record)
+        self.assertLess(len(data), 2048)
+        self.assertEqual(pickle.loads(data), record)
+
+    def test_read_product_records(self):
+        broken_href = "/does/not/exist.SAFE"
+
+        for workers in [1, 2]:
+            with self.subTest(workers=workers):
+                results = list(
+                    read_product_records([GRANULE_HREF, broken_href], workers))
+                self.assertEqual([x[0] for x in results],
+                                 [GRANULE_HREF, broken_href])
+                self.assertEqual(results[0][1].absolute_orbit, 39156)
+                self.assertIsNone(results[1][1])
+                self.assertIn("Error", results[1][2])
+
+    def test_create_item_reads_manifest_once(self):
+
+        with mock.patch("stactools.sentinel1_grd.manifest.open_xml",
+                        side_effect=open_xml) as read:
+            create_item(GRANULE_HREF)
+
+        manifest_reads = [
+            call for call in read.call_args_list
+            if call[0][0].endswith("manifest.safe")
+        ]
+        self.assertEqual(len(manifest_reads), 1)
+
+    def test_create_item_with_profile(self):
+        manifest_href = os.path.join(GRANULE_HREF, "manifest.safe")
+
+        profile = Profile(GRANULE_HREF)
+        item = create_item(GRANULE_HREF, profile)
+
+        self.assertEqual(item.to_dict(), create_item(GRANULE_HREF).to_dict())
+
+        profile_dict = json.loads(profile.to_json())
+        self.assertEqual(profile_dict["granule_href"], GRANULE_HREF)
+        for phase in [
+                "manifest_parse", "annotation_parse", "extension_fill",
+                "asset_building"
+        ]:
+            self.assertGreater(profile_dict["phases"][phase], 0)
+        self.assertEqual(profile_dict["files"][manifest_href], {
+            "opens": 1,
+            "bytes_read": os.path.getsize(manifest_href)
+        })
+
+        # Only the header of a single annotation file is read
+        annotation_reads = [
+            v for k, v in profile_dict["files"].items()
+            if os.path.dirname(k).endswith("annotation")
+        ]
+        self.assertEqual(len(annotation_reads), 1)
+        self.assertEqual(annotation_reads[0]["opens"], 1)
+        self.assertLess(annotation_reads[0]["bytes_read"], 200_000)
+
+    def test_reads_annotation_header(self):
+        annotation_href = os.path.join(
+            GRANULE_HREF, "annotation",
+            "s1a-iw-grd-vv-20210809t173953-20210809t174018-039156-049f13-001.xml"
+        )
+
+        header = AnnotationHeader(annotation_href)
+
+        self.assertEqual(header.number_of_samples, 26144)
+        self.assertEqual(header.number_of_lines, 16676)
+        self.assertEqual(header.range_pixel_spacing, 10.0)
+        self.assertEqual(header.azimuth_pixel_spacing, 10.0)
+        self.assertAlmostEqual(header.incidence_angle_mid_swath,
+                               38.972789,
+                               places=5)
+        self.assertEqual(header.product_quality_index, 0.0)
+        self.assertTrue(header.quality_flags["invalidDownlinkParamsFlag"])
+        self.assertFalse(
+            header.quality_flags["replicaReconstructionFailedFlag"])
+        self.assertIsNone(header.incidence_angle_near)
+
+        header = AnnotationHeader(annotation_href, incidence_angles=True)
+        self.assertAlmostEqual(header.incidence_angle_near,
+                               30.441577,
+                               places=5)
+        self.assertAlmostEqual(header.incidence_angle_far, 46.229947, places=5)
+
+    def test_reads_geolocation_grid(self):
+        annotation_href = os.path.join(
+            GRANULE_HREF, "annotation",
+            "s1a-iw-grd-vv-20210809t173953-20210809t174018-039156-049f13-001.xml"
+        )
+
+        header = AnnotationHeader(annotation_href, geolocation_grid=True)
+        grid = header.geolocation_grid
+
+        self.assertEqual(grid.shape, (10, 21))
+        self.assertEqual(grid.line[-1, 0], 16675)
+        self.assertEqual(grid.pixel[0, -1], 26143)
+        self.assertAlmostEqual(grid.latitude[0, 0], 44.53525246605311)
+        self.assertAlmostEqual(grid.longitude[0, 0], 1.929931301635841)
+        self.assertAlmostEqual(header.incidence_angle_near,
+                               grid.incidence_angle.min())
+        self.assertEqual(header.number_of_lines, 16676)
+
+        # The edge is a closed ring through every outer tie point
+        edge = grid.edge()
+        self.assertEqual(edge.shape, (2 * (10 + 21) - 4 + 1, 2))
+        self.assertEqual(edge[0].tolist(), edge[-1].tolist())
+
+        footprint = grid.footprint()
+        self.assertTrue(footprint.is_valid)
+        self.assertTrue(footprint.exterior.is_ccw)
+        self.assertEqual(len(footprint.exterior.coords), edge.shape[0])
+        simplified = grid.footprint(0.01)
+        self.assertLess(len(simplified.exterior.coords), edge.shape[0])
+        self.assertLess(
+            footprint.symmetric_difference(simplified).area,
+            0.01 * footprint.length)
+
+    def test_create_item_with_geolocation_grid_footprint(self):
+
+        manifest_item = create_item(GRANULE_HREF)
+        item = create_item(GRANULE_HREF, footprint_tolerance=0)
+
+        self.assertAlmostEqual(
+            manifest_item.properties["s1:incidence_angle_mid_swath"],
+            38.972789,
+            places=5)
+        self.assertNotIn("s1:incidence_angle_near", manifest_item.properties)
+        self.assertAlmostEqual(item.properties["s1:incidence_angle_near"],
+                               30.441577,
+                               places=5)
+        self.assertAlmostEqual(item.properties["s1:incidence_angle_far"],
+                               46.229947,
+                               places=5)
+
+        footprint = shape(item.geometry)
+        self.assertEqual(len(footprint.exterior.coords), 59)
+        self.assertEqual(list(item.bbox), list(footprint.bounds))
+        self.assertEqual(item.properties["proj:geometry"], item.geometry)
+        # The grid follows the swath, so it is close to the corner quad
+        manifest_footprint = shape(manifest_item.geometry)
+        self.assertGreater(
+            footprint.intersection(manifest_footprint).area /
+            footprint.union(manifest_footprint).area, 0.98)
+
+    def test_annotation_header_stops_after_image_information(self):
+        annotation_href = os.path.join(
+            GRANULE_HREF, "annotation",
+            "s1a-iw-grd-vv-20210809t173953-20210809t174018-039156-049f13-001.xml"
+        )
+        with open(annotation_href) as f:
+            text = f.read()
+
+        with TemporaryDirectory() as tmp_dir:
+            # Everything after the image annotation is cut off, which
+            # would make a full parse fail
+            truncated_href = os.path.join(tmp_dir, "annotation.xml")
+            with open(truncated_href, "w") as f:
+                f.write(text[:text.index("<dopplerCentroid>")])
+
+            header = AnnotationHeader(truncated_href)
+            with self.assertRaises(AnnotationError):
+                AnnotationHeader(truncated_href, geolocation_grid=True)
+
+            # Parsing stops again at the end of the geolocation grid
+            with open(truncated_href, "w") as f:
+                f.write(text[:text.index("</geolocationGrid>") +
+                             len("</geolocationGrid>")])
+            grid_header = AnnotationHeader(truncated_href,
+                                           geolocation_grid=True)
+
+        self.assertEqual(header.number_of_samples, 26144)
+        self.assertEqual(header.number_of_lines, 16676)
+        self.assertEqual(grid_header.geolocation_grid.shape, (10, 21))
+        self.assertAlmostEqual(grid_header.incidence_angle_far,
+                               46.229947,
+                               places=5)
+
+    def test_file_properties(self):
+        item = create_item(GRANULE_HREF)
+
+        self.assertTrue(FileExtension.has_extension(item))
+        self.assertEqual(
+            set(item.assets), {
+                "safe-manifest", "product-iw-vh", "product-iw-vv",
+                "calibration-iw-vh", "calibration-iw-vv", "noise-iw-vh",
+                "noise-iw-vv", "vh", "vv"
+            })
+        for key, asset in item.assets.items():
+            with self.subTest(key):
+                file_ext = FileExtension.ext(asset)
+                if asset.href.endswith(".tiff"):
+                    # The test measurements are empty, the manifest lists
+                    # the sizes of the originals
+                    self.assertEqual(file_ext.size, 872232364)
+                    continue
+                with open(asset.href, "rb") as f:
+                    data = f.read()
+                self.assertEqual(file_ext.size, len(data))
+                self.assertEqual(file_ext.checksum,
+                                 "d510" + hashlib.md5(data).hexdigest())
+
+        self.assertEqual(multihash("MD5", "ab" * 16), "d510" + "ab" * 16)
+        self.assertEqual(multihash("SHA-256", "ab" * 32), "1220" + "ab" * 32)
+        self.assertIsNone(multihash("CRC32", "abcd1234"))
+
+    def test_create_item_from_zipped_granule(self):
+        expected = create_item(GRANULE_HREF)
+
+        with TemporaryDirectory() as tmp_dir:
+            archive_href = shutil.make_archive(
+                os.path.join(tmp_dir, GRANULE_NAME),
+                "zip",
+                root_dir=os.path.dirname(GRANULE_HREF),
+                base_dir=GRANULE_NAME,
+            )
+
+            # Serve the archive from an in-memory filesystem to stand in
+            # for a remote store
+            remote_href = "memory://granules/granule.SAFE.zip"
+            with open(archive_href,
+                      "rb") as src, fsspec.open(remote_href, "wb") as dst:
+                dst.write(src.read())
+            self.addCleanup(fsspec.filesystem("memory").rm, remote_href)
+
+            for href in [archive_href, remote_href]:
+                with self.subTest(href):
+                    item = create_item(href)
+
+                    self.assertEqual(item.id, expected.id)
+                    self.assertEqual(item.properties, expected.properties)
+                    self.assertEqual(set(item.assets), set(expected.assets))
+                    for key, asset in item.assets.items():
+                        self.assertTrue(asset.href.startswith("zip://"))
+                        self.assertEqual(
+                            asset.extra_fields.get("file:checksum"),
+                            expected.assets[key].extra_fields.get(
+                                "file:checksum"))
+                        self.assertTrue(asset.href.endswith(f"::{href}"))
+
+    def test_create_item_from_root_level_zipped_granule(self):
+        expected = create_item(GRANULE_HREF)
+
+        with TemporaryDirectory() as tmp_dir:
+            # The content of the SAFE directory is at the archive root
+            archive_href = shutil.make_archive(
+                os.path.join(tmp_dir, GRANULE_NAME), "zip", GRANULE_HREF)
+            manifest = SafeManifest(archive_href)
+            self.assertIs(manifest.root, manifest.root)
+            self.assertEqual(
+                manifest.data_object.size,
+                os.path.getsize(os.path.join(GRANULE_HREF, "manifest.safe")))
+            item = create_item(archive_href)
+
+        self.assertEqual(manifest.granule_name, GRANULE_NAME)
+        self.assertEqual(manifest.href, f"zip://manifest.safe::{archive_href}")
+        self.assertEqual(item.id, expected.id)
+        self.assertEqual(item.properties, expected.properties)
+
+    def test_create_item_inside_running_event_loop(self):
+        expected = create_item(GRANULE_HREF)
+
+        async def create():
+            return create_item(GRANULE_HREF)
+
+        item = asyncio.run(create())
+
+        self.assertEqual(item.to_dict(), expected.to_dict())
+
+    def test_create_item_async_from_remote_granule(self):
+        expected = create_item(GRANULE_HREF)
+
+        # Copy the granule to an in-memory filesystem to stand in for a
+        # remote store, where os.listdir cannot be used
+        remote_href = f"memory://granules/{GRANULE_NAME}"
+        memory_fs = fsspec.filesystem("memory")
+        memory_fs.put(GRANULE_HREF, remote_href, recursive=True)
+        self.addCleanup(memory_fs.rm, remote_href, recursive=True)
+
+        item = asyncio.run(create_item_async(remote_href))
+
+        self.assertEqual(item.id, expected.id)
+        self.assertEqual(item.properties, expected.properties)
+        self.assertEqual(set(item.assets), set(expected.assets))
+        for asset in item.assets.values():
+            self.assertTrue(asset.href.startswith(remote_href))
+
+    def test_create_item_without_annotation(self):
+
+        with TemporaryDirectory() as tmp_dir:
+            copy_href = os.path.join(tmp_dir, GRANULE_NAME)
+            shutil.copytree(GRANULE_HREF, copy_href)
+            for name in os.listdir(os.path.join(copy_href, "annotation")):
+                if name.endswith("xml"):
+                    os.remove(os.path.join(copy_href, "annotation", name))
+
+            with self.assertRaisesRegex(AnnotationError, copy_href):
+                create_item(copy_href)
@@ -0,0 +1,91 @@
+import os
+import unittest
+
+import fsspec
+import numpy as np
+
+from stactools.sentinel1_grd.calibration import block_windows
+from stactools.sentinel1_grd.metadata_links import MetadataLinks
+from stactools.sentinel1_grd.noise import NoiseVectors
+from tests import test_data
+
+GRANULE_HREF = test_data.get_path(
+    "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE"
+)
+NOISE_HREF = os.path.join(
+    GRANULE_HREF, "annotation", "calibration",
+    "noise-s1a-iw-grd-vv-20210809t173953-20210809t174018-039156-049f13-001.xml"
+)
+
+# Noise of products before IPF 2.9, with range vectors only
+LEGACY_NOISE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<noise>
+  <adsHeader><polarisation>HH</polarisation></adsHeader>
+  <noiseVectorList count="2">
+    <noiseVector><line>0</line><pixel>0 10 20</pixel>
+      <noiseLut>1.0 2.0 3.0</noiseLut></noiseVector>
+    <noiseVector><line>10</line><pixel>0 20</pixel>
+      <noiseLut>3.0 5.0</noiseLut></noiseVector>
+  </noiseVectorList>
+</noise>
+"""
+
+
+class NoiseTest(unittest.TestCase):
+    def test_parses_noise_vectors(self):
+        noise = NoiseVectors.from_xml(NOISE_HREF)
+
+        self.assertEqual(noise.polarisation, "VV")
+        self.assertEqual(noise.range_line.shape, (26, ))
+        self.assertEqual(noise.range_offsets[-1], 26 * 657)
+        self.assertEqual(noise.range_lut.dtype, np.float32)
+        self.assertAlmostEqual(float(noise.range_lut[0]), 2392.147, 3)
+        self.assertEqual(noise.azimuth_swath, ["IW1", "IW2", "IW3"])
+        self.assertEqual(noise.azimuth_bounds[1].tolist(),
+                         [0, 8760, 16675, 17560])
+        self.assertEqual(noise.azimuth_offsets.tolist(), [0, 1687, 3374, 5061])
+
+    def test_interpolates_noise_field(self):
+        noise = NoiseVectors.from_xml(NOISE_HREF)
+
+        field = noise.interpolate(((0, 2), (8759, 8762)))
+        self.assertEqual(field.shape, (2, 3))
+        self.assertEqual(field.dtype, np.float32)
+        # Each swath has its own azimuth gain
+        iw1_gain, iw2_gain = noise.azimuth_lut[[0, 1687]]
+        range_noise = np.interp([8759, 8760], noise.range_pixel[:657],
+                                noise.range_lut[:657])
+        self.assertAlmostEqual(field[0, 0] / (range_noise[0] * iw1_gain), 1, 5)
+        self.assertAlmostEqual(field[0, 1] / (range_noise[1] * iw2_gain), 1, 5)
+
+    def test_yields_noise_blocks(self):
+        noise = NoiseVectors.from_xml(NOISE_HREF)
+        shape = (1500, 900)
+
+        blocks = list(noise.blocks(shape, block_rows=400, block_cols=500))
+        self.assertEqual([window for window, _ in blocks],
+                         list(block_windows(shape, 400, 500)))
+        self.assertEqual(len(blocks), 8)
+        self.assertEqual(blocks[-1][0], ((1200, 1500), (500, 900)))
+
+        field = noise.interpolate(((0, 1500), (0, 900)))
+        for ((row_start, row_stop), (col_start, col_stop)), block in blocks:
+            np.testing.assert_allclose(
+                block, field[row_start:row_stop, col_start:col_stop])
+
+    def test_parses_legacy_noise_vectors(self):
+        with fsspec.open("memory://noise/legacy.xml", "wb") as f:
+            f.write(LEGACY_NOISE)
+        noise = NoiseVectors.from_xml("memory://noise/legacy.xml")
+
+        self.assertEqual(noise.polarisation, "HH")
+        self.assertEqual(noise.range_offsets.tolist(), [0, 3, 5])
+        self.assertEqual(noise.azimuth_swath, [])
+        field = noise.interpolate(((0, 11), (0, 21)))
+        self.assertEqual(field[0, 10], 2.0)
+        self.assertEqual(field[10, 10], 4.0)
+        self.assertEqual(field[5, 20], 4.0)
+
+    def test_reads_noise_vectors_by_polarisation(self):
+        noise = MetadataLinks(GRANULE_HREF).read_noise_vectors()
+        self.assertEqual(set(noise), {"VV", "VH"})
@@ -0,0 +1,162 @@
+import json
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+from tempfile import TemporaryDirectory
+
+from click.testing import CliRunner
+from shapely.geometry import box
+from stactools.testing import CliTestCase
+
+from stactools.sentinel1_grd.commands import create_sentinel1grd_command
+from stactools.sentinel1_grd.overlaps import (DUPLICATE, OVERLAP, REPROCESSING,
+                                              Footprint, FootprintIndex,
+                                              footprint_from_item,
+                                              footprint_from_record)
+from stactools.sentinel1_grd.product_metadata import read_product_record
+from stactools.sentinel1_grd.stac import create_item
+from tests import test_data
+
+GRANULE_HREF = test_data.get_path(
+    "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE"
+)
+
+NAME = "S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8"
+START = datetime(2021, 8, 9, 17, 39, 53, tzinfo=timezone.utc)
+SLICE = timedelta(seconds=25)
+
+
+def footprint(id, geometry, start, datatake_id="302867"):
+    return Footprint(id, geometry, start, start + SLICE, datatake_id)
+
+
+FOOTPRINTS = [
+    footprint(NAME, box(0, 0, 1, 1), START),
+    # A reprocessing of the first scene
+    footprint(NAME[:-4] + "A1B2", box(0, 0, 1, 1), START),
+    # The same scene under another name, with a slightly shifted footprint
+    footprint(NAME.replace("GRDH", "GRDM"), box(0.02, 0, 1.02, 1), START),
+    # The next slice of the datatake
+    footprint("next-slice", box(0, 0.9, 1, 1.9), START + SLICE),
+    # The same area 12 days later
+    footprint("next-cycle", box(0, 0, 1, 1), START + timedelta(days=12),
+              "302900"),
+    # Another area at the same time
+    footprint("elsewhere", box(10, 10, 11, 11), START, None),
+]
+
+
+class FootprintIndexTest(unittest.TestCase):
+    def test_overlaps(self):
+        index = FootprintIndex(reversed(FOOTPRINTS))
+        self.assertEqual(len(index), 6)
+
+        overlaps = {(x.first, x.second): x for x in index.overlaps()}
+        reprocessing = NAME[:-4] + "A1B2"
+        other_name = NAME.replace("GRDH", "GRDM")
+        expected = {
+            (NAME, other_name): DUPLICATE,
+            (NAME, reprocessing): REPROCESSING,
+            (NAME, "next-slice"): OVERLAP,
+            (reprocessing, other_name): DUPLICATE,
+            (reprocessing, "next-slice"): OVERLAP,
+            (other_name, "next-slice"): OVERLAP,
+        }
+        self.assertEqual({k: v.kind for k, v in overlaps.items()}, expected)
+        overlap = overlaps[(NAME, reprocessing)]
+        self.assertAlmostEqual(overlap.iou, 1.0)
+        self.assertAlmostEqual(overlap.time_overlap, 1.0)
+        overlap = overlaps[(NAME, "next-slice")]
+        self.assertAlmostEqual(overlap.iou, 0.1 / 1.9)
+        self.assertEqual(overlap.time_overlap, 0.0)
+
+        self.assertEqual(len(list(index.overlaps(min_iou=0.5))), 3)
+        self.assertEqual(
+            sorted(x.kind for x in index.duplicates()),
+            [DUPLICATE, DUPLICATE, REPROCESSING],
+        )
+        # Stricter thresholds leave the reprocessing only
+        index = FootprintIndex(FOOTPRINTS, duplicate_iou=0.99)
+        self.assertEqual([x.kind for x in index.duplicates()], [REPROCESSING])
+
+    def test_query(self):
+        index = FootprintIndex(FOOTPRINTS)
+
+        self.assertEqual([x.id for x in index.query(box(0.5, 1.5, 0.6, 1.6))],
+                         ["next-slice"])
+        self.assertEqual(
+            [
+                x.id for x in index.query(box(0.5, 0.5, 0.6, 0.6),
+                                          start=START + timedelta(days=1))
+            ],
+            ["next-cycle"],
+        )
+        self.assertEqual(
+            len(index.query(box(0.5, 0.5, 0.6, 0.6), end=START + SLICE)), 3)
+
+    def test_datatakes(self):
+        index = FootprintIndex(FOOTPRINTS)
+
+        datatakes = index.datatakes()
+        self.assertEqual(set(datatakes), {"302867", "302900"})
+        self.assertEqual(datatakes["302867"][-1], "next-slice")
+        self.assertEqual(len(datatakes["302867"]), 4)
+
+    def test_footprints_of_items_and_records(self):
+        item = create_item(GRANULE_HREF)
+        record = read_product_record(GRANULE_HREF)
+
+        from_item = footprint_from_item(item)
+        from_record = footprint_from_record(record)
+        self.assertEqual(from_item.id, NAME)
+        self.assertEqual(from_item.datatake_id, "302867")
+        self.assertEqual(from_item.start_datetime, record.start_datetime)
+        self.assertEqual(from_item.end_datetime, record.end_datetime)
+        self.assertTrue(from_item.geometry.equals(from_record.geometry))
+        self.assertEqual(from_item._replace(geometry=None),
+                         from_record._replace(geometry=None))
+
+
+class FindDuplicatesCommandTest(CliTestCase):
+    def create_subcommand_functions(self):
+        return [create_sentinel1grd_command]
+
+    def test_find_duplicates(self):
+        with TemporaryDirectory() as tmp_dir:
+            item = create_item(GRANULE_HREF).to_dict(include_self_link=False)
+            for unique_id in ["6FF8", "A1B2"]:
+                item["id"] = NAME[:-4] + unique_id
+                with open(os.path.join(tmp_dir, f"{item['id']}.json"),
+                          "w") as f:
+                    json.dump(item, f)
+
+            datatakes_path = os.path.join(tmp_dir, "datatakes.txt")
+            result = self.run_command([
+                "sentinel1grd", "find-duplicates", tmp_dir, "--datatakes",
+                datatakes_path
+            ])
+            self.assertEqual(result.exit_code, 0, msg=result.output)
+            overlaps = [json.loads(x) for x in result.output.splitlines()]
+            self.assertEqual(len(overlaps), 1)
+            self.assertEqual((overlaps[0]["first"], overlaps[0]["second"],
+                              overlaps[0]["kind"]),
+                             (NAME, NAME[:-4] + "A1B2", REPROCESSING))
+            self.assertAlmostEqual(overlaps[0]["iou"], 1.0)
+            with open(datatakes_path) as f:
+                self.assertEqual(json.load(f),
+                                 {"302867": [NAME, NAME[:-4] + "A1B2"]})
+
+            granule_list = os.path.join(tmp_dir, "granules.txt")
+            with open(granule_list, "w") as f:
+                f.write(f"{GRANULE_HREF}\n/does/not/exist.SAFE\n")
+            # Failures are reported on stderr, apart from the overlaps
+            cmd = [
+                "sentinel1grd", "find-duplicates", granule_list, "--granules",
+                "--workers", "1", "--all-overlaps"
+            ]
+            runner = CliRunner(mix_stderr=False)
+            result = runner.invoke(self.cli, cmd, catch_exceptions=False)
+            self.assertEqual(result.exit_code, 0, msg=result.stderr)
+            self.assertEqual(result.stdout, "")
+            self.assertEqual(result.stderr,
+                             "Failed to read /does/not/exist.SAFE\n")
@@ -0,0 +1,84 @@
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import rasterio
+
+from stactools.sentinel1_grd.metadata_links import MetadataLinks
+from stactools.sentinel1_grd.stac import create_item
+from stactools.sentinel1_grd.thumbnail import render_thumbnail, scale_to_db
+from tests import GRANULE_HREF, GRANULE_NAME
+from tests.measurements import write_measurement
+
+
+def _write_measurement(path: str) -> None:
+    # Bright bottom half and a nodata band on the left
+    data = np.full((1, 600, 1000), 100, dtype=np.uint16)
+    data[:, 300:, :] = 1000
+    data[:, :, :100] = 0
+    write_measurement(path,
+                      data,
+                      transform=rasterio.Affine(0.001, 0, 10, 0, -0.001, 50))
+
+
+class ThumbnailTest(unittest.TestCase):
+    def test_no_quick_look(self):
+        self.assertIsNone(MetadataLinks(GRANULE_HREF).thumbnail_href)
+        item = create_item(GRANULE_HREF)
+        self.assertNotIn("thumbnail", item.assets)
+
+    def test_quick_look(self):
+        with TemporaryDirectory() as tmp:
+            granule_href = os.path.join(tmp, GRANULE_NAME)
+            shutil.copytree(GRANULE_HREF, granule_href)
+            os.makedirs(os.path.join(granule_href, "preview"))
+            quick_look = os.path.join(granule_href, "preview",
+                                      "quick-look.png")
+            open(quick_look, "wb").close()
+
+            item = create_item(granule_href, thumbnail_dir=tmp)
+            self.assertEqual(item.assets["thumbnail"].href, quick_look)
+
+    def test_scale_to_db(self):
+        image, alpha = scale_to_db(np.array([[0, 10, 100], [1000, 10000, 0]],
+                                            dtype=np.uint16),
+                                   percentiles=(0, 100))
+
+        self.assertEqual(image.tolist(), [[0, 0, 85], [170, 255, 0]])
+        self.assertEqual(alpha.tolist(), [[0, 255, 255], [255, 255, 0]])
+
+    def test_render_thumbnail(self):
+        with TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "iw-vv.tiff")
+            _write_measurement(src)
+            dst = os.path.join(tmp, "thumbnails", "thumbnail.png")
+
+            self.assertEqual(render_thumbnail(src, dst, size=100), dst)
+
+            with rasterio.open(dst) as dataset:
+                self.assertEqual(dataset.shape, (60, 100))
+                image, alpha = dataset.read()
+            self.assertEqual(alpha[:, :10].max(), 0)
+            self.assertEqual(alpha[:, 10:].min(), 255)
+            self.assertLess(image[0, 50], image[59, 50])
+
+    def test_create_item_renders_thumbnail(self):
+        with TemporaryDirectory() as tmp:
+            granule_href = os.path.join(tmp, GRANULE_NAME)
+            shutil.copytree(GRANULE_HREF, granule_href)
+            measurement_dir = os.path.join(granule_href, "measurement")
+            for name in os.listdir(measurement_dir):
+                _write_measurement(os.path.join(measurement_dir, name))
+
+            item = create_item(granule_href, thumbnail_dir=tmp)
+
+            asset = item.assets["thumbnail"]
+            self.assertEqual(asset.href, os.path.join(tmp, f"{item.id}.png"))
+            self.assertEqual(asset.roles, ["thumbnail"])
+            self.assertTrue(os.path.exists(asset.href))
+
+            # Empty measurements are not rendered
+            item = create_item(GRANULE_HREF, thumbnail_dir=tmp)
+            self.assertNotIn("thumbnail", item.assets)
@@ -0,0 +1,116 @@
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+
+import pystac
+import rasterio
+from datetime import datetime
+
+from stactools.sentinel1_grd.bands import image_asset_from_href
+from stactools.sentinel1_grd.profiling import Profile
+from stactools.sentinel1_grd.stac import create_item
+from stactools.sentinel1_grd.tiff import TiffError, TiffHeader
+from tests import GRANULE_HREF
+from tests.measurements import write_measurement
+
+
+def _item() -> pystac.Item:
+    return pystac.Item(id="item",
+                       geometry=None,
+                       bbox=None,
+                       datetime=datetime(2021, 8, 9, 17, 39, 53),
+                       properties={})
+
+
+class TiffHeaderTest(unittest.TestCase):
+    def test_reads_header(self):
+        for bigtiff in ["NO", "YES"]:
+            with self.subTest(bigtiff=bigtiff), TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "iw-vv.tiff")
+                write_measurement(path, BIGTIFF=bigtiff)
+                header = TiffHeader(path)
+
+                self.assertEqual(header.shape, [1000, 2000])
+                self.assertEqual(header.data_type, "uint16")
+                self.assertEqual(header.bits_per_sample, 16)
+                self.assertIsNone(header.nodata)
+                self.assertEqual(header.gcps.shape, (210, 6))
+                self.assertEqual(header.gcps[1].tolist(),
+                                 [100, 0, 0, 10.01, 50, 0])
+                self.assertTrue(header.is_georeferenced_by_gcps)
+                # Never more than a few blocks, whatever the image size
+                self.assertLessEqual(header.reads, 3)
+
+    def test_reads_nodata(self):
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "iw-vv.tiff")
+            write_measurement(path, dtype="float32", nodata=-1)
+            header = TiffHeader(path)
+
+            self.assertEqual(header.data_type, "float32")
+            self.assertEqual(header.nodata, -1)
+
+    def test_empty_tiff(self):
+        href = os.path.join(
+            GRANULE_HREF, "measurement",
+            "s1a-iw-grd-vv-20210809t173953-20210809t174018-039156-049f13-001.tiff"
+        )
+        with self.assertRaises(TiffError):
+            TiffHeader(href)
+
+        # Assets of empty measurements are created without raster metadata
+        key, asset = image_asset_from_href(href, _item(), pixel_spacing=10)
+        self.assertEqual(key, "vv")
+        self.assertEqual(asset.title, "VV - 10m")
+        self.assertNotIn("raster:bands", asset.extra_fields)
+
+    def test_image_asset_raster_bands(self):
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "iw-vh.tiff")
+            write_measurement(path)
+            item = _item()
+            key, asset = image_asset_from_href(path, item, pixel_spacing=10)
+
+            self.assertEqual(key, "vh")
+            self.assertEqual(asset.extra_fields["raster:bands"],
+                             [{
+                                 "data_type": "uint16",
+                                 "bits_per_sample": 16,
+                                 "spatial_resolution": 10,
+                             }])
+            self.assertEqual(asset.extra_fields["proj:shape"], [1000, 2000])
+            self.assertIn(
+                "https://stac-extensions.github.io/raster/v1.0.0/schema.json",
+                item.stac_extensions)
+
+    def test_item_and_asset_shapes_match(self):
+        with TemporaryDirectory() as tmp:
+            granule_href = os.path.join(tmp, os.path.basename(GRANULE_HREF))
+            shutil.copytree(GRANULE_HREF, granule_href)
+            measurement_dir = os.path.join(granule_href, "measurement")
+            for name in os.listdir(measurement_dir):
+                # Full size, but sparse, so that it takes little space
+                with rasterio.open(os.path.join(measurement_dir, name),
+                                   "w",
+                                   driver="GTiff",
+                                   width=26144,
+                                   height=16676,
+                                   count=1,
+                                   dtype="uint16",
+                                   tiled=True,
+                                   SPARSE_OK=True):
+                    pass
+
+            profile = Profile(granule_href)
+            item = create_item(granule_href, profile)
+
+            self.assertEqual(item.properties["proj:shape"], [16676, 26144])
+            for key in ["vv", "vh"]:
+                self.assertEqual(item.assets[key].extra_fields["proj:shape"],
+                                 item.properties["proj:shape"])
+                # The header is read through the profile
+                self.assertEqual(
+                    profile.files[os.path.join(
+                        measurement_dir,
+                        os.path.basename(item.assets[key].href))]["opens"], 1)
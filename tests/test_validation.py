@@ -0,0 +1,135 @@
+import copy
+import json
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from stactools.testing import CliTestCase
+
+from stactools.sentinel1_grd.commands import create_sentinel1grd_command
+from stactools.sentinel1_grd.stac import create_item
+from stactools.sentinel1_grd.validation import (BUNDLED_SCHEMAS,
+                                                BundledSchemaValidator,
+                                                validate_item_files,
+                                                validate_items)
+from tests import test_data
+
+GRANULE_HREF = test_data.get_path(
+    "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE"
+)
+
+SAR_SCHEMA = "https://stac-extensions.github.io/sar/v1.0.0/schema.json"
+PROJ_SCHEMA = "https://stac-extensions.github.io/projection/v1.0.0/schema.json"
+FILE_SCHEMA = "https://stac-extensions.github.io/file/v2.0.0/schema.json"
+
+
+class ValidationTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.item = json.loads(
+            json.dumps(
+                create_item(GRANULE_HREF).to_dict(include_self_link=False)))
+
+    def invalid_items(self):
+        bad_band = copy.deepcopy(self.item)
+        bad_band["id"] = "bad-band"
+        bad_band["properties"]["sar:frequency_band"] = "Z"
+        no_epsg = copy.deepcopy(self.item)
+        no_epsg["id"] = "no-epsg"
+        del no_epsg["properties"]["proj:epsg"]
+        return [bad_band, no_epsg]
+
+    def test_item_schemas_are_bundled(self):
+        for uri in self.item["stac_extensions"]:
+            self.assertIn(uri, BUNDLED_SCHEMAS)
+
+    def test_item_errors(self):
+        validator = BundledSchemaValidator()
+        self.assertEqual(validator.item_errors(self.item), [])
+
+        bad_band, no_epsg = self.invalid_items()
+        errors = validator.item_errors(bad_band)
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith(SAR_SCHEMA))
+        self.assertIn("sar:frequency_band", errors[0])
+        errors = validator.item_errors(no_epsg)
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith(PROJ_SCHEMA))
+
+        bad_checksum = copy.deepcopy(self.item)
+        bad_checksum["assets"]["vv"]["file:checksum"] = "not hexadecimal"
+        errors = validator.item_errors(bad_checksum)
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith(FILE_SCHEMA))
+
+        unknown = copy.deepcopy(self.item)
+        unknown["stac_extensions"].append(
+            "https://example.com/unknown/v1.0.0/schema.json")
+        self.assertEqual(validator.item_errors(unknown), [
+            "No bundled schema for "
+            "https://example.com/unknown/v1.0.0/schema.json"
+        ])
+
+    def test_validate_items(self):
+        items = [self.item] + self.invalid_items() + [self.item]
+        for workers in [1, 2]:
+            with self.subTest(workers=workers):
+                result = validate_items(iter(items),
+                                        workers=workers,
+                                        chunk_size=3)
+                self.assertEqual(result.count, 4)
+                self.assertEqual([x[0] for x in result.failures],
+                                 ["bad-band", "no-epsg"])
+
+    def test_validate_item_files(self):
+        with TemporaryDirectory() as tmp_dir:
+            with open(os.path.join(tmp_dir, "items.ndjson"), "w") as f:
+                for item in [self.item] + self.invalid_items():
+                    f.write(json.dumps(item) + "\n")
+            result = validate_item_files(os.path.join(tmp_dir, "items.ndjson"),
+                                         workers=1)
+            self.assertEqual(result.count, 3)
+            self.assertEqual(
+                [x[0] for x in result.failures],
+                [os.path.join(tmp_dir, f"items.ndjson:{i}") for i in [2, 3]])
+
+            os.mkdir(os.path.join(tmp_dir, "items"))
+            with open(os.path.join(tmp_dir, "items", "item.json"), "w") as f:
+                json.dump(self.item, f)
+            # Not an item, so it is skipped
+            with open(os.path.join(tmp_dir, "failures.json"), "w") as f:
+                json.dump([], f)
+            result = validate_item_files(tmp_dir, workers=1)
+            self.assertEqual(result.count, 1)
+            self.assertEqual(result.failures, [])
+
+
+class ValidateCommandTest(CliTestCase):
+    def create_subcommand_functions(self):
+        return [create_sentinel1grd_command]
+
+    def test_validate(self):
+        with TemporaryDirectory() as tmp_dir:
+            result = self.run_command(
+                ["sentinel1grd", "create-item", GRANULE_HREF, tmp_dir])
+            self.assertEqual(result.exit_code, 0, msg=result.output)
+
+            result = self.run_command(["sentinel1grd", "validate", tmp_dir])
+            self.assertEqual(result.exit_code, 0, msg=result.output)
+            self.assertIn("Validated 1 item(s), 0 invalid", result.output)
+
+            item_path = os.path.join(tmp_dir, os.listdir(tmp_dir)[0])
+            with open(item_path) as f:
+                item = json.load(f)
+            item["properties"]["sar:polarizations"] = ["XX"]
+            with open(item_path, "w") as f:
+                json.dump(item, f)
+            report_path = os.path.join(tmp_dir, "report.json")
+            result = self.run_command([
+                "sentinel1grd", "validate", item_path, "--failures",
+                report_path
+            ])
+            self.assertEqual(result.exit_code, 1)
+            with open(report_path) as f:
+                self.assertEqual([x["href"] for x in json.load(f)],
+                                 [item_path])
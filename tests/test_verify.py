@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import shutil
+import unittest
+import zipfile
+from tempfile import TemporaryDirectory
+
+from lxml import etree
+from stactools.testing import CliTestCase
+
+from stactools.sentinel1_grd.commands import create_sentinel1grd_command
+from stactools.sentinel1_grd.manifest import SafeManifest
+from stactools.sentinel1_grd.verify import verify_granule, verify_granules
+from tests import test_data
+
+GRANULE_NAME = (
+    "S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE")
+GRANULE_HREF = test_data.get_path(f"data-files/{GRANULE_NAME}")
+MEASUREMENT = ("measurement/s1a-iw-grd-vv-20210809t173953-20210809t174018-"
+               "039156-049f13-001.tiff")
+ANNOTATION = ("annotation/s1a-iw-grd-vv-20210809t173953-20210809t174018-"
+              "039156-049f13-001.xml")
+
+
+def complete_granule(dst):
+    """Copies the test granule, fills in the files it lacks or has empty,
+    and sets their sizes and checksums in the manifest."""
+    granule_href = os.path.join(dst, GRANULE_NAME)
+    shutil.copytree(GRANULE_HREF, granule_href)
+    manifest_path = os.path.join(granule_href, "manifest.safe")
+    manifest = etree.parse(manifest_path)
+    for i, byte_stream in enumerate(
+            manifest.iterfind("dataObjectSection/*/byteStream")):
+        path = os.path.join(
+            granule_href,
+            byte_stream.find("fileLocation").get("href").strip("./"))
+        if path.endswith(".tiff"):
+            data = bytes(range(256)) * (1000 + i)
+        elif not os.path.exists(path):
+            data = b"preview"
+        else:
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        byte_stream.set("size", str(len(data)))
+        byte_stream.find("checksum").text = hashlib.md5(data).hexdigest()
+    manifest.write(manifest_path, xml_declaration=True, encoding="UTF-8")
+    return granule_href
+
+
+class VerifyTest(unittest.TestCase):
+    def test_data_objects(self):
+        data_objects = SafeManifest(GRANULE_HREF).data_objects
+        self.assertEqual(len(data_objects), 11)
+        data_object = data_objects[ANNOTATION]
+        self.assertEqual(data_object.href,
+                         os.path.join(GRANULE_HREF, ANNOTATION))
+        self.assertEqual(data_object.size, 1726361)
+        self.assertEqual(data_object.checksum,
+                         "51eb954227920c75d6cd7df8e9110f4c")
+        self.assertEqual(data_object.checksum_name, "MD5")
+
+    def test_test_granule(self):
+        # The measurements of the test granule are empty, and its previews
+        # are missing
+        result = verify_granule(GRANULE_HREF)
+        self.assertFalse(result.ok)
+        self.assertEqual(len(result.failures), 5)
+        self.assertEqual(
+            dict(result.failures)[MEASUREMENT],
+            "Size is 0 bytes, manifest lists 872232364 bytes")
+        # Nothing is hashed after a size mismatch
+        self.assertEqual(result.bytes_read, 0)
+        self.assertFalse(any(x.hashed for x in result.files))
+
+        result = verify_granule(GRANULE_HREF, fail_fast=False)
+        self.assertEqual(len(result.failures), 5)
+        self.assertEqual(result.bytes_read, 6341958)
+        self.assertEqual(sum(x.hashed for x in result.files), 6)
+
+    def test_verify_granule(self):
+        with TemporaryDirectory() as tmp_dir:
+            granule_href = complete_granule(tmp_dir)
+            for threads in [1, 3]:
+                with self.subTest(threads=threads):
+                    result = verify_granule(granule_href,
+                                            threads=threads,
+                                            chunk_size=1000)
+                    self.assertTrue(result.ok, msg=result.failures)
+                    self.assertTrue(all(x.hashed for x in result.files))
+
+            # Same size, different content
+            with open(os.path.join(granule_href, MEASUREMENT), "r+b") as f:
+                f.write(b"\xff")
+            result = verify_granule(granule_href)
+            self.assertEqual([x[0] for x in result.failures], [MEASUREMENT])
+            self.assertTrue(result.failures[0][1].startswith("MD5 checksum"))
+
+            archive = os.path.join(tmp_dir, f"{GRANULE_NAME}.zip")
+            shutil.make_archive(archive[:-4], "zip", tmp_dir, GRANULE_NAME)
+            self.assertTrue(zipfile.is_zipfile(archive))
+            results = list(
+                verify_granules([archive,
+                                 os.path.join(tmp_dir, "missing")]))
+            self.assertEqual([x[0] for x in results[0].failures],
+                             [MEASUREMENT])
+            self.assertEqual([x[0] for x in results[1].failures],
+                             ["manifest.safe"])
+
+
+class VerifyCommandTest(CliTestCase):
+    def create_subcommand_functions(self):
+        return [create_sentinel1grd_command]
+
+    def test_verify(self):
+        with TemporaryDirectory() as tmp_dir:
+            granule_href = complete_granule(tmp_dir)
+            result = self.run_command(["sentinel1grd", "verify", granule_href])
+            self.assertEqual(result.exit_code, 0, msg=result.output)
+            self.assertIn("Verified 1 scene(s), 0 not matching", result.output)
+
+            report_path = os.path.join(tmp_dir, "report.json")
+            result = self.run_command([
+                "sentinel1grd", "verify", GRANULE_HREF, "--failures",
+                report_path
+            ])
+            self.assertEqual(result.exit_code, 1)
+            with open(report_path) as f:
+                self.assertEqual(len(json.load(f)), 5)
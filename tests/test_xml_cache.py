@@ -0,0 +1,142 @@
+import os
+import time
+import unittest
+import zipfile
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from fsspec.implementations.zip import ZipFileSystem
+from stactools.sentinel1_grd.batch import create_items
+from stactools.sentinel1_grd.metadata_links import MetadataLinks
+from stactools.sentinel1_grd.stac import create_item
+from stactools.sentinel1_grd.xml_cache import (XmlCache, disable_xml_cache,
+                                               enable_xml_cache)
+from tests import test_data
+
+GRANULE_HREF = test_data.get_path(
+    "data-files/S1A_IW_GRDH_1SDV_20210809T173953_20210809T174018_039156_049F13_6FF8.SAFE"
+)
+
+
+def _write(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class XmlCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(disable_xml_cache)
+
+    def test_caches_files(self):
+        with TemporaryDirectory() as tmp:
+            href = os.path.join(tmp, "manifest.safe")
+            _write(href, b"<a>1</a>")
+            cache = XmlCache(os.path.join(tmp, "cache"))
+
+            self.assertEqual(cache.read(href), b"<a>1</a>")
+            self.assertEqual(cache.read(href), b"<a>1</a>")
+            self.assertEqual(cache.stats["hits"], 1)
+            self.assertEqual(cache.stats["misses"], 1)
+            self.assertEqual(cache.stats["bytes_downloaded"], 8)
+            self.assertEqual(len(os.listdir(cache.directory)), 1)
+
+            # A changed file is a new entry
+            _write(href, b"<a>22</a>")
+            self.assertEqual(cache.read(href), b"<a>22</a>")
+            self.assertEqual(cache.stats["misses"], 2)
+
+            # Entries persist across cache instances
+            cache = XmlCache(cache.directory)
+            self.assertEqual(cache.size, 17)
+            self.assertEqual(cache.read(href), b"<a>22</a>")
+            self.assertEqual(cache.stats["hits"], 1)
+
+    def test_caches_zipped_files_by_archive_version(self):
+        with TemporaryDirectory() as tmp:
+            archive_path = os.path.join(tmp, "granule.SAFE.zip")
+            with zipfile.ZipFile(archive_path, "w") as archive:
+                archive.writestr("manifest.safe", b"<a>1</a>")
+            href = f"zip://manifest.safe::{archive_path}"
+            cache = XmlCache(os.path.join(tmp, "cache"))
+
+            self.assertEqual(cache.read(href), b"<a>1</a>")
+            self.assertEqual(cache.read(href), b"<a>1</a>")
+            self.assertEqual(cache.stats["hits"], 1)
+
+            # A rewritten archive whose member keeps its size is a new entry.
+            # fsspec keeps the archive open between reads of this process,
+            # while it would usually be rewritten between runs.
+            ZipFileSystem.clear_instance_cache()
+            with zipfile.ZipFile(archive_path, "w") as archive:
+                archive.writestr("manifest.safe", b"<a>2</a>")
+            stat = os.stat(archive_path)
+            os.utime(archive_path, (stat.st_atime, stat.st_mtime + 1))
+            self.assertEqual(cache.read(href), b"<a>2</a>")
+            self.assertEqual(cache.stats["misses"], 2)
+
+    def test_trusted_cache_does_not_check_files(self):
+        with TemporaryDirectory() as tmp:
+            href = os.path.join(tmp, "manifest.safe")
+            _write(href, b"<a>1</a>")
+            cache = XmlCache(os.path.join(tmp, "cache"), revalidate=False)
+            self.assertEqual(cache.read(href), b"<a>1</a>")
+
+            with mock.patch("stactools.sentinel1_grd.xml_cache.url_to_fs"
+                            ) as url_to_fs:
+                self.assertEqual(cache.read(href), b"<a>1</a>")
+            url_to_fs.assert_not_called()
+            self.assertEqual(cache.stats["hits"], 1)
+
+    def test_evicts_least_recently_used(self):
+        with TemporaryDirectory() as tmp:
+            hrefs = [os.path.join(tmp, f"{i}.xml") for i in range(3)]
+            for href in hrefs:
+                _write(href, b"x" * 100)
+            cache = XmlCache(os.path.join(tmp, "cache"), max_size=250)
+
+            cache.read(hrefs[0])
+            cache.read(hrefs[1])
+            # The second file was used long ago, and the first one again now
+            past = time.time() - 60
+            os.utime(
+                os.path.join(cache.directory,
+                             cache.key(hrefs[1]) + ".xml"), (past, past))
+            cache.read(hrefs[0])
+            cache.read(hrefs[2])
+
+            self.assertEqual(cache.stats["evictions"], 1)
+            self.assertEqual(cache.size, 200)
+            cache.read(hrefs[0])
+            cache.read(hrefs[2])
+            self.assertEqual(cache.stats["hits"], 3)
+            cache.read(hrefs[1])
+            self.assertEqual(cache.stats["misses"], 4)
+
+    def test_create_item_with_cache(self):
+        expected = create_item(GRANULE_HREF).to_dict()
+        with TemporaryDirectory() as tmp:
+            cache = enable_xml_cache(tmp)
+
+            self.assertEqual(create_item(GRANULE_HREF).to_dict(), expected)
+            self.assertEqual(cache.stats["hits"], 0)
+            misses = cache.stats["misses"]
+            self.assertGreater(misses, 0)
+
+            self.assertEqual(create_item(GRANULE_HREF).to_dict(), expected)
+            self.assertEqual(cache.stats["hits"], misses)
+            self.assertEqual(cache.stats["misses"], misses)
+
+            MetadataLinks(GRANULE_HREF).read_calibrations()
+            self.assertEqual(cache.stats["misses"], misses + 2)
+
+    def test_workers_use_cache(self):
+        with TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, "cache")
+            enable_xml_cache(cache_dir)
+
+            result = create_items([GRANULE_HREF],
+                                  os.path.join(tmp, "items"),
+                                  workers=2)
+
+            self.assertEqual(result.failures, [])
+            self.assertGreater(len(os.listdir(cache_dir)), 0)